@@ -5,6 +5,11 @@ export const getServerUrl = () => {
   return process.env.GATSBY_API_URL || "/api";
 };
 
+// Resolve URLs returned by the API (e.g. "/api/runs/1/blobs/<digest>") against the server URL
+export const resolveApiUrl = (url: string) => {
+  return url.startsWith("/api/") ? getServerUrl() + url.slice(4) : url;
+};
+
 export function setCookie(name: string, value: any, days: number) {
   let expires = "";
   if (days) {
@@ -22,6 +22,7 @@ import PlanView from "./plan";
 import { IPlanStep, convertToIPlanSteps } from "../../types/plan";
 import RenderFile from "../../common/filerenderer";
 import LearnPlanButton from "../../features/Plans/LearnPlanButton";
+import { resolveApiUrl } from "../../utils";
 
 // Types
 interface MessageProps {
@@ -84,7 +85,7 @@ interface AttachedFile {
 
 // Helper functions
 const getImageSource = (item: ImageContent): string => {
-  if (item.url) return item.url;
+  if (item.url) return resolveApiUrl(item.url);
   if (item.data) return `data:image/png;base64,${item.data}`;
   return "/api/placeholder/400/320";
 };
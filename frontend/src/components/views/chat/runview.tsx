@@ -9,6 +9,7 @@ import ApprovalButtons from "./approval_buttons";
 import ChatInput from "./chatinput";
 import { IStatus } from "../../types/app";
 import { RcFile } from "antd/es/upload";
+import { resolveApiUrl } from "../../utils";
 
 const DETAIL_VIEWER_CONTAINER_ID = "detail-viewer-container";
 
@@ -167,7 +168,7 @@ const RunView: React.FC<RunViewProps> = ({
         msg.config.content.forEach((item: any, itemIndex: number) => {
           if (typeof item === "object" && ("url" in item || "data" in item)) {
             const imageUrl =
-              ("url" in item && item.url) ||
+              ("url" in item && item.url && resolveApiUrl(item.url)) ||
               ("data" in item && item.data
                 ? `data:image/png;base64,${item.data}`
                 : "");
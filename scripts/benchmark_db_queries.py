@@ -0,0 +1,191 @@
+"""
+Times the hot database queries of the backend with and without the secondary indexes
+declared on the models in `magentic_ui.backend.datamodel.db`.
+
+Seeds a SQLite database with sessions, runs and messages, times each query on it
+without the indexes, then creates the indexes and times the queries again.
+
+Usage:
+    python scripts/benchmark_db_queries.py --messages 1000000
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from sqlalchemy import Engine, create_engine, select, text
+from sqlmodel import SQLModel
+
+from magentic_ui.backend.datamodel import Message, Run, Session
+
+USERS = 50
+RUNS_PER_SESSION = 5
+SEED_CHUNK_SIZE = 10_000
+
+
+def seed(engine: Engine, num_messages: int, num_sessions: int) -> None:
+    """Insert sessions, runs and messages spread evenly over them"""
+    start = datetime(2025, 1, 1)
+    num_runs = num_sessions * RUNS_PER_SESSION
+    with engine.begin() as conn:
+        conn.execute(
+            Session.__table__.insert(),  # type: ignore
+            [
+                {
+                    "id": i + 1,
+                    "user_id": f"user-{i % USERS}",
+                    "created_at": start + timedelta(seconds=i),
+                    "name": f"Session {i + 1}",
+                }
+                for i in range(num_sessions)
+            ],
+        )
+        conn.execute(
+            Run.__table__.insert(),  # type: ignore
+            [
+                {
+                    "id": i + 1,
+                    "session_id": i // RUNS_PER_SESSION + 1,
+                    "user_id": f"user-{(i // RUNS_PER_SESSION) % USERS}",
+                    "created_at": start + timedelta(seconds=i),
+                    "status": "complete",
+                }
+                for i in range(num_runs)
+            ],
+        )
+
+    config = {"source": "assistant", "content": "x" * 200}
+    for offset in range(0, num_messages, SEED_CHUNK_SIZE):
+        rows: List[Dict[str, Any]] = []
+        for i in range(offset, min(offset + SEED_CHUNK_SIZE, num_messages)):
+            # Interleave runs so the messages of a run are spread over the table
+            run_id = i % num_runs + 1
+            rows.append(
+                {
+                    "id": i + 1,
+                    "run_id": run_id,
+                    "session_id": (run_id - 1) // RUNS_PER_SESSION + 1,
+                    "user_id": f"user-{((run_id - 1) // RUNS_PER_SESSION) % USERS}",
+                    "created_at": start + timedelta(milliseconds=i),
+                    "config": config,
+                }
+            )
+        with engine.begin() as conn:
+            conn.execute(Message.__table__.insert(), rows)  # type: ignore
+
+
+def session_run_ids(session_id: int) -> List[int]:
+    """The ids of the runs seeded for a session"""
+    first = (session_id - 1) * RUNS_PER_SESSION + 1
+    return list(range(first, first + RUNS_PER_SESSION))
+
+
+def hot_queries(num_sessions: int) -> Dict[str, Callable[[random.Random], Any]]:
+    """The queries issued by the routes and the WebSocketManager, keyed by name"""
+    message = Message.__table__  # type: ignore
+    run = Run.__table__  # type: ignore
+    session = Session.__table__  # type: ignore
+    num_runs = num_sessions * RUNS_PER_SESSION
+    return {
+        "messages of a run": lambda rng: select(message)
+        .where(message.c.run_id == rng.randint(1, num_runs))
+        .order_by(message.c.created_at),
+        "messages of a session's runs": lambda rng: select(message)
+        .where(message.c.run_id.in_(session_run_ids(rng.randint(1, num_sessions))))
+        .order_by(message.c.created_at),
+        "page of session messages": lambda rng: select(message)
+        .where(message.c.session_id == rng.randint(1, num_sessions))
+        .where(message.c.id > 0)
+        .order_by(message.c.id)
+        .limit(100),
+        "runs of a session": lambda rng: select(run)
+        .where(run.c.session_id == rng.randint(1, num_sessions))
+        .order_by(run.c.created_at),
+        "sessions of a user": lambda rng: select(session)
+        .where(session.c.user_id == f"user-{rng.randrange(USERS)}")
+        .order_by(session.c.created_at.desc()),
+    }
+
+
+def time_queries(
+    engine: Engine, num_sessions: int, repeat: int
+) -> Dict[str, Dict[str, Any]]:
+    """Run every hot query `repeat` times and return its median time and plan"""
+    results: Dict[str, Dict[str, Any]] = {}
+    with engine.connect() as conn:
+        for name, build in hot_queries(num_sessions).items():
+            rng = random.Random(0)
+            statement = build(rng)
+            compiled = statement.compile(
+                dialect=engine.dialect, compile_kwargs={"literal_binds": True}
+            )
+            plan = conn.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).fetchall()
+            timings: List[float] = []
+            for _ in range(repeat):
+                statement = build(rng)
+                start = time.perf_counter()
+                conn.execute(statement).fetchall()
+                timings.append(time.perf_counter() - start)
+            results[name] = {
+                "median_ms": statistics.median(timings) * 1000,
+                "plan": "; ".join(str(row[-1]) for row in plan),
+            }
+    return results
+
+
+def set_indexes(engine: Engine, create: bool) -> None:
+    """Create or drop the secondary indexes declared on the benchmarked tables"""
+    for model in (Session, Run, Message):
+        for index in model.__table__.indexes:  # type: ignore
+            if create:
+                index.create(engine, checkfirst=True)
+            else:
+                index.drop(engine, checkfirst=True)
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--sessions", type=int, default=2_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument(
+        "--db", type=Path, default=None, help="Database file, a temporary one if unset"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = args.db or Path(tmp_dir) / "benchmark.db"
+        engine = create_engine(f"sqlite:///{db_path}")
+        SQLModel.metadata.create_all(engine)
+        set_indexes(engine, create=False)
+
+        start = time.perf_counter()
+        seed(engine, args.messages, args.sessions)
+        print(
+            f"Seeded {args.messages} messages in {args.sessions} sessions "
+            f"in {time.perf_counter() - start:.1f}s"
+        )
+
+        before = time_queries(engine, args.sessions, args.repeat)
+        set_indexes(engine, create=True)
+        after = time_queries(engine, args.sessions, args.repeat)
+        engine.dispose()
+
+    print(f"\n{'query':<32}{'before (ms)':>14}{'after (ms)':>14}{'speedup':>10}")
+    for name in before:
+        b, a = before[name]["median_ms"], after[name]["median_ms"]
+        print(f"{name:<32}{b:>14.2f}{a:>14.2f}{b / max(a, 1e-6):>9.1f}x")
+    print("\nQuery plans with indexes:")
+    for name, result in after.items():
+        print(f"  {name}: {result['plan']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+Times the set-of-mark rendering of the WebSurfer on pages with many interactive regions.
+
+Compares the previous renderer, which drew every region on a full-size RGBA overlay
+before the image was scaled for the model, with `add_set_of_mark` drawing on the scaled
+image with cached labels, and with the classification alone as used for models without
+vision.
+
+Usage:
+    python scripts/benchmark_set_of_mark.py --regions 500 1000 2000
+"""
+
+import argparse
+import io
+import random
+import statistics
+import time
+from typing import Callable, Dict, List, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+from magentic_ui.agents.web_surfer._set_of_mark import (
+    TOP_NO_LABEL_ZONE,
+    _label_sprite,
+    add_set_of_mark,
+)
+from magentic_ui.tools.playwright.types import InteractiveRegion
+
+VIEWPORT = (1440, 900)
+MLM_SIZE = (1224, 765)  # WebSurfer.MLM_WIDTH and WebSurfer.MLM_HEIGHT
+
+
+def make_screenshot(rng: random.Random) -> bytes:
+    """A PNG of the viewport size with some content to compress"""
+    image = Image.new("RGB", VIEWPORT, (255, 255, 255))
+    draw = ImageDraw.Draw(image)
+    for _ in range(300):
+        x, y = rng.randrange(VIEWPORT[0]), rng.randrange(VIEWPORT[1])
+        color = (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+        draw.rectangle((x, y, x + rng.randrange(200), y + rng.randrange(40)), color)
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def make_regions(count: int, rng: random.Random) -> Dict[str, InteractiveRegion]:
+    """Regions spread over three viewports of page, most of them below the fold"""
+    regions: Dict[str, InteractiveRegion] = {}
+    for i in range(count):
+        left = rng.uniform(0, VIEWPORT[0] - 100)
+        top = rng.uniform(-VIEWPORT[1] / 2, VIEWPORT[1] * 2.5)
+        width, height = rng.uniform(20, 300), rng.uniform(12, 40)
+        rect = {
+            "x": left,
+            "y": top,
+            "left": left,
+            "top": top,
+            "width": width,
+            "height": height,
+            "right": left + width,
+            "bottom": top + height,
+        }
+        regions[str(i + 10)] = {
+            "tag_name": "option" if i % 50 == 0 else "a",
+            "role": "link",
+            "aria_name": f"Link {i}",
+            "v_scrollable": False,
+            "rects": [rect],  # type: ignore
+        }
+    return regions
+
+
+def previous_renderer(screenshot: bytes, rois: Dict[str, InteractiveRegion]) -> None:
+    """The previous algorithm: full-size RGBA overlay, labels measured and drawn per
+    region, then scaled for the model"""
+    image = Image.open(io.BytesIO(screenshot))
+    base = image.convert("RGBA")
+    font = ImageFont.load_default(14)
+    overlay = Image.new("RGBA", base.size)
+    draw = ImageDraw.Draw(overlay)
+    for original_id, roi in rois.items():
+        if roi.get("tag_name") == "option":
+            continue
+        for rect in roi["rects"]:
+            mid_x = (rect["right"] + rect["left"]) / 2.0
+            mid_y = (rect["top"] + rect["bottom"]) / 2.0
+            if not (0 <= mid_x < base.size[0] and 0 <= mid_y < base.size[1]):
+                continue
+            draw.rectangle(
+                ((rect["left"], rect["top"]), (rect["right"], rect["bottom"])),
+                outline=(255, 0, 0, 255),
+                width=2,
+            )
+            location, anchor = (rect["right"], rect["top"]), "rb"
+            if rect["top"] <= TOP_NO_LABEL_ZONE:
+                location, anchor = (rect["right"], rect["bottom"]), "rt"
+            bbox = draw.textbbox(location, original_id, font=font, anchor=anchor)
+            draw.rectangle(
+                (bbox[0] - 3, bbox[1] - 3, bbox[2] + 3, bbox[3] + 3),
+                fill=(255, 0, 0, 255),
+            )
+            draw.text(
+                location,
+                original_id,
+                fill=(255, 255, 255, 255),
+                font=font,
+                anchor=anchor,
+            )
+    comp = Image.alpha_composite(base, overlay)
+    comp.resize(MLM_SIZE).close()
+    comp.close()
+    overlay.close()
+    image.close()
+
+
+def time_call(call: Callable[[], object], repeat: int) -> float:
+    """Median time of a call in milliseconds"""
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def benchmark(count: int, repeat: int) -> List[Tuple[str, float]]:
+    rng = random.Random(count)
+    screenshot = make_screenshot(rng)
+    rois = make_regions(count, rng)
+    decoded = Image.open(io.BytesIO(screenshot))
+    decoded.load()
+
+    def render_scaled() -> None:
+        image = add_set_of_mark(decoded, rois, True, output_size=MLM_SIZE)[0]
+        assert image is not None
+        image.close()
+
+    def render_scaled_cold() -> None:
+        _label_sprite.cache_clear()
+        render_scaled()
+
+    results = [
+        (
+            "previous renderer",
+            time_call(lambda: previous_renderer(screenshot, rois), repeat),
+        ),
+        ("scaled, cold label cache", time_call(render_scaled_cold, repeat)),
+        ("scaled, warm label cache", time_call(render_scaled, repeat)),
+        (
+            "classification only",
+            time_call(
+                lambda: add_set_of_mark(screenshot, rois, True, render=False), repeat
+            ),
+        ),
+    ]
+    decoded.close()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--regions", type=int, nargs="+", default=[500, 1000, 2000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for count in args.regions:
+        print(f"\n{count} interactive regions")
+        results = benchmark(count, args.repeat)
+        baseline = results[0][1]
+        for name, median_ms in results:
+            print(f"  {name:<28}{median_ms:>10.2f} ms{baseline / median_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+import base64
+import io
+from typing import Dict, Literal, Optional, Tuple
+
+import numpy as np
+import PIL.Image
+from autogen_core import Image as AGImage
+
+# Encodings of the images sent to models
+ImageFormat = Literal["png", "jpeg", "webp"]
+
+_PIL_FORMATS: Dict[ImageFormat, str] = {"png": "PNG", "jpeg": "JPEG", "webp": "WEBP"}
+
+# The perceptual hash compares HASH_SIZE x HASH_SIZE neighbouring cells of the screenshot
+HASH_SIZE = 16
+# Cells whose brightness differs by at most this much count as equal, so that noise in
+# flat areas of the screen does not change the hash
+HASH_TOLERANCE = 2
+
+
+def encode_image(
+    image: PIL.Image.Image, format: ImageFormat = "png", quality: Optional[int] = None
+) -> bytes:
+    """
+    Encode an image as PNG, JPEG or WebP.
+
+    Args:
+        image (PIL.Image.Image): The image.
+        format (Literal["png", "jpeg", "webp"], optional): The encoding. Default: "png"
+        quality (int, optional): The quality from 1 to 100 of the lossy encodings, ignored for PNG. Default: None, the default of Pillow
+
+    Returns:
+        bytes: The encoded image.
+    """
+    buffer = io.BytesIO()
+    if format == "png":
+        image.save(buffer, format="PNG")
+    else:
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        if quality is None:
+            image.save(buffer, format=_PIL_FORMATS[format])
+        else:
+            image.save(buffer, format=_PIL_FORMATS[format], quality=quality)
+    return buffer.getvalue()
+
+
+def hash_distance(first: int, second: int) -> int:
+    """
+    Number of bits that differ between two perceptual hashes.
+
+    Args:
+        first (int): A perceptual hash, see :attr:`Screenshot.perceptual_hash`.
+        second (int): Another perceptual hash.
+
+    Returns:
+        int: The Hamming distance, 0 for screenshots that look the same.
+    """
+    return bin(first ^ second).count("1")
+
+
+class EncodedImage(AGImage):
+    """
+    An `autogen_core.Image` whose base64 encoding is computed once.
+
+    `autogen_core.Image` encodes its image to PNG every time it is serialized or sent to
+    a model. The encoding is reused here, given upfront when the bytes are known, and
+    can be JPEG or WebP to send fewer bytes. Model clients tell the formats apart by
+    their first bytes.
+
+    Args:
+        image (PIL.Image.Image): The image.
+        encoded (str, optional): The base64 encoding of `image`, computed on first use if None. Default: None
+        format (Literal["png", "jpeg", "webp"], optional): The encoding of `image` when computed on first use. Default: "png"
+        quality (int, optional): The quality of the lossy encodings, see :func:`encode_image`. Default: None
+    """
+
+    def __init__(
+        self,
+        image: PIL.Image.Image,
+        encoded: Optional[str] = None,
+        format: ImageFormat = "png",
+        quality: Optional[int] = None,
+    ) -> None:
+        super().__init__(image)
+        self._encoded = encoded
+        self._format: ImageFormat = format
+        self._quality = quality
+
+    def to_base64(self) -> str:
+        if self._encoded is None:
+            self._encoded = base64.b64encode(
+                encode_image(self.image, self._format, self._quality)
+            ).decode("utf-8")
+        return self._encoded
+
+
+class Screenshot:
+    """
+    A screenshot shared by everything that uses it during a step.
+
+    The screenshot is decoded at most once, and the scaled copies and model images
+    derived from it are cached, so the observation message, the chat history and the
+    model request all reuse the same decoded image and base64 encoding.
+
+    Args:
+        data (bytes): The PNG or JPEG bytes of the screenshot.
+    """
+
+    def __init__(self, data: bytes) -> None:
+        self.data = data
+        self._image: Optional[PIL.Image.Image] = None
+        self._ag_images: Dict[Tuple[ImageFormat, Optional[int]], EncodedImage] = {}
+        self._scaled: Dict[Tuple[int, int], PIL.Image.Image] = {}
+        self._scaled_ag_images: Dict[
+            Tuple[Tuple[int, int], ImageFormat, Optional[int]], AGImage
+        ] = {}
+        self._perceptual_hash: Optional[int] = None
+
+    @property
+    def image(self) -> PIL.Image.Image:
+        """The decoded screenshot."""
+        if self._image is None:
+            image = PIL.Image.open(io.BytesIO(self.data))
+            image.load()
+            self._image = image
+        return self._image
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """The width and height of the screenshot."""
+        return self.image.size
+
+    @property
+    def perceptual_hash(self) -> int:
+        """
+        A difference hash of the screenshot: whether each cell of a grayscale thumbnail is
+        darker than its right neighbour. Screenshots that look the same have the same
+        hash, even if their bytes differ, while small changes like a typed character may
+        not change it.
+        """
+        if self._perceptual_hash is None:
+            thumbnail = self.image.resize(
+                (HASH_SIZE + 1, HASH_SIZE), PIL.Image.Resampling.BOX
+            )
+            pixels = np.asarray(thumbnail.convert("L"), dtype=np.int16)
+            thumbnail.close()
+            bits = np.packbits(pixels[:, 1:] - pixels[:, :-1] > HASH_TOLERANCE)
+            self._perceptual_hash = int.from_bytes(bits.tobytes(), "big")
+        return self._perceptual_hash
+
+    @property
+    def format(self) -> Optional[ImageFormat]:
+        """The encoding of the screenshot bytes, None if unknown."""
+        if self.data.startswith(b"\x89PNG"):
+            return "png"
+        if self.data.startswith(b"\xff\xd8"):
+            return "jpeg"
+        if self.data.startswith(b"RIFF") and self.data[8:12] == b"WEBP":
+            return "webp"
+        return None
+
+    def to_ag_image(
+        self, format: ImageFormat = "png", quality: Optional[int] = None
+    ) -> AGImage:
+        """
+        Get the screenshot as an image for messages. The original bytes are used as they
+        are when they already have the requested encoding.
+
+        Args:
+            format (Literal["png", "jpeg", "webp"], optional): The encoding of the image. Default: "png"
+            quality (int, optional): The quality of the lossy encodings, see :func:`encode_image`. The original bytes are only reused for a lossy encoding if None. Default: None
+
+        Returns:
+            AGImage: The image, the same object for the same encoding.
+        """
+        ag_image = self._ag_images.get((format, quality))
+        if ag_image is None:
+            if self.format == format and (format == "png" or quality is None):
+                encoded = base64.b64encode(self.data).decode("utf-8")
+                ag_image = EncodedImage(self.image, encoded)
+            else:
+                ag_image = EncodedImage(self.image, format=format, quality=quality)
+            self._ag_images[(format, quality)] = ag_image
+        return ag_image
+
+    def scaled(self, size: Tuple[int, int]) -> PIL.Image.Image:
+        """
+        Get the screenshot resized to the given size.
+
+        Args:
+            size (Tuple[int, int]): The width and height.
+
+        Returns:
+            PIL.Image.Image: The resized screenshot, the same object for the same size.
+        """
+        scaled = self._scaled.get(size)
+        if scaled is None:
+            scaled = self.image if self.image.size == size else self.image.resize(size)
+            self._scaled[size] = scaled
+        return scaled
+
+    def to_scaled_ag_image(
+        self,
+        size: Tuple[int, int],
+        format: ImageFormat = "png",
+        quality: Optional[int] = None,
+    ) -> AGImage:
+        """
+        Get the screenshot resized to the given size as an image for messages.
+
+        Args:
+            size (Tuple[int, int]): The width and height.
+            format (Literal["png", "jpeg", "webp"], optional): The encoding of the image. Default: "png"
+            quality (int, optional): The quality of the lossy encodings, see :func:`encode_image`. Default: None
+
+        Returns:
+            AGImage: The image, the same object for the same size and encoding.
+        """
+        ag_image = self._scaled_ag_images.get((size, format, quality))
+        if ag_image is None:
+            if self.image.size == size:
+                ag_image = self.to_ag_image(format, quality)
+            else:
+                ag_image = EncodedImage(
+                    self.scaled(size), format=format, quality=quality
+                )
+            self._scaled_ag_images[(size, format, quality)] = ag_image
+        return ag_image
+
+    def save(self, path: str) -> None:
+        """
+        Write the bytes of the screenshot to a file.
+
+        Args:
+            path (str): The path of the file.
+        """
+        with open(path, "wb") as fh:
+            fh.write(self.data)
+
+    def close(self) -> None:
+        """Release the decoded images. Message images already handed out stay usable."""
+        for scaled in self._scaled.values():
+            if scaled is not self._image:
+                scaled.close()
+        self._scaled.clear()
+        self._scaled_ag_images.clear()
+        self._ag_images.clear()
+        if self._image is not None:
+            self._image.close()
+            self._image = None
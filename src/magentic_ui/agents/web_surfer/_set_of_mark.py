@@ -1,9 +1,11 @@
 import io
-from typing import BinaryIO, Dict, List, Tuple, cast
+from functools import lru_cache
+from typing import BinaryIO, Dict, List, Optional, Tuple, cast
 
+import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 
-from ...tools.playwright.types import DOMRectangle, InteractiveRegion
+from ...tools.playwright.types import InteractiveRegion
 
 """
 This module provides functionality to annotate screenshots with numbered markers for interactive regions.
@@ -11,13 +13,23 @@ It handles marking visible elements as well as tracking elements that are above
 """
 
 TOP_NO_LABEL_ZONE = 20  # Don't print any labels close the top of the page
+FONT_SIZE = 14  # Size of the labels on a screenshot that is not scaled
+LABEL_PADDING = 3
+OUTLINE_WIDTH = 2
+MARK_COLOR = (255, 0, 0)  # Red color for outlines and label backgrounds
+LABEL_TEXT_COLOR = (255, 255, 255)  # White text for better contrast
+
+# Regions that are always listed as visible and never classified by position
+_ALWAYS_VISIBLE_TAGS = ("option", "input, type=file")
 
 
 def add_set_of_mark(
     screenshot: bytes | Image.Image | io.BufferedIOBase,
     ROIs: Dict[str, InteractiveRegion],
     use_sequential_ids: bool = False,
-) -> Tuple[Image.Image, List[str], List[str], List[str], Dict[str, str]]:
+    output_size: Optional[Tuple[int, int]] = None,
+    render: bool = True,
+) -> Tuple[Optional[Image.Image], List[str], List[str], List[str], Dict[str, str]]:
     """
     Add numbered markers to a screenshot for each interactive region.
 
@@ -25,185 +37,250 @@ def add_set_of_mark(
         screenshot (bytes | Image.Image | io.BufferedIOBase): The screenshot image as bytes, PIL Image, or file-like object
         ROIs (Dict[str, InteractiveRegion]): Dictionary mapping element IDs to their interactive regions
         use_sequential_ids (bool): If True, assigns sequential numbers to elements instead of using original IDs
+        output_size (Tuple[int, int], optional): Size to scale the annotated image to. The markers are drawn on the scaled image, so it should be the size the image is used at. Default: None, the size of the screenshot
+        render (bool): If False, only classifies the regions and returns no image, e.g. for models without vision. The screenshot is then not decoded. Default: True
 
     Returns:
         Tuple containing:
-        - Image.Image: Annotated image
+        - Image.Image | None: Annotated image, None if `render` is False
         - List[str]: List of visible element IDs
         - List[str]: List of element IDs above viewport
         - List[str]: List of element IDs below viewport
         - Dict[str, str]: Mapping of displayed IDs to original element IDs
     """
     if isinstance(screenshot, Image.Image):
-        return _add_set_of_mark(screenshot, ROIs, use_sequential_ids)
+        return _add_set_of_mark(
+            screenshot, ROIs, use_sequential_ids, output_size, render
+        )
 
     if isinstance(screenshot, bytes):
         screenshot = io.BytesIO(screenshot)
 
+    # Opening only reads the header, the pixels are decoded when rendering
     image = Image.open(cast(BinaryIO, screenshot))
-    comp, visible_rects, rects_above, rects_below, id_mapping = _add_set_of_mark(
-        image, ROIs, use_sequential_ids
-    )
+    result = _add_set_of_mark(image, ROIs, use_sequential_ids, output_size, render)
     image.close()
-    return comp, visible_rects, rects_above, rects_below, id_mapping
+    return result
 
 
 def _add_set_of_mark(
     screenshot: Image.Image,
     ROIs: Dict[str, InteractiveRegion],
     use_sequential_ids: bool = True,
-) -> Tuple[Image.Image, List[str], List[str], List[str], Dict[str, str]]:
+    output_size: Optional[Tuple[int, int]] = None,
+    render: bool = True,
+) -> Tuple[Optional[Image.Image], List[str], List[str], List[str], Dict[str, str]]:
     """
     Internal implementation for adding markers to the screenshot.
 
     Args:
-        screenshot (Image.Image): PIL Image to annotate
+        screenshot (Image.Image): PIL Image to annotate, not modified
         ROIs (Dict[str, InteractiveRegion]): Dictionary of interactive regions
         use_sequential_ids (bool): Whether to use sequential numbers instead of original IDs
+        output_size (Tuple[int, int], optional): Size to scale the annotated image to. Default: None
+        render (bool): Whether to draw the annotated image. Default: True
 
     Returns:
         Same as :func:`add_set_of_mark`
     """
-    visible_rects: List[str] = []
-    rects_above: List[str] = []  # Scroll up to see
-    rects_below: List[str] = []  # Scroll down to see
-    id_mapping: Dict[str, str] = {}  # Maps new IDs to original IDs
+    original_ids = list(ROIs)
+    regions = _RegionArrays(ROIs, screenshot.size)
+    visible_rects = [original_ids[i] for i in regions.visible]
+    rects_above = [original_ids[i] for i in regions.above]  # Scroll up to see
+    rects_below = [original_ids[i] for i in regions.below]  # Scroll down to see
 
-    base = screenshot.convert("RGBA")
-
-    # First pass to identify all rectangles
-    for original_id, roi in ROIs.items():
-        # Handle options separately and add to visible only
-        if roi.get("tag_name") == "option" or roi.get("tag_name") == "input, type=file":
-            if original_id not in visible_rects:
-                visible_rects.append(original_id)
-            continue
-
-        # Check each rectangle for the element
-        for rect in roi["rects"]:
-            if not rect or rect["width"] * rect["height"] == 0:
-                continue
-
-            mid = (
-                (rect["right"] + rect["left"]) / 2.0,
-                (rect["top"] + rect["bottom"]) / 2.0,
-            )
-
-            # Only process if x coordinate is valid
-            if 0 <= mid[0] < base.size[0]:
-                # Add to exactly one list based on y coordinate
-                if mid[1] < 0 and original_id not in rects_above:
-                    rects_above.append(original_id)
-                elif mid[1] >= base.size[1] and original_id not in rects_below:
-                    rects_below.append(original_id)
-                elif 0 <= mid[1] < base.size[1] and original_id not in visible_rects:
-                    visible_rects.append(original_id)
-
-    # Create new sequential IDs for all rectangles
-    next_id = 1
+    id_mapping: Dict[str, str] = {}  # Maps new IDs to original IDs
     original_to_new: Dict[str, str] = {}  # Add reverse mapping
-
-    # Helper function to create new mapped IDs
-    def map_ids(original_ids: List[str]) -> List[str]:
-        nonlocal next_id, original_to_new
-        new_ids: List[str] = []
-        for original_id in original_ids:
-            new_id = str(next_id)
-            id_mapping[new_id] = original_id
-            original_to_new[original_id] = new_id  # Store reverse mapping
-            new_ids.append(new_id)
-            next_id += 1
-        return new_ids
-
     if use_sequential_ids:
         # Map IDs in sequence: visible first, then above, then below
-        new_visible_rects = map_ids(visible_rects)
-        new_rects_above = map_ids(rects_above)
-        new_rects_below = map_ids(rects_below)
+        next_id = 1
+        new_id_lists: List[List[str]] = []
+        for id_list in [visible_rects, rects_above, rects_below]:
+            new_ids: List[str] = []
+            for original_id in id_list:
+                new_id = str(next_id)
+                id_mapping[new_id] = original_id
+                original_to_new[original_id] = new_id
+                new_ids.append(new_id)
+                next_id += 1
+            new_id_lists.append(new_ids)
+        new_visible_rects, new_rects_above, new_rects_below = new_id_lists
     else:
         # Use original IDs but still maintain the mapping
         new_visible_rects = visible_rects.copy()
         new_rects_above = rects_above.copy()
         new_rects_below = rects_below.copy()
-        # Create identity mapping for all IDs
         for id_list in [visible_rects, rects_above, rects_below]:
             for original_id in id_list:
                 id_mapping[original_id] = original_id
                 original_to_new[original_id] = original_id
 
-    # Drawing code remains the same
-    fnt = ImageFont.load_default(14)
-    overlay = Image.new("RGBA", base.size)
-    draw = ImageDraw.Draw(overlay)
+    if not render:
+        return None, new_visible_rects, new_rects_above, new_rects_below, id_mapping
 
-    # Much simpler and faster lookup using the reverse mapping
-    for original_id, roi in ROIs.items():
-        if roi.get("tag_name") == "option":
-            continue
-
-        new_id = original_to_new.get(original_id)
+    size = output_size or screenshot.size
+    if screenshot.mode != "RGB":
+        image = screenshot.convert("RGB")
+        if image.size != size:
+            image = image.resize(size)
+    elif screenshot.size != size:
+        image = screenshot.resize(size)
+    else:
+        image = screenshot.copy()
+    scale_x = size[0] / screenshot.size[0]
+    scale_y = size[1] / screenshot.size[1]
+    font_size = max(8, round(FONT_SIZE * min(scale_x, scale_y)))
+
+    draw = ImageDraw.Draw(image)
+    for i in np.flatnonzero(regions.drawn):
+        new_id = original_to_new.get(original_ids[int(regions.roi_index[i])])
         if new_id is None:
             continue  # Skip if no mapping found
+        left, top, right, bottom = regions.coords[i, :4]
+        _draw_roi(
+            image,
+            draw,
+            new_id,
+            font_size,
+            (
+                round(left * scale_x),
+                round(top * scale_y),
+                round(right * scale_x),
+                round(bottom * scale_y),
+            ),
+            label_below=top <= TOP_NO_LABEL_ZONE,
+        )
+
+    return image, new_visible_rects, new_rects_above, new_rects_below, id_mapping
+
+
+class _RegionArrays:
+    """
+    The rectangles of the interactive regions as arrays, classified by position.
 
-        for rect in roi["rects"]:
-            if not rect or rect["width"] * rect["height"] == 0:
-                continue
-
-            mid = (
-                (rect["right"] + rect["left"]) / 2.0,
-                (rect["top"] + rect["bottom"]) / 2.0,
-            )
+    Args:
+        ROIs (Dict[str, InteractiveRegion]): Dictionary of interactive regions
+        size (Tuple[int, int]): Width and height of the screenshot
+    """
 
-            if 0 <= mid[0] < base.size[0] and 0 <= mid[1] < base.size[1]:
-                _draw_roi(draw, new_id, fnt, rect)
+    def __init__(self, ROIs: Dict[str, InteractiveRegion], size: Tuple[int, int]):
+        roi_index: List[int] = []
+        coords: List[Tuple[float, float, float, float, float, float]] = []
+        always_visible: List[int] = []
+        is_option: List[bool] = []
+        for i, roi in enumerate(ROIs.values()):
+            tag_name = roi.get("tag_name")
+            if tag_name in _ALWAYS_VISIBLE_TAGS:
+                always_visible.append(i)
+            for rect in roi["rects"]:
+                if not rect:
+                    continue
+                roi_index.append(i)
+                coords.append(
+                    (
+                        rect["left"],
+                        rect["top"],
+                        rect["right"],
+                        rect["bottom"],
+                        rect["width"],
+                        rect["height"],
+                    )
+                )
+                is_option.append(tag_name == "option")
+
+        width, height = size
+        always_visible_index = np.array(always_visible, dtype=np.int64)
+        self.roi_index = np.array(roi_index, dtype=np.int64)
+        self.coords = np.array(coords, dtype=np.float64).reshape(-1, 6)
+        mid_x = (self.coords[:, 0] + self.coords[:, 2]) / 2.0
+        mid_y = (self.coords[:, 1] + self.coords[:, 3]) / 2.0
+        in_columns = (
+            (self.coords[:, 4] * self.coords[:, 5] != 0)
+            & (mid_x >= 0)
+            & (mid_x < width)
+        )
+        in_rows = (mid_y >= 0) & (mid_y < height)
+        classified = in_columns & ~np.isin(self.roi_index, always_visible_index)
+
+        # np.unique sorts, so the regions keep the order of ROIs
+        self.visible: List[int] = np.union1d(
+            self.roi_index[classified & in_rows], always_visible_index
+        ).tolist()
+        self.above: List[int] = np.unique(
+            self.roi_index[classified & (mid_y < 0)]
+        ).tolist()
+        self.below: List[int] = np.unique(
+            self.roi_index[classified & (mid_y >= height)]
+        ).tolist()
+        # Rectangles to draw, options are drawn by the browser in their own popup
+        self.drawn = in_columns & in_rows & ~np.array(is_option, dtype=bool)
+
+
+@lru_cache(maxsize=8)
+def _load_font(size: int) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
+    return ImageFont.load_default(size)
+
+
+@lru_cache(maxsize=4096)
+def _label_sprite(label: str, font_size: int) -> Image.Image:
+    """
+    Render a label once: its text on a filled box with padding.
 
-    comp = Image.alpha_composite(base, overlay)
-    overlay.close()
+    Args:
+        label (str): The text of the label
+        font_size (int): The font size
 
-    return comp, new_visible_rects, new_rects_above, new_rects_below, id_mapping
+    Returns:
+        Image.Image: The label, shared between calls so it must not be modified
+    """
+    font = _load_font(font_size)
+    left, top, right, bottom = font.getbbox(label)
+    sprite = Image.new(
+        "RGB",
+        (
+            int(right - left) + 2 * LABEL_PADDING,
+            int(bottom - top) + 2 * LABEL_PADDING,
+        ),
+        MARK_COLOR,
+    )
+    ImageDraw.Draw(sprite).text(
+        (LABEL_PADDING - left, LABEL_PADDING - top),
+        label,
+        fill=LABEL_TEXT_COLOR,
+        font=font,
+    )
+    return sprite
 
 
 def _draw_roi(
+    image: Image.Image,
     draw: ImageDraw.ImageDraw,
-    idx: str | int,  # Fix type hint to allow both string and int indices
-    font: ImageFont.FreeTypeFont | ImageFont.ImageFont,
-    rect: DOMRectangle,
+    idx: str | int,
+    font_size: int,
+    rect: Tuple[int, int, int, int],
+    label_below: bool = False,
 ) -> None:
     """
     Draw a single region of interest on the image.
 
     Args:
-        draw (ImageDraw.ImageDraw): PIL ImageDraw object
+        image (Image.Image): PIL Image to draw on
+        draw (ImageDraw.ImageDraw): PIL ImageDraw object of `image`
         idx (str | int): Index/ID to display on the marker
-        font (ImageFont.FreeTypeFont | ImageFont.ImageFont): Font to use for the marker text
-        rect (DOMRectangle): Rectangle coordinates for the region
+        font_size (int): Font size of the marker text
+        rect (Tuple[int, int, int, int]): Left, top, right and bottom of the region on the image
+        label_below (bool): Put the label below the top right corner rather than above, for regions close to the top of the screen. Default: False
     """
-    color = (255, 0, 0, 255)  # Red color for outline
-    text_color = (255, 255, 255, 255)  # White text for better contrast
-
-    roi = ((rect["left"], rect["top"]), (rect["right"], rect["bottom"]))
-
-    # Adjust label position if too close to top of screen
-    label_location = (rect["right"], rect["top"])
-    label_anchor = "rb"
-
-    if label_location[1] <= TOP_NO_LABEL_ZONE:
-        label_location = (rect["right"], rect["bottom"])
-        label_anchor = "rt"
-
-    draw.rectangle(roi, outline=color, width=2)
-
-    bbox = draw.textbbox(
-        label_location, str(idx), font=font, anchor=label_anchor, align="center"
+    left, top, right, bottom = rect
+    draw.rectangle(
+        ((left, top), (right, bottom)), outline=MARK_COLOR, width=OUTLINE_WIDTH
     )
-    bbox = (bbox[0] - 3, bbox[1] - 3, bbox[2] + 3, bbox[3] + 3)
-    draw.rectangle(bbox, fill=color)
 
-    draw.text(
-        label_location,
-        str(idx),
-        fill=text_color,
-        font=font,
-        anchor=label_anchor,
-        align="center",
-    )
+    sprite = _label_sprite(str(idx), font_size)
+    # Align the label text on the top right corner of the region
+    x = right + LABEL_PADDING - sprite.width
+    if label_below:
+        y = bottom - LABEL_PADDING
+    else:
+        y = top + LABEL_PADDING - sprite.height
+    image.paste(sprite, (x, y))
@@ -26,7 +26,6 @@ from loguru import logger
 from urllib.parse import quote_plus
 from pydantic import Field
 import PIL.Image
-import tiktoken
 from autogen_agentchat.agents import BaseChatAgent
 from autogen_agentchat.base import Response
 from autogen_agentchat.messages import (
@@ -75,6 +74,7 @@ from ._prompts import (
     WEB_SURFER_SYSTEM_MESSAGE,
     WEB_SURFER_NO_TOOLS_PROMPT,
 )
+from ._screenshot import EncodedImage, ImageFormat, Screenshot, hash_distance
 from ._set_of_mark import add_set_of_mark
 from ._tool_definitions import (
     TOOL_CLICK,
@@ -99,8 +99,12 @@ from ._tool_definitions import (
 )
 
 from ...tools.tool_metadata import get_tool_metadata, ToolMetadata
-from ...tools.playwright.types import InteractiveRegion
-from ...tools.playwright.playwright_controller import PlaywrightController
+from ...tools.token_counter import get_token_counter
+from ...tools.playwright.types import InteractiveRegion, PageSnapshot
+from ...tools.playwright.playwright_controller import (
+    PlaywrightController,
+    SettleStrategy,
+)
 from ...tools.playwright.playwright_state import (
     BrowserState,
     save_browser_state,
@@ -137,6 +141,10 @@ class WebSurferConfig(BaseModel):
     viewport_height: int = 1440
     viewport_width: int = 1440
     use_action_guard: bool = False
+    settle_strategy: SettleStrategy = "fixed"
+    skip_unchanged_screenshots: bool = True
+    model_image_format: ImageFormat = "png"
+    model_image_quality: int | None = None
 
 
 class WebSurferState(BaseState):
@@ -194,6 +202,11 @@ class WebSurfer(BaseChatAgent, Component[WebSurferConfig]):
         multiple_tools_per_call (bool, optional): Whether to allow execution of multiple tool calls sequentially per model call. Default: False.
         viewport_height (int, optional): The height of the viewport. Default: 1440.
         viewport_width (int, optional): The width of the viewport. Default: 1440.
+        use_action_guard (bool, optional): Whether to ask the action guard for approval before actions. Default: False.
+        settle_strategy (Literal["fixed", "adaptive"], optional): How the browser waits for the page after an action, see `PlaywrightController`. Default: "fixed".
+        skip_unchanged_screenshots (bool, optional): Whether to replace the screenshot in the responses to other agents with a note when the screen looks the same as in the last one they received. Default: True.
+        model_image_format (Literal["png", "jpeg", "webp"], optional): The encoding of the screenshots sent to models, including in the responses to other agents. The screenshots shown in the UI stay PNG. Default: "png".
+        model_image_quality (int, optional): The quality from 1 to 100 of JPEG and WebP screenshots sent to models. Default: None, the default of Pillow.
     """
 
     component_type = "agent"
@@ -228,6 +241,9 @@ class WebSurfer(BaseChatAgent, Component[WebSurferConfig]):
 
     SCREENSHOT_TOKENS = 1105
 
+    # Sent instead of a screenshot that looks the same as the previous one
+    SCREEN_UNCHANGED_MESSAGE = "The screen has not changed since the last screenshot."
+
     def __init__(
         self,
         name: str,
@@ -250,6 +266,10 @@ class WebSurfer(BaseChatAgent, Component[WebSurferConfig]):
         viewport_height: int = 1440,
         viewport_width: int = 1440,
         use_action_guard: bool = False,
+        settle_strategy: SettleStrategy = "fixed",
+        skip_unchanged_screenshots: bool = True,
+        model_image_format: ImageFormat = "png",
+        model_image_quality: int | None = None,
     ) -> None:
         """
         Initialize the WebSurfer.
@@ -280,6 +300,10 @@ class WebSurfer(BaseChatAgent, Component[WebSurferConfig]):
         self.viewport_height = viewport_height
         self.viewport_width = viewport_width
         self.use_action_guard = use_action_guard
+        self.settle_strategy: SettleStrategy = settle_strategy
+        self.skip_unchanged_screenshots = skip_unchanged_screenshots
+        self.model_image_format: ImageFormat = model_image_format
+        self.model_image_quality = model_image_quality
         self._browser = browser
         # Call init to set these in case not set
         self._context: BrowserContext | None = None
@@ -289,6 +313,8 @@ class WebSurfer(BaseChatAgent, Component[WebSurferConfig]):
         self._page: Page | None = None
         self._last_download: Download | None = None
         self._prior_metadata_hash: str | None = None
+        # Page state and perceptual hash of the last screenshot sent to other agents
+        self._reported_screen: Tuple[Tuple[Any, ...], int] | None = None
         self.logger = logging.getLogger(EVENT_LOGGER_NAME + f".{self.name}.WebSurfer")
         self._chat_history: List[LLMMessage] = []
         self._last_outside_message: str = ""
@@ -333,6 +359,7 @@ class WebSurfer(BaseChatAgent, Component[WebSurferConfig]):
             single_tab_mode=self.single_tab_mode,
             url_status_manager=self._url_status_manager,
             url_validation_callback=self._check_url_and_generate_msg,
+            settle_strategy=self.settle_strategy,
         )
         self.default_tools = [
             TOOL_STOP_ACTION,
@@ -376,6 +403,7 @@ class WebSurfer(BaseChatAgent, Component[WebSurferConfig]):
 
         self._last_download = None
         self._prior_metadata_hash = None
+        self._reported_screen = None
 
         await self._browser.__aenter__()
 
@@ -463,6 +491,7 @@ class WebSurfer(BaseChatAgent, Component[WebSurferConfig]):
         assert self._page is not None
 
         self._chat_history.clear()
+        self._reported_screen = None
         (
             reset_prior_metadata,
             reset_last_download,
@@ -781,20 +810,20 @@ class WebSurfer(BaseChatAgent, Component[WebSurferConfig]):
                         new_screenshot = (
                             await self._playwright_controller.get_screenshot(self._page)
                         )
+                        # Decoded once for the observation and the chat history
+                        observed_screenshot = Screenshot(new_screenshot)
                         if self.to_save_screenshots and self.debug_dir is not None:
                             current_timestamp = "_" + int(time.time()).__str__()
                             screenshot_png_name = (
                                 "screenshot_raw" + current_timestamp + ".png"
                             )
-                            PIL.Image.open(io.BytesIO(new_screenshot)).save(
+                            observed_screenshot.save(
                                 os.path.join(self.debug_dir, screenshot_png_name)
                             )
                         all_screenshots.append(new_screenshot)
                         content: list[str | AGImage] = [
                             action_result,
-                            AGImage.from_pil(
-                                PIL.Image.open(io.BytesIO(new_screenshot))
-                            ),
+                            observed_screenshot.to_ag_image(),
                         ]
                         emited_responses.append(action_result)
                         # 4) Emit the observation
@@ -825,13 +854,12 @@ class WebSurfer(BaseChatAgent, Component[WebSurferConfig]):
                             UserMessage(
                                 content=[
                                     f"Observation: {action_result}\n\n{message_content}",
-                                    AGImage.from_pil(
-                                        PIL.Image.open(io.BytesIO(new_screenshot))
-                                    ),
+                                    observed_screenshot.to_ag_image(),
                                 ],
                                 source=self.name,
                             )
                         )
+                        observed_screenshot.close()
                         if tool_call_name in non_action_tools:
                             found_stop_action = True
                             break
@@ -877,6 +905,8 @@ class WebSurfer(BaseChatAgent, Component[WebSurferConfig]):
             )
         )
         try:
+            # Before the screenshot, so that later changes are not attributed to it
+            page_state = await self._playwright_controller.get_page_state(self._page)
             (
                 message_content,
                 maybe_new_screenshot,
@@ -888,10 +918,17 @@ class WebSurfer(BaseChatAgent, Component[WebSurferConfig]):
             assert maybe_new_screenshot is not None
             new_screenshot = maybe_new_screenshot
 
-            content = [
-                message_content,
-                AGImage.from_pil(PIL.Image.open(io.BytesIO(new_screenshot))),
-            ]
+            final_screenshot = Screenshot(new_screenshot)
+            if self._is_screenshot_unchanged(final_screenshot, page_state):
+                content = [message_content, self.SCREEN_UNCHANGED_MESSAGE]
+            else:
+                content = [
+                    message_content,
+                    final_screenshot.to_ag_image(
+                        self.model_image_format, self.model_image_quality
+                    ),
+                ]
+            final_screenshot.close()
 
             final_usage = RequestUsage(
                 prompt_tokens=sum([u.prompt_tokens for u in self.model_usage]),
@@ -954,12 +991,20 @@ class WebSurfer(BaseChatAgent, Component[WebSurferConfig]):
         if not self.did_lazy_init:
             await self.lazy_init()
 
-        try:
+        async def _observe_page() -> Tuple[PageSnapshot, int, str]:
+            # Snapshot the page in one round trip, fetching the tabs information concurrently
             assert self._page is not None
-            assert (
-                await self._playwright_controller.get_interactive_rects(self._page)
-                is not None
-            )
+            if not self.single_tab_mode and self._context is not None:
+                snapshot, (num_tabs, tabs_information_str) = await asyncio.gather(
+                    self._playwright_controller.snapshot_page(self._page),
+                    self.get_tabs_info(),
+                )
+                return snapshot, num_tabs, tabs_information_str
+            snapshot = await self._playwright_controller.snapshot_page(self._page)
+            return snapshot, 1, ""
+
+        try:
+            snapshot, num_tabs, tabs_information_str = await _observe_page()
         except Exception as e:
             # open a new tab and point it to about:blank
             self.logger.error(f"Page is not accessible, creating a new one: {e}")
@@ -967,6 +1012,8 @@ class WebSurfer(BaseChatAgent, Component[WebSurferConfig]):
             self._page = await self._playwright_controller.create_new_tab(
                 self._context, "about:blank"
             )
+            snapshot, num_tabs, tabs_information_str = await _observe_page()
+        assert self._page is not None
 
         # Clone the messages to give context, removing old screenshots
         history: List[LLMMessage] = []
@@ -985,12 +1032,26 @@ class WebSurfer(BaseChatAgent, Component[WebSurferConfig]):
                 filtered_history.extend(remove_images([msg]))
         history.extend(filtered_history)
 
-        # Ask the page for interactive elements, then prepare the state-of-mark screenshot
-        rects = await self._playwright_controller.get_interactive_rects(self._page)
-        viewport = await self._playwright_controller.get_visual_viewport(self._page)
-        screenshot = await self._playwright_controller.get_screenshot(self._page)
+        # Use the interactive elements from the snapshot to prepare the state-of-mark screenshot
+        rects = snapshot["interactive_rects"]
+        viewport = snapshot["visual_viewport"]
+        assert snapshot["screenshot"] is not None
+        # Decoded once for the set-of-mark and the scaled copy sent to the model
+        screenshot = Screenshot(snapshot["screenshot"])
+        mlm_size = (self.MLM_WIDTH, self.MLM_HEIGHT)
+        # The marks are drawn on the image at the size the model receives, and not at
+        # all if the model cannot see images
+        render_som = self.is_multimodal or (
+            self.to_save_screenshots and self.debug_dir is not None
+        )
         som_screenshot, visible_rects, rects_above, rects_below, element_id_mapping = (
-            add_set_of_mark(screenshot, rects, use_sequential_ids=True)
+            add_set_of_mark(
+                screenshot.image if render_som else screenshot.data,
+                rects,
+                use_sequential_ids=True,
+                output_size=mlm_size,
+                render=render_som,
+            )
         )
         # element_id_mapping is a mapping of new ids to original ids in the page
         # we need to reverse it to get the original ids from the new ids
@@ -999,6 +1060,7 @@ class WebSurfer(BaseChatAgent, Component[WebSurferConfig]):
         rects = {reverse_element_id_mapping.get(k, k): v for k, v in rects.items()}
 
         if self.to_save_screenshots and self.debug_dir is not None:
+            assert som_screenshot is not None
             current_timestamp = "_" + int(time.time()).__str__()
             screenshot_png_name = "screenshot_som" + current_timestamp + ".png"
             som_screenshot.save(os.path.join(self.debug_dir, screenshot_png_name))
@@ -1010,11 +1072,8 @@ class WebSurfer(BaseChatAgent, Component[WebSurferConfig]):
                 )
             )
 
-        # Get the tabs information
-        tabs_information_str = ""
-        num_tabs = 1
+        # Format the tabs information
         if not self.single_tab_mode and self._context is not None:
-            num_tabs, tabs_information_str = await self.get_tabs_info()
             tabs_information_str = f"There are {num_tabs} tabs open. The tabs are as follows:\n{tabs_information_str}"
 
         # What tools are available?
@@ -1047,7 +1106,7 @@ class WebSurfer(BaseChatAgent, Component[WebSurferConfig]):
         #    tools.append(TOOL_UPLOAD_FILE)
 
         # Focus hint
-        focused = await self._playwright_controller.get_focused_rect_id(self._page)
+        focused = snapshot["focused_rect_id"]
         focused = reverse_element_id_mapping.get(focused, focused)
 
         focused_hint = ""
@@ -1096,7 +1155,7 @@ class WebSurfer(BaseChatAgent, Component[WebSurferConfig]):
 
         tool_names = WebSurfer._tools_to_names(tools)
 
-        webpage_text = await self._playwright_controller.get_visible_text(self._page)
+        webpage_text = snapshot["visible_text"]
 
         if not self.json_model_output:
             text_prompt = WEB_SURFER_TOOL_PROMPT.format(
@@ -1127,24 +1186,20 @@ class WebSurfer(BaseChatAgent, Component[WebSurferConfig]):
             ).strip()
 
         if self.is_multimodal:
-            # Scale the screenshot for the MLM, and close the original
-            scaled_som_screenshot = som_screenshot.resize(
-                (self.MLM_WIDTH, self.MLM_HEIGHT)
-            )
-            screenshot_file = PIL.Image.open(io.BytesIO(screenshot))
-            scaled_screenshot = screenshot_file.resize(
-                (self.MLM_WIDTH, self.MLM_HEIGHT)
-            )
-            som_screenshot.close()
-            screenshot_file.close()
-
+            assert som_screenshot is not None
             # Add the multimodal message and make the request
             history.append(
                 UserMessage(
                     content=[
                         text_prompt,
-                        AGImage.from_pil(scaled_som_screenshot),
-                        AGImage.from_pil(scaled_screenshot),
+                        EncodedImage(
+                            som_screenshot,
+                            format=self.model_image_format,
+                            quality=self.model_image_quality,
+                        ),
+                        screenshot.to_scaled_ag_image(
+                            mlm_size, self.model_image_format, self.model_image_quality
+                        ),
                     ],
                     source=self.name,
                 )
@@ -1156,6 +1211,9 @@ class WebSurfer(BaseChatAgent, Component[WebSurferConfig]):
                     source=self.name,
                 )
             )
+        if som_screenshot is not None:
+            som_screenshot.close()
+        screenshot.close()
 
         # Re-initialize model context to meet token limit quota
         try:
@@ -1794,17 +1852,23 @@ class WebSurfer(BaseChatAgent, Component[WebSurferConfig]):
         Returns:
             str: Extracted text from the image
         """
-        scaled_screenshot = None
+        mlm_size = (self.MLM_WIDTH, self.MLM_HEIGHT)
         if isinstance(image, PIL.Image.Image):
-            scaled_screenshot = image.resize((self.MLM_WIDTH, self.MLM_HEIGHT))
+            scaled_screenshot = image.resize(mlm_size)
+            ag_image: AGImage = EncodedImage(
+                scaled_screenshot,
+                format=self.model_image_format,
+                quality=self.model_image_quality,
+            )
+            scaled_screenshot.close()
         else:
-            pil_image = None
-            if not isinstance(image, io.BufferedIOBase):
-                pil_image = PIL.Image.open(io.BytesIO(image))
-            else:
-                pil_image = PIL.Image.open(cast(BinaryIO, image))
-            scaled_screenshot = pil_image.resize((self.MLM_WIDTH, self.MLM_HEIGHT))
-            pil_image.close()
+            if isinstance(image, io.BufferedIOBase):
+                image = cast(BinaryIO, image).read()
+            screenshot = Screenshot(image)
+            ag_image = screenshot.to_scaled_ag_image(
+                mlm_size, self.model_image_format, self.model_image_quality
+            )
+            screenshot.close()
 
         # Add the multimodal message and make the request
         messages: List[LLMMessage] = []
@@ -1812,7 +1876,7 @@ class WebSurfer(BaseChatAgent, Component[WebSurferConfig]):
             UserMessage(
                 content=[
                     WEB_SURFER_OCR_PROMPT,
-                    AGImage.from_pil(scaled_screenshot),
+                    ag_image,
                 ],
                 source=self.name,
             )
@@ -1821,7 +1885,6 @@ class WebSurfer(BaseChatAgent, Component[WebSurferConfig]):
             messages, cancellation_token=cancellation_token
         )
         self.model_usage.append(response.usage)
-        scaled_screenshot.close()
         assert isinstance(response.content, str)
         return response.content
 
@@ -1848,11 +1911,14 @@ class WebSurfer(BaseChatAgent, Component[WebSurferConfig]):
         title: str = await self._page.title() or self._page.url
 
         # Take a screenshot and scale it
-        screenshot = await self._playwright_controller.get_screenshot(self._page)
-        pil_image = PIL.Image.open(io.BytesIO(screenshot))
-        scaled_screenshot = pil_image.resize((self.MLM_WIDTH, self.MLM_HEIGHT))
-        pil_image.close()
-        ag_image = AGImage.from_pil(scaled_screenshot)
+        screenshot = Screenshot(
+            await self._playwright_controller.get_screenshot(self._page)
+        )
+        ag_image = screenshot.to_scaled_ag_image(
+            (self.MLM_WIDTH, self.MLM_HEIGHT),
+            self.model_image_format,
+            self.model_image_quality,
+        )
 
         # Prepare the system prompt and user prompt
         messages: List[LLMMessage] = []
@@ -1862,8 +1928,8 @@ class WebSurfer(BaseChatAgent, Component[WebSurferConfig]):
         prompt = WEB_SURFER_QA_PROMPT(title, question)
 
         # Truncate the page content if needed to fit within token limits
-        tokenizer = tiktoken.encoding_for_model("gpt-4o")
-        prompt_tokens = len(tokenizer.encode(prompt))
+        token_counter = get_token_counter()
+        prompt_tokens = token_counter.count(prompt)
         # Reserve tokens for the image (SCREENSHOT_TOKENS) and some buffer for the response
         max_content_tokens = 128000 - self.SCREENSHOT_TOKENS - prompt_tokens - 1000
 
@@ -1872,11 +1938,10 @@ class WebSurfer(BaseChatAgent, Component[WebSurferConfig]):
             content = prompt
         else:
             # Truncate the page content to fit within the token limit
-            content_tokens = tokenizer.encode(page_markdown)
-            if len(content_tokens) > max_content_tokens:
-                truncated_content = tokenizer.decode(
-                    content_tokens[:max_content_tokens]
-                )
+            truncated_content = token_counter.truncate(
+                page_markdown, max_content_tokens
+            )
+            if len(truncated_content) < len(page_markdown):
                 content = f"Page content (truncated):\n{truncated_content}\n\n{prompt}"
             else:
                 content = f"Page content:\n{page_markdown}\n\n{prompt}"
@@ -1894,11 +1959,46 @@ class WebSurfer(BaseChatAgent, Component[WebSurferConfig]):
             messages, cancellation_token=cancellation_token
         )
         self.model_usage.append(response.usage)
-        scaled_screenshot.close()
+        screenshot.close()
 
         assert isinstance(response.content, str)
         return response.content
 
+    def _is_screenshot_unchanged(
+        self, screenshot: Screenshot, page_state: Optional[Tuple[Any, ...]]
+    ) -> bool:
+        """Check whether a screenshot sent to other agents shows the same screen as the last one they received.
+
+        The page must be in the same state, see `PlaywrightController.get_page_state`, and
+        the screenshots must look the same. The page state catches small changes like typed
+        text, the screenshots changes that do not touch the DOM like videos.
+
+        Args:
+            screenshot (Screenshot): The screenshot about to be sent, remembered as the last one
+            page_state (Tuple[Any, ...], optional): The state of the page before the screenshot was taken, None if unknown
+
+        Returns:
+            bool: True if `skip_unchanged_screenshots` is set and the screen has not changed
+        """
+        if not self.skip_unchanged_screenshots:
+            return False
+        previous = self._reported_screen
+        if page_state is None:
+            self._reported_screen = None
+            return False
+        page_state = (id(self._page), *page_state)
+        self._reported_screen = (page_state, screenshot.perceptual_hash)
+        return (
+            previous is not None
+            and previous[0] == page_state
+            and hash_distance(previous[1], screenshot.perceptual_hash) == 0
+        )
+
+    def forget_reported_screenshot(self) -> None:
+        """Send the screenshot in the next response to other agents even if the screen has not
+        changed, e.g. because they dropped the previous responses from their history."""
+        self._reported_screen = None
+
     async def describe_current_page(self) -> tuple[str, Union[bytes, None], str]:
         """Get a description of the current page including content, screenshot and metadata hash.
 
@@ -1972,13 +2072,22 @@ class WebSurfer(BaseChatAgent, Component[WebSurferConfig]):
             viewport_height=self.viewport_height,
             viewport_width=self.viewport_width,
             use_action_guard=self.use_action_guard,
+            settle_strategy=self.settle_strategy,
+            skip_unchanged_screenshots=self.skip_unchanged_screenshots,
+            model_image_format=self.model_image_format,
+            model_image_quality=self.model_image_quality,
         )
 
     @classmethod
-    def _from_config(cls, config: WebSurferConfig) -> Self:
+    def _from_config(
+        cls,
+        config: WebSurferConfig,
+        model_client: Optional[ChatCompletionClient] = None,
+    ) -> Self:
         return cls(
             name=config.name,
-            model_client=ChatCompletionClient.load_component(config.model_client),
+            model_client=model_client
+            or ChatCompletionClient.load_component(config.model_client),
             browser=PlaywrightBrowser.load_component(config.browser),
             model_context_token_limit=config.model_context_token_limit,
             downloads_folder=config.downloads_folder,
@@ -1996,11 +2105,25 @@ class WebSurfer(BaseChatAgent, Component[WebSurferConfig]):
             viewport_height=config.viewport_height,
             viewport_width=config.viewport_width,
             use_action_guard=config.use_action_guard,
+            settle_strategy=config.settle_strategy,
+            skip_unchanged_screenshots=config.skip_unchanged_screenshots,
+            model_image_format=config.model_image_format,
+            model_image_quality=config.model_image_quality,
         )
 
     @classmethod
-    def from_config(cls, config: WebSurferConfig) -> Self:
-        return cls._from_config(config)
+    def from_config(
+        cls,
+        config: WebSurferConfig,
+        model_client: Optional[ChatCompletionClient] = None,
+    ) -> Self:
+        """Create a WebSurfer from its configuration
+
+        Args:
+            config (WebSurferConfig): The configuration of the agent
+            model_client (ChatCompletionClient, optional): Model client to use instead of loading `config.model_client`. Default: None
+        """
+        return cls._from_config(config, model_client)
 
     async def save_state(self) -> Mapping[str, Any]:
         """Save the current state of the WebSurfer.
@@ -2030,6 +2153,7 @@ class WebSurfer(BaseChatAgent, Component[WebSurferConfig]):
 
         # Update the chat history
         self._chat_history = web_surfer_state.chat_history
+        self._reported_screen = None
 
         # Load the browser state if it exists
         if web_surfer_state.browser_state is not None:
@@ -1,37 +1,169 @@
+import asyncio
+import functools
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Any, List, Optional, Union, Dict
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    TypeVar,
+    Union,
+    cast,
+)
 
 from loguru import logger
-from sqlalchemy import exc, inspect, text
+from sqlalchemy import delete, event, exc, inspect, text
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.sql import Select as SqlSelect
 from sqlmodel import Session, SQLModel, and_, create_engine, select
+from sqlmodel.sql.expression import Select
 
 from ..datamodel import DatabaseModel, Response, Team
 from ..teammanager import TeamManager
 from .schema_manager import SchemaManager
 
+T = TypeVar("T")
+SelectT = TypeVar("SelectT", bound=SqlSelect[Any])
+
 
 class DatabaseManager:
     _init_lock = threading.Lock()
 
-    def __init__(self, engine_uri: str, base_dir: Optional[Path] = None):
+    def __init__(
+        self, engine_uri: str, base_dir: Optional[Path] = None, max_workers: int = 8
+    ):
         """
         Initialize DatabaseManager with database connection settings.
         Does not perform any database operations.
 
+        The async methods (`aupsert`, `aget`, `adelete`) run the database work on a dedicated
+        thread pool of `max_workers` threads, backed by a connection pool of the same size,
+        so that callers on the event loop are not blocked. SQLite databases are opened in
+        WAL mode so that readers do not wait for writers. In-memory SQLite databases only
+        exist within their connection, so they use a single connection and a single thread.
+
         Args:
             engine_uri (str): Database connection URI (e.g. sqlite:///db.sqlite3)
             base_dir (Path, optional): Base directory for migration files. If None, uses current directory. Default: None.
+            max_workers (int, optional): Number of threads and pooled connections used by the async methods. Default: 8.
         """
-        connection_args = {"check_same_thread": True} if "sqlite" in engine_uri else {}
+        assert max_workers > 0
+        is_sqlite = "sqlite" in engine_uri
+        in_memory = is_sqlite and (
+            ":memory:" in engine_uri or engine_uri.endswith("://")
+        )
+        # Connections are handed between the event loop and the worker threads
+        connection_args = (
+            {"check_same_thread": False, "timeout": 30} if is_sqlite else {}
+        )
+        # An in-memory database only exists within its connection, which must not be
+        # used by several threads at once
+        if in_memory:
+            max_workers = 1
+        pool_args: Dict[str, Any] = (
+            {"poolclass": StaticPool}
+            if in_memory
+            else {"pool_size": max_workers, "max_overflow": max_workers}
+        )
 
-        self.engine = create_engine(engine_uri, connect_args=connection_args)
+        self.engine = create_engine(
+            engine_uri, connect_args=connection_args, **pool_args
+        )
+        if is_sqlite and not in_memory:
+            event.listen(self.engine, "connect", self._configure_sqlite_connection)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="db_manager"
+        )
         self.schema_manager = SchemaManager(
             engine=self.engine,
             base_dir=base_dir,
         )
 
+    @staticmethod
+    def _configure_sqlite_connection(dbapi_connection: Any, _: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("PRAGMA journal_mode=WAL")
+            # Safe with WAL, and avoids a sync on every commit
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        finally:
+            cursor.close()
+
+    async def _run_in_executor(
+        self, func: Callable[..., T], *args: Any, **kwargs: Any
+    ) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs)
+        )
+
+    @staticmethod
+    def _filter_conditions(
+        model_class: type[SQLModel], filters: dict[str, Any]
+    ) -> List[Any]:
+        """Build where clauses from filters. List, tuple and set values match any of their items."""
+        conditions: List[Any] = []
+        for col, value in filters.items():
+            column = getattr(model_class, col)
+            if isinstance(value, (list, tuple, set)):
+                conditions.append(column.in_(list(value)))  # type: ignore
+            else:
+                conditions.append(column == value)
+        return conditions
+
+    @classmethod
+    def _apply_get_options(
+        cls,
+        statement: SelectT,
+        model_class: type[SQLModel],
+        filters: dict[str, Any] | None,
+        order: str,
+        limit: Optional[int],
+        offset: Optional[int],
+    ) -> SelectT:
+        """Apply the filters, order, limit and offset of `get` to a select statement."""
+        if filters:
+            statement = statement.where(
+                and_(*cls._filter_conditions(model_class, filters))
+            )
+        if hasattr(model_class, "created_at") and order:
+            order_by_clause = getattr(
+                getattr(model_class, "created_at"), order
+            )()  # Dynamically apply asc/desc
+            statement = statement.order_by(order_by_clause)
+        if limit is not None:
+            statement = statement.limit(limit)
+        if offset is not None:
+            statement = statement.offset(offset)
+        return statement
+
+    @staticmethod
+    def _columns_statement(
+        model_class: type[SQLModel], columns: List[str]
+    ) -> Select[Any]:
+        """Build a statement selecting only some columns of a model."""
+        column_attributes: List[Any] = [
+            getattr(model_class, column) for column in columns
+        ]
+        return cast(Select[Any], select(*column_attributes))
+
+    @staticmethod
+    def _select_columns(
+        session: Session, statement: Select[Any], columns: List[str]
+    ) -> List[Dict[str, Any]]:
+        """Run a column statement, returning the rows as dictionaries keyed by column name."""
+        if len(columns) == 1:
+            # A single column is returned as scalars rather than rows
+            scalars: Sequence[Any] = session.exec(statement).all()
+            return [{columns[0]: item} for item in scalars]
+        rows: Sequence[Any] = session.exec(statement).all()
+        return [dict(zip(columns, row)) for row in rows]
+
     def _should_auto_upgrade(self) -> bool:
         """
         Check if auto upgrade should run based on schema differences
@@ -149,12 +281,20 @@ class DatabaseManager:
                 self._init_lock.release()
                 logger.info("Database reset lock released")
 
-    def upsert(self, model: DatabaseModel, return_json: bool = True) -> Response:
+    def upsert(
+        self,
+        model: DatabaseModel,
+        return_json: bool = True,
+        delete_model_class: Optional[type[SQLModel]] = None,
+        delete_filters: Optional[dict[str, Any]] = None,
+    ) -> Response:
         """Create or update an entity
 
         Args:
             model (DatabaseModel): The model instance to create or update
             return_json (bool, optional): If True, returns the model as a dictionary. If False, returns the SQLModel instance. Default: True.
+            delete_model_class (type[SQLModel], optional): Model class of rows to delete in the same transaction, e.g. rows the updated entity supersedes. Default: None.
+            delete_filters (dict[str, Any], optional): Filters of the rows of `delete_model_class` to delete. Default: None.
 
         Returns:
             Response: Contains status, message and data (either dict or SQLModel based on return_json)
@@ -165,6 +305,17 @@ class DatabaseManager:
 
         with Session(self.engine) as session:
             try:
+                if delete_model_class is not None:
+                    statement = delete(delete_model_class)
+                    if delete_filters:
+                        statement = statement.where(
+                            and_(
+                                *self._filter_conditions(
+                                    delete_model_class, delete_filters
+                                )
+                            )
+                        )
+                    session.exec(statement)
                 existing_model = session.exec(
                     select(model_class).where(model_class.id == model.id)
                 ).first()
@@ -198,33 +349,137 @@ class DatabaseManager:
             data=model.model_dump() if return_json else model,
         )
 
+    def insert_many(self, models: Sequence[DatabaseModel]) -> Response:
+        """Insert new entities in a single transaction
+
+        Unlike `upsert`, the models are not checked against existing rows and are not
+        refreshed after the insert, which makes this suitable for bulk appends.
+
+        Args:
+            models (Sequence[DatabaseModel]): The model instances to insert
+
+        Returns:
+            Response: Contains status and message, data is None
+        """
+        if not models:
+            return Response(message="Nothing to insert", status=True, data=None)
+        model_name = type(models[0]).__name__
+        status = True
+        status_message = f"{len(models)} {model_name} Created Successfully"
+
+        with Session(self.engine) as session:
+            try:
+                session.add_all(models)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                status = False
+                status_message = f"Error while creating {model_name}: {e}"
+                logger.error(status_message)
+
+        return Response(message=status_message, status=status, data=None)
+
     def get(
         self,
         model_class: type[DatabaseModel],
         filters: dict[str, Any] | None = None,
         return_json: bool = False,
         order: str = "desc",
+        columns: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
     ) -> Response:
-        """List entities"""
+        """List entities
+
+        Args:
+            model_class (type[DatabaseModel]): The model class to list
+            filters (dict[str, Any], optional): Column values to match. List, tuple and set values match any of their items. Default: None.
+            return_json (bool, optional): If True, returns the models as dictionaries. Default: False.
+            order (str, optional): Order by created_at, "asc" or "desc". Default: "desc".
+            columns (List[str], optional): Only load these columns. The entities are then returned as dictionaries keyed by column name, whatever the value of return_json. Default: None.
+            limit (int, optional): Maximum number of entities to return. Default: None.
+            offset (int, optional): Number of entities to skip. Default: None.
+
+        Returns:
+            Response: Contains status, message and data (a list of entities)
+        """
         with Session(self.engine) as session:
             result = []
             status = True
             status_message = ""
 
             try:
-                statement = select(model_class)
-                if filters:
-                    conditions = [
-                        getattr(model_class, col) == value
-                        for col, value in filters.items()
+                if columns:
+                    result = self._select_columns(
+                        session,
+                        self._apply_get_options(
+                            self._columns_statement(model_class, columns),
+                            model_class,
+                            filters,
+                            order,
+                            limit,
+                            offset,
+                        ),
+                        columns,
+                    )
+                else:
+                    statement = self._apply_get_options(
+                        select(model_class), model_class, filters, order, limit, offset
+                    )
+                    items = session.exec(statement).all()
+                    result = [
+                        item.model_dump(mode="json") if return_json else item
+                        for item in items
                     ]
-                    statement = statement.where(and_(*conditions))
+                status_message = f"{model_class.__name__} Retrieved Successfully"
+            except Exception as e:
+                session.rollback()
+                status = False
+                status_message = f"Error while fetching {model_class.__name__}"
+                logger.error(
+                    "Error while getting items: "
+                    + str(model_class.__name__)
+                    + " "
+                    + str(e)
+                )
+
+            return Response(message=status_message, status=status, data=result)
+
+    def get_page(
+        self,
+        model_class: type[DatabaseModel],
+        filters: dict[str, Any] | None = None,
+        after_id: Optional[int] = None,
+        limit: int = 100,
+        return_json: bool = False,
+    ) -> Response:
+        """List entities in insertion order, one page at a time
+
+        Args:
+            model_class (type[DatabaseModel]): The model class to list
+            filters (dict[str, Any], optional): Column filters, see `get`. Default: None.
+            after_id (int, optional): Only return entities with an id greater than this cursor. Default: None.
+            limit (int, optional): Maximum number of entities to return. Default: 100.
+            return_json (bool, optional): If True, returns the models as dictionaries. Default: False.
 
-                if hasattr(model_class, "created_at") and order:
-                    order_by_clause = getattr(
-                        model_class.created_at, order
-                    )()  # Dynamically apply asc/desc
-                    statement = statement.order_by(order_by_clause)
+        Returns:
+            Response: Contains status, message and data (a list of at most `limit` entities ordered by id)
+        """
+        with Session(self.engine) as session:
+            result = []
+            status = True
+            status_message = ""
+
+            try:
+                statement = select(model_class)
+                if filters:
+                    statement = statement.where(
+                        and_(*self._filter_conditions(model_class, filters))
+                    )
+                id_column: Any = getattr(model_class, "id")
+                if after_id is not None:
+                    statement = statement.where(id_column > after_id)
+                statement = statement.order_by(id_column).limit(limit)
 
                 items = session.exec(statement).all()
                 result = [
@@ -258,11 +513,9 @@ class DatabaseManager:
                     session.connection().execute(text("PRAGMA foreign_keys=ON"))
                 statement = select(model_class)
                 if filters:
-                    conditions = [
-                        getattr(model_class, col) == value
-                        for col, value in filters.items()
-                    ]
-                    statement = statement.where(and_(*conditions))
+                    statement = statement.where(
+                        and_(*self._filter_conditions(model_class, filters))
+                    )
 
                 rows = session.exec(statement).all()
 
@@ -289,6 +542,72 @@ class DatabaseManager:
 
         return Response(message=status_message, status=status, data=None)
 
+    async def aupsert(
+        self,
+        model: DatabaseModel,
+        return_json: bool = True,
+        delete_model_class: Optional[type[SQLModel]] = None,
+        delete_filters: Optional[dict[str, Any]] = None,
+    ) -> Response:
+        """Create or update an entity without blocking the event loop. See `upsert`."""
+        return await self._run_in_executor(
+            self.upsert,
+            model,
+            return_json=return_json,
+            delete_model_class=delete_model_class,
+            delete_filters=delete_filters,
+        )
+
+    async def ainsert_many(self, models: Sequence[DatabaseModel]) -> Response:
+        """Insert new entities without blocking the event loop. See `insert_many`."""
+        return await self._run_in_executor(self.insert_many, models)
+
+    async def aget(
+        self,
+        model_class: type[DatabaseModel],
+        filters: dict[str, Any] | None = None,
+        return_json: bool = False,
+        order: str = "desc",
+        columns: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+    ) -> Response:
+        """List entities without blocking the event loop. See `get`."""
+        return await self._run_in_executor(
+            self.get,
+            model_class,
+            filters=filters,
+            return_json=return_json,
+            order=order,
+            columns=columns,
+            limit=limit,
+            offset=offset,
+        )
+
+    async def aget_page(
+        self,
+        model_class: type[DatabaseModel],
+        filters: dict[str, Any] | None = None,
+        after_id: Optional[int] = None,
+        limit: int = 100,
+        return_json: bool = False,
+    ) -> Response:
+        """List a page of entities without blocking the event loop. See `get_page`."""
+        return await self._run_in_executor(
+            self.get_page,
+            model_class,
+            filters=filters,
+            after_id=after_id,
+            limit=limit,
+            return_json=return_json,
+        )
+
+    async def adelete(
+        self, model_class: type[SQLModel], filters: dict[str, Any] | None = None
+    ) -> Response:
+        """Delete an entity without blocking the event loop. See `delete`."""
+        return await self._run_in_executor(self.delete, model_class, filters=filters)
+
     async def import_team(
         self,
         team_config: Union[str, Path, Dict[str, Any]],
@@ -315,7 +634,7 @@ class DatabaseManager:
             # Store in database
             team_db = Team(user_id=user_id, component=config, created_at=datetime.now())
 
-            result = self.upsert(team_db)
+            result = await self.aupsert(team_db)
             return result
 
         except Exception as e:
@@ -375,7 +694,7 @@ class DatabaseManager:
         self, config: Dict[str, Any], user_id: str
     ) -> Optional[Team]:
         """Check if identical team config already exists"""
-        teams = self.get(Team, {"user_id": user_id}).data
+        teams = (await self.aget(Team, {"user_id": user_id})).data
 
         if not teams:
             return None
@@ -390,6 +709,10 @@ class DatabaseManager:
         """Close database connections and cleanup resources"""
         logger.info("Closing database connections...")
         try:
+            # Let pending writes finish before the connections go away
+            await asyncio.get_running_loop().run_in_executor(
+                None, functools.partial(self._executor.shutdown, wait=True)
+            )
             # Dispose of the SQLAlchemy engine
             self.engine.dispose()
             logger.info("Database connections closed successfully")
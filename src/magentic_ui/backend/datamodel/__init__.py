@@ -3,6 +3,7 @@ from .db import (
     Message,
     Plan,
     Run,
+    RunStateDelta,
     RunStatus,
     Session,
     Settings,
@@ -28,6 +29,7 @@ __all__ = [
     "Team",
     "Run",
     "RunStatus",
+    "RunStateDelta",
     "Session",
     "Team",
     "Message",
@@ -6,7 +6,7 @@ from typing import Any, List, Optional, Union
 
 from autogen_core import ComponentModel
 from pydantic import field_serializer
-from sqlalchemy import ForeignKey, Integer
+from sqlalchemy import ForeignKey, Index, Integer
 from sqlmodel import JSON, Column, DateTime, Field, SQLModel, func
 
 from .types import (
@@ -20,8 +20,16 @@ from .types import (
 )
 
 
+# Tables are indexed on the columns the routes filter on, followed by the column they
+# order by. Index changes are picked up by the SchemaManager migrations like any other
+# schema change.
+
+
 class Team(SQLModel, table=True):
-    __table_args__ = {"sqlite_autoincrement": True}
+    __table_args__ = (
+        Index("ix_team_user_id_created_at", "user_id", "created_at"),
+        {"sqlite_autoincrement": True},
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(
         sa_column=Column(DateTime(timezone=True), server_default=func.now()),
@@ -36,7 +44,11 @@ class Team(SQLModel, table=True):
 
 
 class Message(SQLModel, table=True):
-    __table_args__ = {"sqlite_autoincrement": True}
+    __table_args__ = (
+        Index("ix_message_run_id_created_at", "run_id", "created_at"),
+        Index("ix_message_session_id_id", "session_id", "id"),
+        {"sqlite_autoincrement": True},
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(
         sa_column=Column(DateTime(timezone=True), server_default=func.now()),
@@ -65,7 +77,10 @@ class Message(SQLModel, table=True):
 
 
 class Session(SQLModel, table=True):
-    __table_args__ = {"sqlite_autoincrement": True}
+    __table_args__ = (
+        Index("ix_session_user_id_created_at", "user_id", "created_at"),
+        {"sqlite_autoincrement": True},
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(
         sa_column=Column(DateTime(timezone=True), server_default=func.now()),
@@ -101,7 +116,10 @@ class InputType(str, Enum):
 class Run(SQLModel, table=True):
     """Represents a single execution run within a session"""
 
-    __table_args__ = {"sqlite_autoincrement": True}
+    __table_args__ = (
+        Index("ix_run_session_id_created_at", "session_id", "created_at"),
+        {"sqlite_autoincrement": True},
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(
@@ -149,6 +167,26 @@ class Run(SQLModel, table=True):
             return value.isoformat()
 
 
+class RunStateDelta(SQLModel, table=True):
+    """Changes to the team state of a run since its last full checkpoint in `Run.state`"""
+
+    __table_args__ = (
+        Index("ix_runstatedelta_run_id_id", "run_id", "id"),
+        {"sqlite_autoincrement": True},
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    created_at: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), server_default=func.now()),
+    )  # pylint: disable=not-callable
+    run_id: Optional[int] = Field(
+        default=None,
+        sa_column=Column(Integer, ForeignKey("run.id", ondelete="CASCADE")),
+    )
+    # JSON of the delta, see magentic_ui.teams.checkpoint
+    delta: str
+
+
 class Gallery(SQLModel, table=True):
     __table_args__ = {"sqlite_autoincrement": True}
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -180,7 +218,10 @@ class Gallery(SQLModel, table=True):
 
 
 class Settings(SQLModel, table=True):
-    __table_args__ = {"sqlite_autoincrement": True}
+    __table_args__ = (
+        Index("ix_settings_user_id_created_at", "user_id", "created_at"),
+        {"sqlite_autoincrement": True},
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(
         sa_column=Column(DateTime(timezone=True), server_default=func.now()),
@@ -197,7 +238,10 @@ class Settings(SQLModel, table=True):
 
 
 class Plan(SQLModel, table=True):
-    __table_args__ = {"sqlite_autoincrement": True}
+    __table_args__ = (
+        Index("ix_plan_user_id_created_at", "user_id", "created_at"),
+        {"sqlite_autoincrement": True},
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(
         sa_column=Column(DateTime(timezone=True), server_default=func.now()),
@@ -220,4 +264,6 @@ class Plan(SQLModel, table=True):
             return value.isoformat()
 
 
-DatabaseModel = Team | Message | Session | Run | Gallery | Settings | Plan
+DatabaseModel = (
+    Team | Message | Session | Run | RunStateDelta | Gallery | Settings | Plan
+)
@@ -1,3 +1,4 @@
+from .team_pool import TeamPool
 from .teammanager import TeamManager
 
-__all__ = ["TeamManager"]
+__all__ = ["TeamManager", "TeamPool"]
@@ -0,0 +1,154 @@
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, Set
+
+from loguru import logger
+
+from .teammanager import TeamManager
+
+
+@dataclass
+class _PooledTeam:
+    fingerprint: str
+    task: "asyncio.Task[TeamManager]"
+    eviction: asyncio.TimerHandle
+
+
+class TeamPool:
+    """
+    Teams created ahead of their runs, so starting a run does not wait for the model
+    clients, the browser and the code executor to start.
+
+    A team is bound to the directory and the input function of its run, so teams are
+    prepared for a given run, typically when the run is created, and handed out when the
+    run starts. A team is only handed out if it was created from the same settings as
+    the ones the run starts with, given as a fingerprint. Teams that are not claimed
+    within `idle_timeout` seconds are closed, as are the oldest ones once more than
+    `max_size` are pooled.
+
+    Args:
+        max_size (int, optional): Maximum number of pooled teams, 0 disables the pool. Default: 2
+        idle_timeout (float, optional): Time in seconds after which an unclaimed team is closed. Default: 300
+    """
+
+    def __init__(self, max_size: int = 2, idle_timeout: float = 300) -> None:
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._teams: OrderedDict[int, _PooledTeam] = OrderedDict()
+        self._closing: Set["asyncio.Task[None]"] = set()
+
+    def __contains__(self, run_id: int) -> bool:
+        return run_id in self._teams
+
+    def __len__(self) -> int:
+        return len(self._teams)
+
+    def prewarm(
+        self,
+        run_id: int,
+        fingerprint: str,
+        factory: Callable[[], Awaitable[TeamManager]],
+    ) -> bool:
+        """
+        Start creating the team of a run in the background.
+
+        Args:
+            run_id (int): ID of the run.
+            fingerprint (str): Fingerprint of the settings the team is created from.
+            factory (Callable[[], Awaitable[TeamManager]]): Creates a team manager with a prepared team, see `TeamManager.prepare`.
+
+        Returns:
+            bool: True if the team is being created, False if the pool is disabled or already has a team for the run.
+        """
+        if self.max_size <= 0 or run_id in self._teams:
+            return False
+        while len(self._teams) >= self.max_size:
+            oldest_run_id = next(iter(self._teams))
+            logger.info(f"Team pool full, closing the team of run {oldest_run_id}")
+            self._close_later(self._teams.pop(oldest_run_id))
+
+        async def create() -> TeamManager:
+            return await factory()
+
+        self._teams[run_id] = _PooledTeam(
+            fingerprint=fingerprint,
+            task=asyncio.create_task(create()),
+            eviction=asyncio.get_running_loop().call_later(
+                self.idle_timeout, self._evict, run_id
+            ),
+        )
+        return True
+
+    async def acquire(self, run_id: int, fingerprint: str) -> Optional[TeamManager]:
+        """
+        Take the team of a run out of the pool, waiting for it to be created.
+
+        Args:
+            run_id (int): ID of the run.
+            fingerprint (str): Fingerprint of the settings the run starts with.
+
+        Returns:
+            TeamManager | None: The team manager with a prepared team, or None if there is no team for the run, it was created from other settings or its creation failed.
+        """
+        pooled = self._teams.pop(run_id, None)
+        if pooled is None:
+            return None
+        pooled.eviction.cancel()
+        if pooled.fingerprint != fingerprint:
+            logger.info(f"Settings of run {run_id} changed, not using its pooled team")
+            self._close_later(pooled)
+            return None
+        try:
+            return await asyncio.shield(pooled.task)
+        except asyncio.CancelledError:
+            self._close_later(pooled)
+            raise
+        except Exception as e:
+            logger.warning(f"Failed to prepare the team of run {run_id}: {e}")
+            return None
+
+    async def discard(self, run_id: int) -> None:
+        """
+        Close the pooled team of a run, if any.
+
+        Args:
+            run_id (int): ID of the run.
+        """
+        pooled = self._teams.pop(run_id, None)
+        if pooled is not None:
+            pooled.eviction.cancel()
+            await self._close(pooled)
+
+    async def close(self) -> None:
+        """Close all pooled teams."""
+        while self._teams:
+            _, pooled = self._teams.popitem(last=False)
+            self._close_later(pooled)
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+
+    def _evict(self, run_id: int) -> None:
+        pooled = self._teams.pop(run_id, None)
+        if pooled is not None:
+            logger.info(f"Closing the unclaimed team of run {run_id}")
+            self._close_later(pooled)
+
+    def _close_later(self, pooled: _PooledTeam) -> None:
+        pooled.eviction.cancel()
+        task = asyncio.create_task(self._close(pooled))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _close(pooled: _PooledTeam) -> None:
+        # Let the creation finish rather than cancelling it, so that the containers
+        # it started are stopped by the team manager
+        try:
+            team_manager = await pooled.task
+        except BaseException:
+            return
+        try:
+            await team_manager.close()
+        except Exception as e:
+            logger.warning(f"Error closing a pooled team: {e}")
@@ -26,14 +26,18 @@ from autogen_core import EVENT_LOGGER_NAME, CancellationToken, ComponentModel
 from autogen_core.logging import LLMCallEvent
 from ...task_team import get_task_team
 from ...teams import GroupChat
-from ...types import RunPaths
+from ...teams.checkpoint import apply_state_delta
+from ...types import CheckpointEvent, RunPaths
 from ...magentic_ui_config import MagenticUIConfig, ModelClientConfigs
+from ...model_client_registry import get_model_client_registry
 from ...input_func import InputFuncType
 from ...agents import WebSurfer
 
 from ..datamodel.types import EnvironmentVariable, LLMCallEventMessage, TeamResult
 from ..datamodel.db import Run
-from ..utils.utils import get_modified_files, decompress_state
+from ..utils.blob_store import BLOB_SUBDIR, BlobStore
+from ..utils.utils import decompress_state
+from ..utils.workspace_watcher import WorkspaceWatcher
 from ...tools.playwright.browser.utils import get_browser_resource_config
 
 
@@ -65,6 +69,8 @@ class TeamManager:
         self.external_workspace_root = external_workspace_root
         self.inside_docker = inside_docker
         self.config = config
+        # noVNC and Playwright ports of a team created by `prepare` that has not run yet
+        self._prepared_ports: Optional[tuple[int, int]] = None
 
     @staticmethod
     async def load_from_file(path: Union[str, Path]) -> Dict[str, Any]:
@@ -81,6 +87,19 @@ class TeamManager:
                 return yaml.safe_load(content)
             raise ValueError(f"Unsupported file format: {path.suffix}")
 
+    @staticmethod
+    def get_run_suffix(
+        user_id: Optional[str], session_id: Optional[int], run_id: Optional[int]
+    ) -> str:
+        """Get the path of a run directory relative to the workspace root"""
+        return os.path.join(
+            "files",
+            "user",
+            str(user_id or "unknown_user"),
+            str(session_id or "unknown_session"),
+            str(run_id or "unknown_run"),
+        )
+
     def prepare_run_paths(
         self,
         run: Optional[Run] = None,
@@ -89,17 +108,9 @@ class TeamManager:
         internal_workspace_root = self.internal_workspace_root
 
         if run:
-            run_suffix = os.path.join(
-                "files",
-                "user",
-                str(run.user_id or "unknown_user"),
-                str(run.session_id or "unknown_session"),
-                str(run.id or "unknown_run"),
-            )
+            run_suffix = self.get_run_suffix(run.user_id, run.session_id, run.id)
         else:
-            run_suffix = os.path.join(
-                "files", "user", "unknown_user", "unknown_session", "unknown_run"
-            )
+            run_suffix = self.get_run_suffix(None, None, None)
 
         internal_run_dir = internal_workspace_root / Path(run_suffix)
         external_run_dir = external_workspace_root / Path(run_suffix)
@@ -136,6 +147,18 @@ class TeamManager:
 
         return configs
 
+    @staticmethod
+    def get_team_settings(settings_config: Dict[str, Any]) -> Dict[str, Any]:
+        """Get the settings that configure the team created from the settings of a user
+
+        Other settings, such as the UI settings, are ignored when creating the team.
+        """
+        return {
+            key: value
+            for key, value in settings_config.items()
+            if key == "model_configs" or key in MagenticUIConfig.model_fields
+        }
+
     async def _create_team(
         self,
         team_config: Union[str, Path, Dict[str, Any], ComponentModel],
@@ -145,8 +168,19 @@ class TeamManager:
         settings_config: dict[str, Any] = {},
         *,
         paths: RunPaths,
+        state_deltas: Optional[List[str]] = None,
     ) -> tuple[Team, int, int]:
-        """Create team instance from config"""
+        """Create team instance from config
+
+        Args:
+            team_config (str | Path | Dict[str, Any] | ComponentModel): The team configuration
+            state (Mapping[str, Any] | str, optional): The last full state of the team to restore. Default: None
+            input_func (InputFuncType, optional): The input function of the team. Default: None
+            env_vars (List[EnvironmentVariable], optional): Environment variables to set. Default: None
+            settings_config (dict[str, Any], optional): The settings of the user. Default: {}
+            paths (RunPaths): The paths of the run
+            state_deltas (List[str], optional): JSON encoded incremental checkpoints to replay on top of `state`, oldest first. Default: None
+        """
 
         _, novnc_port, playwright_port = get_browser_resource_config(
             paths.external_run_dir, -1, -1, self.inside_docker
@@ -211,6 +245,8 @@ class TeamManager:
                         magentic_ui_config=magentic_ui_config,
                         input_func=input_func,
                         paths=paths,
+                        # Teams share their model clients and HTTP connections
+                        model_client_registry=get_model_client_registry(),
                     ),
                 )
                 if hasattr(self.team, "_participants"):
@@ -220,17 +256,7 @@ class TeamManager:
                             playwright_port = agent.playwright_port
 
                 if state:
-                    if isinstance(state, str):
-                        try:
-                            # Try to decompress if it's compressed
-                            state_dict = decompress_state(state)
-                            await self.team.load_state(state_dict)
-                        except Exception:
-                            # If decompression fails, assume it's a regular JSON string
-                            state_dict = json.loads(state)
-                            await self.team.load_state(state_dict)
-                    else:
-                        await self.team.load_state(state)
+                    await self._load_team_state(state, state_deltas, paths=paths)
 
                 return self.team, novnc_port, playwright_port
 
@@ -262,6 +288,73 @@ class TeamManager:
             await self.close()
             raise
 
+    async def _load_team_state(
+        self,
+        state: Mapping[str, Any] | str,
+        state_deltas: Optional[List[str]] = None,
+        *,
+        paths: RunPaths,
+    ) -> None:
+        """Restore the state of a run in the team
+
+        Args:
+            state (Mapping[str, Any] | str): The last full state of the team
+            state_deltas (List[str], optional): JSON encoded incremental checkpoints to replay on top of `state`, oldest first. Default: None
+            paths (RunPaths): The paths of the run
+        """
+        assert self.team is not None
+        if isinstance(state, str):
+            try:
+                # Try to decompress if it's compressed
+                state_dict = decompress_state(state)
+            except Exception:
+                # If decompression fails, assume it's a regular JSON string
+                state_dict = json.loads(state)
+        else:
+            state_dict = state
+        # Replay the incremental checkpoints taken after the full state
+        for delta in state_deltas or []:
+            state_dict = apply_state_delta(state_dict, json.loads(delta))
+        # Screenshots are checkpointed as references to the run's blob store
+        run_dir = (
+            paths.internal_run_dir if self.inside_docker else paths.external_run_dir
+        )
+        blob_store = BlobStore(run_dir / BLOB_SUBDIR)
+        state_dict = await asyncio.to_thread(blob_store.internalize_images, state_dict)
+        await self.team.load_state(state_dict)
+
+    async def prepare(
+        self,
+        team_config: Union[str, Path, dict[str, Any], ComponentModel],
+        input_func: Optional[InputFuncType] = None,
+        env_vars: Optional[List[EnvironmentVariable]] = None,
+        settings_config: Optional[Dict[str, Any]] = None,
+        run: Optional[Run] = None,
+    ) -> None:
+        """Create the team of a run ahead of `run_stream`
+
+        Starting the run then does not wait for the model clients, browser and code
+        executor to start. The state of the run is loaded by `run_stream`.
+
+        Args:
+            team_config (str | Path | Dict[str, Any] | ComponentModel): The team configuration
+            input_func (InputFuncType, optional): The input function of the team. Default: None
+            env_vars (List[EnvironmentVariable], optional): Environment variables to set. Default: None
+            settings_config (dict[str, Any], optional): The settings of the user. Default: None
+            run (Run, optional): The run the team is for. Default: None
+        """
+        assert self.team is None, "The team was already created"
+        paths = self.prepare_run_paths(run=run)
+        _, novnc_port, playwright_port = await self._create_team(
+            team_config,
+            None,
+            input_func,
+            env_vars,
+            settings_config or {},
+            paths=paths,
+        )
+        self._prepared_ports = (novnc_port, playwright_port)
+
     async def run_stream(
         self,
         task: Optional[Union[ChatMessage, str, Sequence[ChatMessage]]],
@@ -272,6 +365,7 @@ class TeamManager:
         env_vars: Optional[List[EnvironmentVariable]] = None,
         settings_config: Optional[Dict[str, Any]] = None,
         run: Optional[Run] = None,
+        state_deltas: Optional[List[str]] = None,
     ) -> AsyncGenerator[
         Union[AgentEvent, ChatMessage, LLMCallEventMessage, TeamResult], None
     ]:
@@ -285,31 +379,34 @@ class TeamManager:
         logger.handlers = [llm_event_logger]  # Replace all handlers
         logger.info(f"Running in docker: {self.inside_docker}")
         paths = self.prepare_run_paths(run=run)
-        known_files = set(
-            file["name"]
-            for file in get_modified_files(
-                0, time.time(), source_dir=str(paths.internal_run_dir)
-            )
-        )
+        workspace_watcher: Optional[WorkspaceWatcher] = None
         global_new_files: List[Dict[str, str]] = []
         try:
             # TODO: This might cause problems later if we are not careful
-            if self.team is None:
-                # TODO: if we start allowing load from config, we'll need to write the novnc and playwright ports back to the team config..
-                _, _novnc_port, _playwright_port = await self._create_team(
-                    team_config,
-                    state,
-                    input_func,
-                    env_vars,
-                    settings_config or {},
-                    paths=paths,
-                )
+            if self.team is None or self._prepared_ports is not None:
+                if self._prepared_ports is not None:
+                    # The team was created in advance by `prepare`
+                    _novnc_port, _playwright_port = self._prepared_ports
+                    self._prepared_ports = None
+                    if state:
+                        await self._load_team_state(state, state_deltas, paths=paths)
+                else:
+                    # TODO: if we start allowing load from config, we'll need to write the novnc and playwright ports back to the team config..
+                    _, _novnc_port, _playwright_port = await self._create_team(
+                        team_config,
+                        state,
+                        input_func,
+                        env_vars,
+                        settings_config or {},
+                        paths=paths,
+                        state_deltas=state_deltas,
+                    )
 
-                # Initialize known files by name for tracking
-                initial_files = get_modified_files(
-                    start_time, time.time(), source_dir=str(paths.internal_run_dir)
+                # Index the existing files, only files created from now on are reported
+                workspace_watcher = WorkspaceWatcher(
+                    paths.internal_run_dir, since=start_time
                 )
-                known_files = {file["name"] for file in initial_files}
+                await workspace_watcher.start()
 
                 yield TextMessage(
                     source="system",
@@ -322,28 +419,15 @@ class TeamManager:
                     },
                 )
 
+                assert self.team is not None
                 async for message in self.team.run_stream(  # type: ignore
                     task=task, cancellation_token=cancellation_token
                 ):
                     if cancellation_token and cancellation_token.is_cancelled():
                         break
 
-                    # Get all current files with full metadata
-                    modified_files = get_modified_files(
-                        start_time, time.time(), source_dir=str(paths.internal_run_dir)
-                    )
-                    current_file_names = {file["name"] for file in modified_files}
-
                     # Find new files
-                    new_file_names = current_file_names - known_files
-                    known_files = current_file_names  # Update for next iteration
-
-                    # Get the full data for new files
-                    new_files = [
-                        file
-                        for file in modified_files
-                        if file["name"] in new_file_names
-                    ]
+                    new_files = await workspace_watcher.poll()
 
                     if new_files:
                         # filter files that start with "tmp_code"
@@ -370,10 +454,11 @@ class TeamManager:
                             task_result=message,
                             usage="",
                             duration=time.time() - start_time,
-                            files=modified_files,  # Full file data preserved
+                            # Full file data preserved
+                            files=await workspace_watcher.get_files(),
                         )
                     else:
-                        yield message
+                        yield cast(Union[AgentEvent, ChatMessage], message)
 
                     # Add generated files to final output
                     if (
@@ -404,6 +489,9 @@ class TeamManager:
                         event = await llm_event_logger.events.get()
                         yield event
         finally:
+            if workspace_watcher is not None:
+                await workspace_watcher.close()
+
             # Cleanup - remove our handler
             if llm_event_logger in logger.handlers:
                 logger.handlers.remove(llm_event_logger)
@@ -416,6 +504,7 @@ class TeamManager:
 
     async def close(self):
         """Close the team manager"""
+        self._prepared_ports = None
         if self.team and hasattr(self.team, "close"):
             logger.info("Closing team")
             await self.team.close()  # type: ignore
@@ -435,6 +524,21 @@ class TeamManager:
         """Run team synchronously"""
         raise NotImplementedError("Use run_stream instead")
 
+    async def checkpoint(self) -> Optional[CheckpointEvent]:
+        """Take a full checkpoint of the team state, e.g. before stopping the run
+
+        Returns:
+            Optional[CheckpointEvent]: The checkpoint, None if the team does not support checkpoints
+        """
+        if isinstance(self.team, GroupChat):
+            return await self.team.checkpoint()
+        return None
+
+    def request_full_checkpoint(self) -> None:
+        """Make the next checkpoint of the team a full snapshot, e.g. after a checkpoint was lost"""
+        if isinstance(self.team, GroupChat):
+            self.team.request_full_checkpoint()
+
     async def pause_run(self) -> None:
         """Pause the run"""
         if self.team:
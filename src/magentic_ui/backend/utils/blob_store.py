@@ -0,0 +1,188 @@
+import base64
+import binascii
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, cast
+
+BLOB_SUBDIR = ".blobs"
+
+# Shorter values stay inline, they are not worth a file
+MIN_BLOB_SIZE = 1024
+
+_DIGEST_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+# Keys of the references created by `BlobStore.externalize_images`
+_REFERENCE_KEYS = {"$blob", "url"}
+
+
+def _image_media_type(header: bytes) -> Optional[str]:
+    """Get the media type of an image from its first 12 bytes, None if not an image"""
+    if header.startswith(b"\x89PNG"):
+        return "image/png"
+    if header.startswith(b"\xff\xd8"):
+        return "image/jpeg"
+    if header.startswith(b"RIFF") and header[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+class BlobStore:
+    """
+    A content-addressed store of binary data, such as screenshots, on the filesystem.
+
+    Blobs are stored once per distinct content under the sha256 of their bytes, so the same
+    screenshot referenced by many messages and checkpoints only takes space once.
+    Messages and team states refer to a blob with a `{"$blob": <digest>}` dictionary in
+    place of the `{"data": <base64>}` dictionary of a serialized `autogen_core.Image`.
+
+    Args:
+        root (Path): The directory to store the blobs in. Created on first write.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self._root = Path(root)
+
+    def _blob_path(self, digest: str) -> Path:
+        return self._root / digest[:2] / digest
+
+    def put(self, data: bytes) -> str:
+        """
+        Store a blob unless it is already stored.
+
+        Args:
+            data (bytes): The content of the blob.
+
+        Returns:
+            str: The digest referring to the blob.
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if path.exists():
+            return digest
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so readers never see a partial blob
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        return digest
+
+    def path(self, digest: str) -> Optional[Path]:
+        """
+        Get the path of a stored blob.
+
+        Args:
+            digest (str): The digest of the blob.
+
+        Returns:
+            Path | None: The path of the blob, or None if the digest is invalid or not stored.
+        """
+        if not _DIGEST_PATTERN.match(digest):
+            return None
+        path = self._blob_path(digest)
+        return path if path.is_file() else None
+
+    def media_type(self, digest: str) -> str:
+        """
+        Guess the media type of a stored blob from its first bytes.
+
+        Args:
+            digest (str): The digest of the blob.
+
+        Returns:
+            str: The media type, `application/octet-stream` if unknown.
+        """
+        path = self.path(digest)
+        if path is None:
+            return "application/octet-stream"
+        with open(path, "rb") as fh:
+            header = fh.read(12)
+        return _image_media_type(header) or "application/octet-stream"
+
+    def get(self, digest: str) -> Optional[bytes]:
+        """
+        Read a stored blob.
+
+        Args:
+            digest (str): The digest of the blob.
+
+        Returns:
+            bytes | None: The content of the blob, or None if it is not stored.
+        """
+        path = self.path(digest)
+        return path.read_bytes() if path is not None else None
+
+    def externalize_images(self, obj: Any, url_prefix: Optional[str] = None) -> Any:
+        """
+        Move the base64 image data in a JSON-like object to the store.
+
+        Every `{"data": <base64>}` dictionary whose data is a PNG, JPEG or WebP image is
+        replaced with a `{"$blob": <digest>}` reference, other data is left inline. The
+        given object is not modified.
+
+        Args:
+            obj (Any): The object, e.g. a dumped message or team state.
+            url_prefix (str, optional): If set, references also get a `url` of `<url_prefix>/<digest>` to fetch the blob from. Default: None
+
+        Returns:
+            Any: The object with references in place of the image data.
+        """
+        if isinstance(obj, dict):
+            obj = cast(Dict[str, Any], obj)
+            data = obj.get("data")
+            if len(obj) == 1 and isinstance(data, str) and len(data) >= MIN_BLOB_SIZE:
+                try:
+                    decoded = base64.b64decode(data, validate=True)
+                except (binascii.Error, ValueError):
+                    decoded = None
+                if decoded is not None and _image_media_type(decoded[:12]):
+                    digest = self.put(decoded)
+                    reference = {"$blob": digest}
+                    if url_prefix is not None:
+                        reference["url"] = f"{url_prefix}/{digest}"
+                    return reference
+            return {
+                key: self.externalize_images(value, url_prefix)
+                for key, value in obj.items()
+            }
+        if isinstance(obj, list):
+            return [
+                self.externalize_images(item, url_prefix)
+                for item in cast(List[Any], obj)
+            ]
+        return obj
+
+    def internalize_images(self, obj: Any) -> Any:
+        """
+        Replace the blob references created by `externalize_images` with the image data.
+        Only dictionaries with the keys of a reference and a valid digest are references,
+        those to missing blobs are left as they are. The given object is not modified.
+
+        Args:
+            obj (Any): The object with blob references.
+
+        Returns:
+            Any: The object with `{"data": <base64>}` dictionaries in place of the references.
+        """
+        if isinstance(obj, dict):
+            obj = cast(Dict[str, Any], obj)
+            digest = obj.get("$blob")
+            if isinstance(digest, str) and obj.keys() <= _REFERENCE_KEYS:
+                data = self.get(digest)
+                if data is not None:
+                    return {"data": base64.b64encode(data).decode("utf-8")}
+                return obj
+            return {key: self.internalize_images(value) for key, value in obj.items()}
+        if isinstance(obj, list):
+            return [self.internalize_images(item) for item in cast(List[Any], obj)]
+        return obj
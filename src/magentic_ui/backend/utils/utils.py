@@ -192,6 +192,51 @@ def get_file_type(file_path: str) -> str:
     return file_type
 
 
+# Names and extensions of workspace files that are never reported as generated files
+IGNORED_FILE_NAMES = {"__pycache__", "__init__.py", ".blobs"}
+IGNORED_FILE_EXTENSIONS = {".pyc", ".cache"}
+
+
+def is_ignored_file(name: str) -> bool:
+    """
+    Check if a workspace file or directory should not be reported as a generated file.
+
+    Args:
+        name (str): The base name of the file or directory.
+    Returns:
+        bool: True if the file should be ignored.
+    """
+    return (
+        name in IGNORED_FILE_NAMES
+        or os.path.splitext(name)[1] in IGNORED_FILE_EXTENSIONS
+    )
+
+
+def get_file_info(file_path: str) -> Dict[str, str]:
+    """
+    Describe a workspace file for the UI.
+
+    Args:
+        file_path (str): The path of the file.
+    Returns:
+        Dict[str, str]: The file details in the format {path: "", short_path: "", name: "", extension: "", type: ""}
+    """
+    file_relative_path = (
+        "files/user" + file_path.split("files/user", 1)[1]
+        if "files/user" in file_path
+        else ""
+    )
+    name = os.path.basename(file_path)
+    return {
+        "path": file_relative_path,
+        "short_path": file_relative_path,
+        "name": name,
+        # Remove the dot
+        "extension": os.path.splitext(name)[1].lstrip("."),
+        "type": get_file_type(file_path),
+    }
+
+
 def get_modified_files(
     start_timestamp: float, end_timestamp: float, source_dir: str
 ) -> List[Dict[str, str]]:
@@ -210,18 +255,12 @@ def get_modified_files(
              are ignored.
     """
     modified_files: List[Dict[str, str]] = []
-    ignore_extensions = {".pyc", ".cache"}
-    ignore_files = {"__pycache__", "__init__.py"}
 
     # Walk through the directory tree
     for root, dirs, files in os.walk(source_dir):
         # Update directories and files to exclude those to be ignored
-        dirs[:] = [d for d in dirs if d not in ignore_files]
-        files[:] = [
-            f
-            for f in files
-            if f not in ignore_files and os.path.splitext(f)[1] not in ignore_extensions
-        ]
+        dirs[:] = [d for d in dirs if d not in IGNORED_FILE_NAMES]
+        files[:] = [f for f in files if not is_ignored_file(f)]
 
         for file in files:
             file_path = os.path.join(root, file)
@@ -229,22 +268,7 @@ def get_modified_files(
 
             # Verify if the file was modified within the given timestamp range
             if start_timestamp <= file_mtime <= end_timestamp:
-                file_relative_path = (
-                    "files/user" + file_path.split("files/user", 1)[1]
-                    if "files/user" in file_path
-                    else ""
-                )
-                file_type = get_file_type(file_path)
-
-                file_dict = {
-                    "path": file_relative_path,
-                    "short_path": file_relative_path,
-                    "name": os.path.basename(file),
-                    # Remove the dot
-                    "extension": os.path.splitext(file)[1].lstrip("."),
-                    "type": file_type,
-                }
-                modified_files.append(file_dict)
+                modified_files.append(get_file_info(file_path))
 
     # Sort the modified files by extension
     modified_files.sort(key=lambda x: x["extension"])
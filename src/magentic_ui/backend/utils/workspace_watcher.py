@@ -0,0 +1,252 @@
+import asyncio
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from loguru import logger
+
+from .utils import IGNORED_FILE_NAMES, get_file_info, is_ignored_file
+
+try:
+    import watchfiles
+except ImportError:
+    watchfiles = None
+
+# Directories modified less than this many nanoseconds before being listed are listed
+# again on the next rescan
+_RACY_WINDOW_NS = 2_000_000_000
+
+
+class WorkspaceWatcher:
+    """
+    Reports the files created in a run directory while a team runs, and the files
+    created or modified since `since` once it ends.
+
+    The directory tree is scanned once on `start`. After that, only the directories that
+    changed are listed again: the ones file system notifications (inotify on Linux,
+    through `watchfiles`) reported a change in or, without notifications, the ones
+    whose modification time changed. Creating or removing a file updates the
+    modification time of its directory, so unchanged directories never need listing.
+    Writing to an existing file does not, so the modification times of the files older
+    than `since` are remembered and compared on their notifications and by `get_files`.
+
+    Args:
+        root (str | Path): The run directory to watch.
+        since (float): Timestamp from which modified files are included in `files`.
+        use_notifications (bool, optional): Use file system notifications when `watchfiles` is installed. Default: True
+    """
+
+    def __init__(
+        self, root: str | Path, since: float, use_notifications: bool = True
+    ) -> None:
+        self._root = os.path.abspath(root)
+        self._since = since
+        self._use_notifications = use_notifications and watchfiles is not None
+        # Maps directories to their modification time, file names and subdirectories
+        # at the last listing
+        self._dirs: Dict[str, Tuple[int, Set[str], Set[str]]] = {}
+        # Maps the paths of the files modified since `since` to their details
+        self._files: Dict[str, Dict[str, str]] = {}
+        # Maps the paths of the other files to their modification time when listed
+        self._old_files: Dict[str, int] = {}
+        self._changed_paths: Set[str] = set()
+        self._stop_event: Optional[asyncio.Event] = None
+        self._watch_task: Optional["asyncio.Task[None]"] = None
+        self._missed_changes = True
+
+    @property
+    def files(self) -> List[Dict[str, str]]:
+        """
+        The details of the files known to be modified since `since`, sorted by extension.
+
+        Writes to files older than `since` may be missing, see `get_files`.
+        """
+        return sorted(self._files.values(), key=lambda file: file["extension"])
+
+    async def get_files(self) -> List[Dict[str, str]]:
+        """
+        Get the files created or modified since `since`, e.g. when the run ends.
+
+        Returns:
+            List[Dict[str, str]]: The details of the files sorted by extension, see `get_file_info`.
+        """
+        await asyncio.to_thread(self._check_old_files, list(self._old_files))
+        return self.files
+
+    async def start(self) -> None:
+        """Index the existing files and start watching for changes."""
+        if self._use_notifications:
+            self._stop_event = asyncio.Event()
+            self._watch_task = asyncio.create_task(self._watch())
+        await asyncio.to_thread(self._list_dir, self._root, True)
+
+    async def poll(self) -> List[Dict[str, str]]:
+        """
+        Get the files created since the previous call.
+
+        Returns:
+            List[Dict[str, str]]: The details of the new files, see `get_file_info`.
+        """
+        if self._watch_task is not None and not self._watch_task.done():
+            paths, self._changed_paths = self._changed_paths, set()
+            # Changes made before the notifications started are only visible in the
+            # directory modification times
+            rescan_all, self._missed_changes = self._missed_changes, False
+            if not paths and not rescan_all:
+                return []
+            new_paths = await asyncio.to_thread(
+                self._rescan_changed_paths, paths, rescan_all
+            )
+        else:
+            new_paths = await asyncio.to_thread(self._rescan_changed_dirs)
+        return [self._files[path] for path in new_paths if path in self._files]
+
+    async def close(self) -> None:
+        """Stop watching for changes."""
+        if self._stop_event is not None:
+            self._stop_event.set()
+        if self._watch_task is not None:
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+
+    def _is_watched(self, path: str) -> bool:
+        relative_path = os.path.relpath(path, self._root)
+        parts = relative_path.split(os.sep)
+        return not any(part in IGNORED_FILE_NAMES for part in parts)
+
+    async def _watch(self) -> None:
+        assert watchfiles is not None and self._stop_event is not None
+        try:
+            # The stop_event type of awatch includes trio's Event, unknown without trio
+            async for changes in watchfiles.awatch(  # pyright: ignore[reportUnknownMemberType]
+                self._root,
+                watch_filter=lambda _, path: self._is_watched(path),
+                stop_event=self._stop_event,
+                debounce=100,
+                step=50,
+            ):
+                self._changed_paths.update(path for _, path in changes)
+        except Exception as e:
+            # e.g. the directory does not exist yet or the inotify watch limit was hit
+            logger.warning(
+                f"File notifications unavailable for {self._root}, "
+                f"rescanning changed directories instead: {e}"
+            )
+
+    def _list_dir(self, path: str, is_initial: bool = False) -> List[str]:
+        # Returns the paths of the files that are new since the last listing
+        try:
+            # Read the modification time first, so changes made while listing the
+            # directory are picked up by the next rescan
+            listed_at = time.time_ns()
+            mtime = os.stat(path).st_mtime_ns
+            entries = list(os.scandir(path))
+        except OSError:
+            self._forget_dir(path)
+            return []
+        if listed_at - mtime < _RACY_WINDOW_NS:
+            # Modification times are coarse, a file created right after the listing
+            # may not change it. List recently modified directories again next time.
+            mtime = -1
+
+        _, previous_names, previous_subdirs = self._dirs.get(path, (0, set(), set()))
+        names: Set[str] = set()
+        subdirs: Set[str] = set()
+        new_paths: List[str] = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in IGNORED_FILE_NAMES:
+                        subdirs.add(entry.path)
+                    continue
+                if not entry.is_file() or is_ignored_file(entry.name):
+                    continue
+                names.add(entry.name)
+                if entry.name in previous_names:
+                    continue
+                if not is_initial:
+                    new_paths.append(entry.path)
+                else:
+                    stat = entry.stat()
+                    if stat.st_mtime < self._since:
+                        self._old_files[entry.path] = stat.st_mtime_ns
+                        continue
+                self._files[entry.path] = get_file_info(entry.path)
+            except OSError:
+                # The file was removed while listing
+                continue
+        self._dirs[path] = (mtime, names, subdirs)
+        for name in previous_names - names:
+            self._forget_file(os.path.join(path, name))
+
+        for subdir in previous_subdirs - subdirs:
+            self._forget_dir(subdir)
+        for subdir in sorted(subdirs):
+            if subdir not in self._dirs:
+                new_paths.extend(self._list_dir(subdir, is_initial))
+        return new_paths
+
+    def _forget_dir(self, path: str) -> None:
+        prefix = path + os.sep
+        for known in [d for d in self._dirs if d == path or d.startswith(prefix)]:
+            _, names, _ = self._dirs.pop(known)
+            for name in names:
+                self._forget_file(os.path.join(known, name))
+
+    def _forget_file(self, path: str) -> None:
+        self._files.pop(path, None)
+        self._old_files.pop(path, None)
+
+    def _check_old_files(self, paths: Iterable[str]) -> None:
+        # Moves the files older than `since` that were written to since to `_files`
+        for path in paths:
+            mtime = self._old_files.get(path)
+            if mtime is None:
+                continue
+            try:
+                if os.stat(path).st_mtime_ns == mtime:
+                    continue
+                self._files[path] = get_file_info(path)
+            except OSError:
+                # Removed, forgotten when its directory is listed again
+                continue
+            del self._old_files[path]
+
+    def _rescan_changed_dirs(self) -> List[str]:
+        if self._root not in self._dirs:
+            return self._list_dir(self._root)
+        new_paths: List[str] = []
+        for path in list(self._dirs):
+            if path not in self._dirs:
+                # Removed while rescanning its parent
+                continue
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                self._forget_dir(path)
+                continue
+            if mtime != self._dirs[path][0]:
+                new_paths.extend(self._list_dir(path))
+        return new_paths
+
+    def _rescan_changed_paths(self, paths: Set[str], rescan_all: bool) -> List[str]:
+        new_paths = self._rescan_changed_dirs() if rescan_all else []
+        self._check_old_files(paths)
+        # List the closest known directory of every change, new directories are
+        # then found by listing their parent
+        dirs_to_list: Set[str] = set()
+        prefix = self._root + os.sep
+        for path in paths:
+            directory = path if path in self._dirs else os.path.dirname(path)
+            while directory not in self._dirs and directory.startswith(prefix):
+                directory = os.path.dirname(directory)
+            if directory in self._dirs:
+                dirs_to_list.add(directory)
+        for directory in sorted(dirs_to_list):
+            if directory in self._dirs:
+                new_paths.extend(self._list_dir(directory))
+        return new_paths
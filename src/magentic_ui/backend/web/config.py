@@ -1,5 +1,7 @@
 # api/config.py
 
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 
 
@@ -11,6 +13,10 @@ class Settings(BaseSettings):
     CONFIG_DIR: str = "configs"  # Default config directory relative to app_root
     DEFAULT_USER_ID: str = "guestuser@gmail.com"
     UPGRADE_DATABASE: bool = False
+    TEAM_POOL_SIZE: int = 2  # Teams prepared ahead of their runs, 0 to disable
+    TEAM_POOL_IDLE_TIMEOUT: int = 300  # 5 minutes
+    # Model requests in flight over all teams, unlimited if unset
+    MAX_CONCURRENT_MODEL_REQUESTS: Optional[int] = None
 
     model_config = {"env_prefix": "MAGENTIC_UI_"}
 
@@ -5,6 +5,11 @@ from typing import Any, Dict, Optional
 from pathlib import Path
 from fastapi import HTTPException, status
 
+from ...model_client_registry import (
+    close_model_client_registry,
+    init_model_client_registry,
+)
+from ...tools.search_browser_pool import close_search_browser_pool
 from ..database import DatabaseManager
 from .config import settings
 from .managers.connection import WebSocketManager
@@ -86,6 +91,11 @@ async def init_managers(
             config_dir, settings.DEFAULT_USER_ID, check_exists=True
         )
 
+        # Share the model clients of the teams, up to the configured concurrent requests
+        init_model_client_registry(
+            max_concurrent_requests=settings.MAX_CONCURRENT_MODEL_REQUESTS
+        )
+
         # Initialize connection manager
         _websocket_manager = WebSocketManager(
             db_manager=_db_manager,
@@ -93,6 +103,8 @@ async def init_managers(
             external_workspace_root=Path(external_workspace_root),
             inside_docker=inside_docker,
             config=config,
+            team_pool_size=settings.TEAM_POOL_SIZE,
+            team_pool_idle_timeout=settings.TEAM_POOL_IDLE_TIMEOUT,
         )
         logger.info("Connection manager initialized")
 
@@ -120,6 +132,18 @@ async def cleanup_managers() -> None:
     # TeamManager doesn't need explicit cleanup since WebSocketManager handles it
     _team_manager = None
 
+    # Close the browser shared by the orchestrator's pre-planning searches
+    try:
+        await close_search_browser_pool()
+    except Exception as e:
+        logger.error(f"Error closing search browser pool: {str(e)}")
+
+    # Close the model clients shared by the teams, after the teams are closed
+    try:
+        await close_model_client_registry()
+    except Exception as e:
+        logger.error(f"Error closing model clients: {str(e)}")
+
     # Cleanup database manager last
     if _db_manager:
         try:
@@ -1,8 +1,9 @@
 import asyncio
+import base64
 import logging
 import traceback
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional, Sequence, Union
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union, cast
 import json
 
 from autogen_agentchat.base._task import TaskResult
@@ -24,17 +25,22 @@ from pathlib import Path
 from ....types import CheckpointEvent
 from ...database import DatabaseManager
 from ...datamodel import (
+    EnvironmentVariable,
     LLMCallEventMessage,
     Message,
     MessageConfig,
+    Response,
     Run,
+    RunStateDelta,
     RunStatus,
     Settings,
     SettingsConfig,
     TeamResult,
 )
-from ...teammanager import TeamManager
+from ...teammanager import TeamManager, TeamPool
+from ...utils.blob_store import BLOB_SUBDIR, BlobStore
 from ...utils.utils import compress_state
+from .sender import WebSocketSender
 
 logger = logging.getLogger(__name__)
 
@@ -49,6 +55,11 @@ class WebSocketManager:
         external_workspace_root (Path): Path to the external root directory
         inside_docker (bool): Flag indicating if the application is running inside Docker
         config (dict): Configuration for Magentic-UI
+        message_batch_size (int, optional): Number of buffered messages of a run that triggers a write to the database. Default: 20
+        message_flush_interval (float, optional): Maximum time in seconds a message stays buffered before it is written. Default: 0.25
+        send_queue_size (int, optional): Number of messages queued for a client from which streaming chunks are dropped, see `WebSocketSender`. Default: 256
+        team_pool_size (int, optional): Maximum number of teams prepared ahead of their runs, 0 disables preparing teams, see `TeamPool`. Default: 2
+        team_pool_idle_timeout (float, optional): Time in seconds after which a prepared team whose run did not start is closed. Default: 300
     """
 
     def __init__(
@@ -58,6 +69,11 @@ class WebSocketManager:
         external_workspace_root: Path,
         inside_docker: bool,
         config: Dict[str, Any],
+        message_batch_size: int = 20,
+        message_flush_interval: float = 0.25,
+        send_queue_size: int = 256,
+        team_pool_size: int = 2,
+        team_pool_idle_timeout: float = 300,
     ):
         self.db_manager = db_manager
         self.internal_workspace_root = internal_workspace_root
@@ -65,11 +81,33 @@ class WebSocketManager:
         self.inside_docker = inside_docker
         self.config = config
         self._connections: Dict[int, WebSocket] = {}
+        # Outbound message queues, so that slow clients do not hold up the runs
+        self._senders: Dict[int, WebSocketSender] = {}
+        self._send_queue_size = send_queue_size
         self._cancellation_tokens: Dict[int, CancellationToken] = {}
         # Track explicitly closed connections
         self._closed_connections: set[int] = set()
         self._input_responses: Dict[int, asyncio.Queue[str]] = {}
+        # Set when a run is stopped or its connection closed, ends pending input waits
+        self._input_cancel_events: Dict[int, asyncio.Event] = {}
         self._team_managers: Dict[int, TeamManager] = {}
+        # Teams created when their runs are created, see `prewarm_team`
+        self._team_pool = TeamPool(
+            max_size=team_pool_size, idle_timeout=team_pool_idle_timeout
+        )
+        # Runs of open connections, kept in sync with writes made through this manager
+        self._run_cache: Dict[int, Run] = {}
+        # Write-behind buffers of (created_at, message config) per run
+        self._message_batch_size = message_batch_size
+        self._message_flush_interval = message_flush_interval
+        self._message_buffers: Dict[int, List[Tuple[datetime, Dict[str, Any]]]] = {}
+        self._message_flush_tasks: Dict[int, asyncio.Task[None]] = {}
+        self._message_flush_locks: Dict[int, asyncio.Lock] = {}
+        # Serialize the checkpoint writes of a run, see `_save_final_checkpoint`
+        self._checkpoint_locks: Dict[int, asyncio.Lock] = {}
+        self._final_checkpoint_runs: set[int] = set()
+        # Runs whose last checkpoint was not saved and that wait for a full checkpoint
+        self._failed_checkpoint_runs: set[int] = set()
         self._cancel_message = TeamResult(
             task_result=TaskResult(
                 messages=[TextMessage(source="user", content="Run cancelled by user")],
@@ -94,8 +132,19 @@ class WebSocketManager:
             await websocket.accept()
             self._connections[run_id] = websocket
             self._closed_connections.discard(run_id)
+            previous_sender = self._senders.pop(run_id, None)
+            if previous_sender is not None:
+                await previous_sender.close()
+            self._senders[run_id] = WebSocketSender(
+                websocket,
+                run_id,
+                on_error=lambda error: self._handle_send_error(run_id, error),
+                max_size=self._send_queue_size,
+                lag_threshold=max(1, self._send_queue_size // 8),
+            )
             # Initialize input queue for this connection
             self._input_responses[run_id] = asyncio.Queue()
+            self._input_cancel_events[run_id] = asyncio.Event()
 
             await self._send_message(
                 run_id,
@@ -146,6 +195,11 @@ class WebSocketManager:
             team_manager = self._team_managers[run_id]
         cancellation_token = CancellationToken()
         self._cancellation_tokens[run_id] = cancellation_token
+        if run_id in self._input_cancel_events:
+            # A previous run on this connection may have been stopped
+            self._input_cancel_events[run_id].clear()
+        self._final_checkpoint_runs.discard(run_id)
+        self._failed_checkpoint_runs.discard(run_id)
         final_result = None
 
         try:
@@ -164,19 +218,35 @@ class WebSocketManager:
 
             settings_config["memory_controller_key"] = run.user_id
 
+            # Use the team prepared when the run was created, if its settings match
+            prepared_team_manager = await self._team_pool.acquire(
+                run_id, self._team_fingerprint(settings_config, env_vars)
+            )
+            if prepared_team_manager is not None:
+                if team_manager.team is None:
+                    team_manager = prepared_team_manager
+                    self._team_managers[run_id] = team_manager
+                else:
+                    await prepared_team_manager.close()
+
             state = None
+            state_deltas: List[str] = []
             if run:
                 run.task = MessageConfig(content=task, source="user").model_dump()
                 run.status = RunStatus.ACTIVE
                 state = run.state
-                self.db_manager.upsert(run)
+                if state:
+                    state_deltas = await self._get_state_deltas(run_id)
+                await self._save_run(run)
                 await self._update_run_status(run_id, RunStatus.ACTIVE)
 
             # add task as message
             if isinstance(task, str):
                 await self._send_message(
                     run_id,
-                    self._format_message(TextMessage(source="user_proxy", content=task))
+                    await self._format_message(
+                        TextMessage(source="user_proxy", content=task)
+                    )
                     or {},
                 )
                 await self._save_message(
@@ -195,7 +265,8 @@ class WebSocketManager:
                             continue
 
                         await self._send_message(
-                            run_id, self._format_message(task_message) or {}
+                            run_id,
+                            await self._format_message(task_message, run_id) or {},
                         )
                         await self._save_message(run_id, task_message)
 
@@ -206,6 +277,7 @@ class WebSocketManager:
                 task=task,
                 team_config=team_config,
                 state=state,
+                state_deltas=state_deltas,
                 input_func=input_func,
                 cancellation_token=cancellation_token,
                 env_vars=env_vars,
@@ -222,13 +294,7 @@ class WebSocketManager:
                     break
 
                 if isinstance(message, CheckpointEvent):
-                    # Save state to run
-                    run = await self._get_run(run_id)
-                    if run:
-                        # Use compress_state utility to compress the state
-                        state_dict = json.loads(message.state)
-                        run.state = compress_state(state_dict)
-                        self.db_manager.upsert(run)
+                    await self._save_checkpoint(run_id, message)
                     continue
 
                 # do not show internal messages
@@ -238,7 +304,7 @@ class WebSocketManager:
                 ):
                     continue
 
-                formatted_message = self._format_message(message)
+                formatted_message = await self._format_message(message, run_id)
                 if formatted_message:
                     await self._send_message(run_id, formatted_message)
 
@@ -260,6 +326,8 @@ class WebSocketManager:
                     elif isinstance(message, TeamResult):
                         final_result = message.model_dump()
                     self._team_managers[run_id] = team_manager  # Track the team manager
+            # Persist all messages before the run is marked as done
+            await self._flush_messages(run_id)
             if (
                 not cancellation_token.is_cancelled()
                 and run_id not in self._closed_connections
@@ -293,6 +361,11 @@ class WebSocketManager:
             traceback.print_exc()
             await self._handle_stream_error(run_id, e)
         finally:
+            await self._flush_messages(run_id)
+            self._message_flush_locks.pop(run_id, None)
+            self._checkpoint_locks.pop(run_id, None)
+            self._final_checkpoint_runs.discard(run_id)
+            self._failed_checkpoint_runs.discard(run_id)
             self._cancellation_tokens.pop(run_id, None)
             self._team_managers.pop(run_id, None)  # Remove the team manager when done
 
@@ -302,21 +375,194 @@ class WebSocketManager:
         """
         Save a message to the database
 
+        Messages are buffered per run and written in batches, once `message_batch_size`
+        messages are buffered or `message_flush_interval` seconds have passed.
+        Use `_flush_messages` to write them immediately.
+
         Args:
             run_id (int): ID of the run
             message (Union[AgentEvent | ChatMessage, LLMCallEventMessage]): Message to save
         """
+        buffer = self._message_buffers.setdefault(run_id, [])
+        buffer.append((datetime.now(), message.model_dump()))
+        if len(buffer) >= self._message_batch_size:
+            await self._flush_messages(run_id)
+        elif run_id not in self._message_flush_tasks:
+            self._message_flush_tasks[run_id] = asyncio.create_task(
+                self._flush_messages_later(run_id)
+            )
+
+    async def _flush_messages_later(self, run_id: int) -> None:
+        await asyncio.sleep(self._message_flush_interval)
+        # Unregister first so that a concurrent flush does not cancel the write itself
+        self._message_flush_tasks.pop(run_id, None)
+        await self._flush_messages(run_id)
+
+    async def _flush_messages(self, run_id: int) -> None:
+        """
+        Write the buffered messages of a run to the database in a single transaction
+
+        Args:
+            run_id (int): ID of the run
+        """
+        flush_task = self._message_flush_tasks.pop(run_id, None)
+        if flush_task is not None and flush_task is not asyncio.current_task():
+            flush_task.cancel()
+
+        # The lock keeps batches of the same run in order
+        lock = self._message_flush_locks.setdefault(run_id, asyncio.Lock())
+        async with lock:
+            buffer = self._message_buffers.pop(run_id, None)
+            if not buffer:
+                return
+            try:
+                run = await self._get_run(run_id)
+                if run is None:
+                    logger.warning(
+                        f"Dropping {len(buffer)} messages of missing run {run_id}"
+                    )
+                    return
+                # Store screenshots in the blob store, messages only refer to them
+                blob_store = self.get_blob_store(run.user_id, run.session_id, run_id)
+                configs = await asyncio.to_thread(
+                    blob_store.externalize_images,
+                    [config for _, config in buffer],
+                    self._blob_url_prefix(run_id),
+                )
+                db_messages = [
+                    Message(
+                        created_at=created_at,
+                        session_id=run.session_id,
+                        run_id=run_id,
+                        config=config,
+                        user_id=run.user_id,  # Pass the user_id from the run object
+                    )
+                    for (created_at, _), config in zip(buffer, configs)
+                ]
+                response = await self.db_manager.ainsert_many(db_messages)
+                if not response.status:
+                    logger.error(
+                        f"Failed to save messages for run {run_id}: {response.message}"
+                    )
+            except Exception as e:
+                logger.error(f"Failed to save messages for run {run_id}: {e}")
+
+    async def _save_checkpoint(self, run_id: int, checkpoint: CheckpointEvent) -> None:
+        """
+        Save a team state checkpoint of a run
+
+        Full checkpoints replace the state of the run and discard its deltas,
+        incremental checkpoints are appended to the deltas of the run. Checkpoints are
+        ignored once the final checkpoint of a stopped run was saved.
+
+        If a checkpoint cannot be saved, the team is asked for a full checkpoint next and
+        the deltas until then are ignored, as they would be replayed on the wrong state.
+
+        Args:
+            run_id (int): ID of the run
+            checkpoint (CheckpointEvent): The checkpoint to save
+        """
+        async with self._checkpoint_lock(run_id):
+            if run_id not in self._final_checkpoint_runs:
+                await self._write_checkpoint(run_id, checkpoint)
+
+    async def _write_checkpoint(self, run_id: int, checkpoint: CheckpointEvent) -> None:
+        if checkpoint.delta and run_id in self._failed_checkpoint_runs:
+            return
+        try:
+            saved = await self._store_checkpoint(run_id, checkpoint)
+        except Exception as e:
+            logger.error(f"Failed to save a checkpoint of run {run_id}: {e}")
+            saved = False
+        if saved:
+            if not checkpoint.delta:
+                self._failed_checkpoint_runs.discard(run_id)
+            return
+        self._failed_checkpoint_runs.add(run_id)
+        team_manager = self._team_managers.get(run_id)
+        if team_manager is not None:
+            team_manager.request_full_checkpoint()
 
+    async def _store_checkpoint(self, run_id: int, checkpoint: CheckpointEvent) -> bool:
         run = await self._get_run(run_id)
-        if run:
-            db_message = Message(
-                created_at=datetime.now(),
-                session_id=run.session_id,
-                run_id=run_id,
-                config=message.model_dump(),
-                user_id=run.user_id,  # Pass the user_id from the run object
+        if run is None:
+            return False
+        # Store screenshots in the blob store, the checkpoint only refers to them
+        blob_store = self.get_blob_store(run.user_id, run.session_id, run_id)
+        state_dict = await asyncio.to_thread(
+            blob_store.externalize_images, json.loads(checkpoint.state)
+        )
+
+        if checkpoint.delta:
+            response = await self.db_manager.ainsert_many(
+                [
+                    RunStateDelta(
+                        created_at=datetime.now(),
+                        run_id=run_id,
+                        delta=json.dumps(state_dict),
+                    )
+                ]
             )
-            self.db_manager.upsert(db_message)
+        else:
+            # Use compress_state utility to compress the state
+            run.state = compress_state(state_dict)
+            # The deltas apply to the previous state, drop them in the same transaction
+            response = await self.db_manager.aupsert(
+                run,
+                return_json=False,
+                delete_model_class=RunStateDelta,
+                delete_filters={"run_id": run_id},
+            )
+            self._cache_saved_run(run, response)
+        if not response.status:
+            logger.error(
+                f"Failed to save a checkpoint of run {run_id}: {response.message}"
+            )
+        return response.status
+
+    async def _save_final_checkpoint(self, run_id: int) -> None:
+        """
+        Save a full checkpoint of the team of a run that is being stopped
+
+        Checkpoints the stream yields afterwards are not saved, they may have been
+        computed against an older state.
+
+        Args:
+            run_id (int): ID of the run
+        """
+        team_manager = self._team_managers.get(run_id)
+        if team_manager is None:
+            return
+        async with self._checkpoint_lock(run_id):
+            self._final_checkpoint_runs.add(run_id)
+            try:
+                checkpoint = await team_manager.checkpoint()
+                if checkpoint is not None:
+                    await self._write_checkpoint(run_id, checkpoint)
+            except Exception as e:
+                logger.error(
+                    f"Failed to save the final checkpoint of run {run_id}: {e}"
+                )
+
+    def _checkpoint_lock(self, run_id: int) -> asyncio.Lock:
+        return self._checkpoint_locks.setdefault(run_id, asyncio.Lock())
+
+    async def _get_state_deltas(self, run_id: int) -> List[str]:
+        """
+        Get the incremental checkpoints of a run, oldest first
+
+        Args:
+            run_id (int): ID of the run
+
+        Returns:
+            List[str]: The JSON encoded deltas to apply on top of the state of the run
+        """
+        response = await self.db_manager.aget(
+            RunStateDelta, filters={"run_id": run_id}, return_json=False
+        )
+        if not response.status or not response.data:
+            return []
+        return [row.delta for row in sorted(response.data, key=lambda row: row.id)]
 
     async def _update_run(
         self,
@@ -341,7 +587,81 @@ class WebSocketManager:
                 run.team_result = team_result
             if error:
                 run.error_message = error
-            self.db_manager.upsert(run)
+            await self._save_run(run)
+
+    async def prewarm_team(self, run_id: int) -> None:
+        """
+        Start creating the team of a new run in the background, with the settings of
+        its user, so that starting the run does not wait for the team.
+
+        The team is used by `start_stream` if the run starts with the same team settings
+        and environment variables, and closed otherwise.
+
+        Args:
+            run_id (int): ID of the run
+        """
+        if self._team_pool.max_size <= 0 or run_id in self._team_managers:
+            return
+        try:
+            run = await self._get_run(run_id)
+            user_settings = (
+                await self._get_settings(run.user_id) if run and run.user_id else None
+            )
+        except Exception as e:
+            logger.warning(f"Not preparing the team of run {run_id}: {e}")
+            return
+        if run is None or user_settings is None:
+            # Without saved settings the client starts the run with its defaults
+            return
+        settings_config: Dict[str, Any] = {
+            **user_settings.config,  # type: ignore
+            "memory_controller_key": run.user_id,
+        }
+        env_vars = SettingsConfig(**user_settings.config).environment  # type: ignore
+
+        async def create_team_manager() -> TeamManager:
+            team_manager = TeamManager(
+                internal_workspace_root=self.internal_workspace_root,
+                external_workspace_root=self.external_workspace_root,
+                inside_docker=self.inside_docker,
+                config=self.config,
+            )
+            # The team is created from the settings, the team config sent when the
+            # run starts is only used when loading teams from configs
+            assert not team_manager.load_from_config
+            await team_manager.prepare(
+                team_config={},
+                input_func=self.create_input_func(run_id),
+                env_vars=env_vars,
+                settings_config=settings_config,
+                run=run,
+            )
+            return team_manager
+
+        if self._team_pool.prewarm(
+            run_id,
+            self._team_fingerprint(settings_config, env_vars),
+            create_team_manager,
+        ):
+            logger.info(f"Preparing the team of run {run_id}")
+
+    @staticmethod
+    def _team_fingerprint(
+        settings_config: Dict[str, Any],
+        env_vars: Optional[Sequence[EnvironmentVariable]],
+    ) -> str:
+        # Only the settings used to create the team, a team is not worth recreating
+        # for a change of e.g. the UI settings
+        return json.dumps(
+            {
+                "settings": TeamManager.get_team_settings(settings_config),
+                "environment": [
+                    env_var.model_dump(mode="json") for env_var in env_vars or []
+                ],
+            },
+            sort_keys=True,
+            default=str,
+        )
 
     def create_input_func(self, run_id: int, timeout: int = 600) -> InputFuncType:
         """
@@ -384,46 +704,41 @@ class WebSocketManager:
                 run = await self._get_run(run_id)
                 if run:
                     run.input_request = {"prompt": prompt, "input_type": input_type}
-                    self.db_manager.upsert(run)
-
-                # Wait for response with timeout
-                if run_id in self._input_responses:
-                    try:
-
-                        async def poll_for_response():
-                            while True:
-                                # Check if run was closed/cancelled
-                                if run_id in self._closed_connections:
-                                    raise ValueError("Run was closed")
-
-                                # Try to get response with short timeout
-                                try:
-                                    response = await asyncio.wait_for(
-                                        self._input_responses[run_id].get(),
-                                        timeout=min(timeout, 5),
-                                    )
-                                    await self._update_run_status(
-                                        run_id, RunStatus.ACTIVE
-                                    )
-                                    return response
-                                except asyncio.TimeoutError:
-                                    continue  # Keep checking for closed status
-
-                        response = await asyncio.wait_for(
-                            poll_for_response(), timeout=timeout
-                        )
-                        return response
+                    await self._save_run(run)
 
-                    except asyncio.TimeoutError:
-                        # Stop the run if timeout occurs
-                        logger.warning(f"Input response timeout for run {run_id}")
-                        await self.stop_run(
-                            run_id,
-                            "Magentic-UI timed out while waiting for your input. To resume, please enter a follow-up message in the input box or you can simply type 'continue'.",
-                        )
-                        raise
-                else:
+                # Wait for a response, the run being stopped or closed, or the timeout
+                responses = self._input_responses.get(run_id)
+                cancel_event = self._input_cancel_events.get(run_id)
+                if responses is None or cancel_event is None:
                     raise ValueError(f"No input queue for run {run_id}")
+                if run_id in self._closed_connections or cancel_event.is_set():
+                    raise ValueError("Run was closed")
+
+                response_task = asyncio.ensure_future(responses.get())
+                cancel_task = asyncio.ensure_future(cancel_event.wait())
+                try:
+                    done, _ = await asyncio.wait(
+                        {response_task, cancel_task},
+                        timeout=timeout,
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+                finally:
+                    response_task.cancel()
+                    cancel_task.cancel()
+
+                if response_task in done:
+                    await self._update_run_status(run_id, RunStatus.ACTIVE)
+                    return response_task.result()
+                if cancel_task in done:
+                    raise ValueError("Run was closed")
+
+                # Stop the run if timeout occurs
+                logger.warning(f"Input response timeout for run {run_id}")
+                await self.stop_run(
+                    run_id,
+                    "Magentic-UI timed out while waiting for your input. To resume, please enter a follow-up message in the input box or you can simply type 'continue'.",
+                )
+                raise asyncio.TimeoutError()
 
             except Exception as e:
                 logger.error(f"Error handling input for run {run_id}: {e}")
@@ -439,13 +754,16 @@ class WebSocketManager:
             logger.warning(f"Received input response for inactive run {run_id}")
 
     async def stop_run(self, run_id: int, reason: str) -> None:
+        if run_id in self._input_cancel_events:
+            self._input_cancel_events[run_id].set()
         if run_id in self._cancellation_tokens:
             logger.info(f"Stopping run {run_id}")
 
             stop_message = self._get_stop_message(reason)
 
             try:
-                # Update run record first
+                # Persist buffered messages, then update run record
+                await self._flush_messages(run_id)
                 await self._update_run(
                     run_id, status=RunStatus.STOPPED, team_result=stop_message
                 )
@@ -465,6 +783,9 @@ class WebSocketManager:
                         },
                     )
 
+                # The checkpoints of the stream are throttled, save the latest state
+                await self._save_final_checkpoint(run_id)
+
                 # Finally cancel the token
                 self._cancellation_tokens[run_id].cancel()
                 # remove team manager
@@ -487,17 +808,34 @@ class WebSocketManager:
 
         # Mark as closed before cleanup to prevent any new messages
         self._closed_connections.add(run_id)
+        if run_id in self._input_cancel_events:
+            self._input_cancel_events[run_id].set()
 
         # Cancel any running tasks
         await self.stop_run(run_id, "Connection closed")
 
         # Clean up resources
         self._connections.pop(run_id, None)
+        sender = self._senders.pop(run_id, None)
+        if sender is not None:
+            await sender.close()
+        self._run_cache.pop(run_id, None)
         self._cancellation_tokens.pop(run_id, None)
         self._input_responses.pop(run_id, None)
+        self._input_cancel_events.pop(run_id, None)
+        await self._team_pool.discard(run_id)
+
+    async def send_message(self, run_id: int, message: Dict[str, Any]) -> None:
+        """Queue a message for the client of a run without waiting for the client
+
+        Args:
+            run_id (int): int of the run
+            message (Dict[str, Any]): Message dictionary to send
+        """
+        await self._send_message(run_id, message)
 
     async def _send_message(self, run_id: int, message: Dict[str, Any]) -> None:
-        """Send a message through the WebSocket with connection state checking
+        """Queue a message for the WebSocket with connection state checking
 
         Args:
             run_id (int): int of the run
@@ -509,20 +847,24 @@ class WebSocketManager:
             )
             return
 
-        try:
-            if run_id in self._connections:
-                websocket = self._connections[run_id]
-                await websocket.send_json(message)
-        except WebSocketDisconnect:
+        sender = self._senders.get(run_id)
+        if sender is not None:
+            sender.send(message)
+
+    async def _handle_send_error(self, run_id: int, error: Exception) -> None:
+        """Treat a failed send as a lost connection
+
+        Args:
+            run_id (int): int of the run
+            error (Exception): The error raised while sending
+        """
+        if isinstance(error, WebSocketDisconnect):
             logger.warning(
                 f"WebSocket disconnected while sending message for run {run_id}"
             )
-            await self.disconnect(run_id)
-        except Exception as e:
-            logger.error(f"Error sending message for run {run_id}: {e}, {message}")
-            # Don't try to send error message here to avoid potential recursive loop
-            await self._update_run_status(run_id, RunStatus.ERROR, str(e))
-            await self.disconnect(run_id)
+        else:
+            logger.error(f"Error sending message for run {run_id}: {error}")
+        await self.disconnect(run_id)
 
     async def _handle_stream_error(self, run_id: int, error: Exception) -> None:
         """
@@ -532,6 +874,7 @@ class WebSocketManager:
             run_id (int): ID of the run
             error (Exception): Exception that occurred
         """
+        await self._flush_messages(run_id)
         if run_id not in self._closed_connections:
             error_result = TeamResult(
                 task_result=TaskResult(
@@ -556,11 +899,43 @@ class WebSocketManager:
                 run_id, RunStatus.ERROR, team_result=error_result, error=str(error)
             )
 
-    def _format_message(self, message: Any) -> Optional[Dict[str, Any]]:
+    def get_blob_store(
+        self, user_id: Optional[str], session_id: Optional[int], run_id: int
+    ) -> BlobStore:
+        """Get the blob store in the directory of a run
+
+        Args:
+            user_id (str, optional): ID of the user of the run
+            session_id (int, optional): ID of the session of the run
+            run_id (int): ID of the run
+
+        Returns:
+            BlobStore: The blob store of the run
+        """
+        workspace_root = (
+            self.internal_workspace_root
+            if self.inside_docker
+            else self.external_workspace_root
+        )
+        run_suffix = TeamManager.get_run_suffix(user_id, session_id, run_id)
+        return BlobStore(workspace_root / run_suffix / BLOB_SUBDIR)
+
+    @staticmethod
+    def _blob_url_prefix(run_id: int) -> str:
+        return f"/api/runs/{run_id}/blobs"
+
+    @staticmethod
+    def _put_image(blob_store: BlobStore, data: str) -> str:
+        return blob_store.put(base64.b64decode(data))
+
+    async def _format_message(
+        self, message: Any, run_id: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
         """Format message for WebSocket transmission
 
         Args:
             message (Any): Message to format
+            run_id (int, optional): ID of the run of the message. If the run is connected, images are sent as URLs to its blob store instead of inline data
 
         Returns:
             Optional[Dict[str, Any]]: Formatted message or None if formatting fails
@@ -569,15 +944,30 @@ class WebSocketManager:
         try:
             if isinstance(message, MultiModalMessage):
                 message_dump = message.model_dump()
+                run = self._run_cache.get(run_id) if run_id is not None else None
+                blob_store = (
+                    self.get_blob_store(run.user_id, run.session_id, run_id)
+                    if run is not None and run_id is not None
+                    else None
+                )
 
-                message_content: list[dict[str, Any]] = []
-                for row in message_dump["content"]:
-                    if "data" in row:
+                # The content is made of texts and dumped images
+                message_content: List[Union[str, Dict[str, Any]]] = []
+                for row in cast(
+                    List[Union[str, Dict[str, Any]]], message_dump["content"]
+                ):
+                    if isinstance(row, dict) and "data" in row:
+                        data = cast(str, row["data"])
+                        if blob_store is not None and run_id is not None:
+                            # Hashing and writing the image would block the event loop
+                            digest = await asyncio.to_thread(
+                                self._put_image, blob_store, data
+                            )
+                            url = f"{self._blob_url_prefix(run_id)}/{digest}"
+                        else:
+                            url = f"data:image/png;base64,{data}"
                         message_content.append(
-                            {
-                                "url": f"data:image/png;base64,{row['data']}",
-                                "alt": "WebSurfer Screenshot",
-                            }
+                            {"url": url, "alt": "WebSurfer Screenshot"}
                         )
                     else:
                         message_content.append(row)
@@ -612,7 +1002,7 @@ class WebSocketManager:
             return None
 
     async def _get_run(self, run_id: int) -> Optional[Run]:
-        """Get run from database
+        """Get run from the cache of connected runs or from the database
 
         Args:
             run_id (int): int of the run to retrieve
@@ -620,8 +1010,34 @@ class WebSocketManager:
         Returns:
             Optional[Run]: Run object if found, None otherwise
         """
-        response = self.db_manager.get(Run, filters={"id": run_id}, return_json=False)
-        return response.data[0] if response.status and response.data else None
+        run = self._run_cache.get(run_id)
+        if run is not None:
+            return run
+        response = await self.db_manager.aget(
+            Run, filters={"id": run_id}, return_json=False
+        )
+        run = response.data[0] if response.status and response.data else None
+        if run is not None and run_id in self._connections:
+            self._run_cache[run_id] = run
+        return run
+
+    async def _save_run(self, run: Run) -> None:
+        """Save run to database and update the cached copy
+
+        Args:
+            run (Run): Run object to save
+        """
+        assert run.id is not None, "Run must have an ID"
+        response = await self.db_manager.aupsert(run, return_json=False)
+        self._cache_saved_run(run, response)
+
+    def _cache_saved_run(self, run: Run, response: Response) -> None:
+        assert run.id is not None, "Run must have an ID"
+        if response.status and response.data and run.id in self._connections:
+            self._run_cache[run.id] = cast(Run, response.data)
+        else:
+            # Reload from the database next time
+            self._run_cache.pop(run.id, None)
 
     async def _get_settings(self, user_id: str) -> Optional[Settings]:
         """Get user settings from database
@@ -630,7 +1046,7 @@ class WebSocketManager:
         Returns:
             Optional[Settings]: User settings if found, None otherwise
         """
-        response = self.db_manager.get(
+        response = await self.db_manager.aget(
             filters={"user_id": user_id}, model_class=Settings, return_json=False
         )
         return response.data[0] if response.status and response.data else None
@@ -649,7 +1065,7 @@ class WebSocketManager:
         if run:
             run.status = status
             run.error_message = error
-            self.db_manager.upsert(run)
+            await self._save_run(run)
         # send system message to client with status
         await self._send_message(
             run_id,
@@ -687,11 +1103,19 @@ class WebSocketManager:
 
                     run.status = RunStatus.STOPPED
                     run.team_result = interrupted_result
-                    self.db_manager.upsert(run)
+                    await self._save_run(run)
+
+            # Persist messages that are still buffered
+            for run_id in list(self._message_buffers):
+                await self._flush_messages(run_id)
 
             # Then disconnect all websockets with timeout
             # 10 second timeout for entire cleanup
             async def disconnect_all():
+                # Give clients a chance to receive the last messages
+                await asyncio.gather(
+                    *(sender.drain(timeout=2) for sender in self._senders.values())
+                )
                 for run_id in self.active_connections.copy():
                     try:
                         await asyncio.wait_for(self.disconnect(run_id), timeout=2)
@@ -709,15 +1133,38 @@ class WebSocketManager:
         finally:
             # Always clear internal state, even if cleanup had errors
             self._connections.clear()
+            for sender in self._senders.values():
+                await sender.close()
+            self._senders.clear()
+            self._run_cache.clear()
             self._cancellation_tokens.clear()
             self._closed_connections.clear()
             self._input_responses.clear()
+            for cancel_event in self._input_cancel_events.values():
+                cancel_event.set()
+            self._input_cancel_events.clear()
+            for flush_task in self._message_flush_tasks.values():
+                flush_task.cancel()
+            self._message_flush_tasks.clear()
+            self._message_flush_locks.clear()
+            self._checkpoint_locks.clear()
+            self._final_checkpoint_runs.clear()
+            self._failed_checkpoint_runs.clear()
+            await self._team_pool.close()
 
     @property
     def active_connections(self) -> set[int]:
         """Get set of active run IDs"""
         return set(self._connections.keys()) - self._closed_connections
 
+    @property
+    def send_queue_stats(self) -> Dict[int, Dict[str, int]]:
+        """Get the outbound queue depth and counters of every connected run"""
+        return {
+            run_id: {**sender.stats, "depth": sender.depth}
+            for run_id, sender in self._senders.items()
+        }
+
     @property
     def active_runs(self) -> set[int]:
         """Get set of runs with active cancellation tokens"""
@@ -0,0 +1,206 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, cast
+
+from fastapi import WebSocket
+
+logger = logging.getLogger(__name__)
+
+SCREENSHOT_OMITTED = "(Screenshot omitted while the connection was catching up)"
+
+# A JSON message sent to the client
+_Message = Dict[str, Any]
+
+
+class WebSocketSender:
+    """
+    Sends the messages of a run to its WebSocket from a dedicated writer task.
+
+    `send` only queues a message and never waits on the network, so a slow client
+    cannot hold up the team. While messages are waiting:
+
+    - consecutive `message_chunk` messages of the same source are merged,
+    - a `system` status update replaces the previous status update still queued,
+    - once more than `lag_threshold` messages are queued, inline screenshots are
+      replaced with a short note (messages are persisted, so reloading shows them),
+    - once `max_size` messages are queued, the oldest `message_chunk` messages are
+      dropped. Other messages are always delivered.
+
+    Args:
+        websocket (WebSocket): The connected WebSocket.
+        run_id (int): ID of the run, for logging.
+        on_error (Callable[[Exception], Awaitable[None]], optional): Called from the writer task when sending fails. The sender stops afterwards. Default: None
+        max_size (int, optional): Number of queued messages from which chunks are dropped. Default: 256
+        lag_threshold (int, optional): Number of queued messages from which inline screenshots are omitted. Default: 32
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        run_id: int,
+        on_error: Optional[Callable[[Exception], Awaitable[None]]] = None,
+        max_size: int = 256,
+        lag_threshold: int = 32,
+    ) -> None:
+        assert 0 < lag_threshold <= max_size
+        self._websocket = websocket
+        self._run_id = run_id
+        self._on_error = on_error
+        self._max_size = max_size
+        self._lag_threshold = lag_threshold
+        self._queue: Deque[_Message] = deque()
+        self._has_messages = asyncio.Event()
+        self._is_empty = asyncio.Event()
+        self._is_empty.set()
+        self._closed = False
+        self._writer_task = asyncio.create_task(self._write())
+        self.stats: Dict[str, int] = {
+            "sent": 0,
+            "coalesced": 0,
+            "dropped": 0,
+            "screenshots_omitted": 0,
+            "max_depth": 0,
+        }
+
+    @property
+    def depth(self) -> int:
+        """Number of queued messages."""
+        return len(self._queue)
+
+    @property
+    def closed(self) -> bool:
+        """Whether the sender stopped, after `close` or a failed send."""
+        return self._closed
+
+    def send(self, message: _Message) -> None:
+        """
+        Queue a message for sending. Returns immediately.
+
+        Args:
+            message (Dict[str, Any]): The JSON-serializable message.
+        """
+        if self._closed:
+            return
+        if not self._coalesce(message):
+            if len(self._queue) >= self._lag_threshold:
+                message = self._omit_screenshots(message)
+            self._queue.append(message)
+            if len(self._queue) > self._max_size:
+                self._drop_chunks()
+        self.stats["max_depth"] = max(self.stats["max_depth"], len(self._queue))
+        self._is_empty.clear()
+        self._has_messages.set()
+
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until all queued messages are sent.
+
+        Args:
+            timeout (float, optional): Maximum time to wait in seconds. Default: None
+
+        Returns:
+            bool: True if the queue was drained, False on timeout or if the sender stopped first.
+        """
+        try:
+            await asyncio.wait_for(self._is_empty.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return False
+        return not self._closed
+
+    async def close(self) -> None:
+        """Stop sending and discard the queued messages."""
+        self._closed = True
+        self._queue.clear()
+        self._is_empty.set()
+        # close() may be called by on_error from the writer task itself
+        if asyncio.current_task() is not self._writer_task:
+            self._writer_task.cancel()
+            try:
+                await self._writer_task
+            except asyncio.CancelledError:
+                pass
+        if self.stats["coalesced"] or self.stats["dropped"]:
+            logger.info(f"Send queue statistics for run {self._run_id}: {self.stats}")
+
+    def _coalesce(self, message: _Message) -> bool:
+        # Returns True if the message was merged into the queued messages
+        message_type = message.get("type")
+        if message_type == "message_chunk" and self._queue:
+            last = self._queue[-1]
+            data = cast(Dict[str, Any], message.get("data") or {})
+            last_data = cast(Dict[str, Any], last.get("data") or {})
+            if (
+                last.get("type") == "message_chunk"
+                and last_data.get("source") == data.get("source")
+                and isinstance(last_data.get("content"), str)
+                and isinstance(data.get("content"), str)
+            ):
+                # Copy so the merged chunk does not alias the message of the caller
+                content = last_data["content"] + data["content"]
+                self._queue[-1] = {**last, "data": {**last_data, "content": content}}
+                self.stats["coalesced"] += 1
+                return True
+        elif message_type == "system":
+            # Clients only keep the latest status
+            for i, queued in enumerate(self._queue):
+                if queued.get("type") == "system":
+                    del self._queue[i]
+                    self.stats["coalesced"] += 1
+                    break
+        return False
+
+    def _omit_screenshots(self, message: _Message) -> _Message:
+        data = message.get("data")
+        if message.get("type") != "message" or not isinstance(data, dict):
+            return message
+        data = cast(Dict[str, Any], data)
+        content = data.get("content")
+        if not isinstance(content, list):
+            return message
+        omitted = 0
+        new_content: List[Any] = []
+        for item in cast(List[Any], content):
+            url = (
+                cast(Dict[str, Any], item).get("url")
+                if isinstance(item, dict)
+                else None
+            )
+            if isinstance(url, str) and url.startswith("data:"):
+                new_content.append(SCREENSHOT_OMITTED)
+                omitted += 1
+            else:
+                new_content.append(item)
+        if not omitted:
+            return message
+        self.stats["screenshots_omitted"] += omitted
+        return {**message, "data": {**data, "content": new_content}}
+
+    def _drop_chunks(self) -> None:
+        excess = len(self._queue) - self._max_size
+        kept: Deque[_Message] = deque()
+        for queued in self._queue:
+            if excess > 0 and queued.get("type") == "message_chunk":
+                excess -= 1
+                self.stats["dropped"] += 1
+                continue
+            kept.append(queued)
+        self._queue = kept
+
+    async def _write(self) -> None:
+        while True:
+            await self._has_messages.wait()
+            while self._queue:
+                message = self._queue.popleft()
+                try:
+                    await self._websocket.send_json(message)
+                except Exception as e:
+                    self._closed = True
+                    self._queue.clear()
+                    self._is_empty.set()
+                    if self._on_error is not None:
+                        await self._on_error(e)
+                    return
+                self.stats["sent"] += 1
+            self._has_messages.clear()
+            self._is_empty.set()
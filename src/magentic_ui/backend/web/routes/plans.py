@@ -1,36 +1,44 @@
 # /api/plans routes
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from loguru import logger
 import os
 import yaml
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from pydantic import BaseModel
 
 from autogen_agentchat.messages import TextMessage, MultiModalMessage
-from autogen_core.models import ChatCompletionClient
 
 from ....learning import learn_plan_from_messages
 from ....learning.memory_provider import MemoryControllerProvider
+from ....model_client_registry import get_model_client_registry
 
 from ...datamodel import Plan
-from ..deps import get_db
+from ..deps import get_db, get_websocket_manager
+from ..managers import WebSocketManager
 from .sessions import list_session_runs
 
 router = APIRouter()
 
 
 @router.get("/")
-async def list_plans(user_id: str, db=Depends(get_db)) -> Dict:
-    """Get all plans for a user"""
-    response = db.get(Plan, filters={"user_id": user_id})
+async def list_plans(
+    user_id: str,
+    limit: Optional[int] = Query(default=None, ge=1),
+    offset: Optional[int] = Query(default=None, ge=0),
+    db=Depends(get_db),
+) -> Dict:
+    """Get the plans of a user, newest first"""
+    response = await db.aget(
+        Plan, filters={"user_id": user_id}, limit=limit, offset=offset
+    )
     return {"status": True, "data": response.data}
 
 
 @router.get("/{plan_id}")
 async def get_plan(plan_id: int, user_id: str, db=Depends(get_db)) -> Dict:
     """Get a specific plan"""
-    response = db.get(Plan, filters={"id": plan_id, "user_id": user_id})
+    response = await db.aget(Plan, filters={"id": plan_id, "user_id": user_id})
     if not response.status or not response.data:
         raise HTTPException(status_code=404, detail="Plan not found")
     return {"status": True, "data": response.data[0]}
@@ -42,7 +50,7 @@ async def create_plan(plan: Plan, db=Depends(get_db)) -> Dict:
     if not plan.user_id:
         raise HTTPException(status_code=400, detail="user_id is required")
 
-    plan_response = db.upsert(plan)
+    plan_response = await db.aupsert(plan)
     if not plan_response.status:
         raise HTTPException(status_code=400, detail=plan_response.message)
 
@@ -53,11 +61,13 @@ async def create_plan(plan: Plan, db=Depends(get_db)) -> Dict:
 async def update_plan(
     plan_id: int, user_id: str, plan: Plan, db=Depends(get_db)
 ) -> Dict:
-    existing_plan = db.get(Plan, filters={"id": plan_id, "user_id": user_id})
+    existing_plan = await db.aget(
+        Plan, filters={"id": plan_id, "user_id": user_id}, columns=["id"]
+    )
     if not existing_plan.status or not existing_plan.data:
         raise HTTPException(status_code=404, detail="Plan not found")
 
-    response = db.upsert(plan)
+    response = await db.aupsert(plan)
     if not response.status:
         raise HTTPException(status_code=400, detail=response.message)
     return {
@@ -70,7 +80,7 @@ async def update_plan(
 @router.delete("/{plan_id}")
 async def delete_plan(plan_id: int, user_id: str, db=Depends(get_db)) -> Dict:
     """Delete a specific plan"""
-    response = db.delete(Plan, filters={"id": plan_id, "user_id": user_id})
+    response = await db.adelete(Plan, filters={"id": plan_id, "user_id": user_id})
     if not response.status:
         raise HTTPException(status_code=400, detail=response.message)
     return {"status": True, "data": response.data}
@@ -86,6 +96,7 @@ class LearnPlanRequest(BaseModel):
 async def learn_plan(
     request: LearnPlanRequest,
     db=Depends(get_db),
+    ws_manager: WebSocketManager = Depends(get_websocket_manager),
 ):
     """Learn a plan from chat messages in a session"""
     session_id = request.session_id
@@ -112,19 +123,17 @@ async def learn_plan(
             # Fallback to orchestrator_client if plan_learning_client is not set
             plan_learning_config = config.get("orchestrator_client", None)
 
-        if plan_learning_config:
-            model_client = ChatCompletionClient.load_component(plan_learning_config)
-        else:
+        if not plan_learning_config:
             # If nothing was provided, use a safe default
-            model_client = ChatCompletionClient.load_component(
-                {
-                    "provider": "OpenAIChatCompletionClient",
-                    "config": {
-                        "model": "gpt-4o-2024-08-06",
-                    },
-                    "max_retries": 5,
-                }
-            )
+            plan_learning_config = {
+                "provider": "OpenAIChatCompletionClient",
+                "config": {
+                    "model": "gpt-4o-2024-08-06",
+                },
+                "max_retries": 5,
+            }
+        # Plan learning requests share the model clients of the teams
+        model_client = get_model_client_registry().get(plan_learning_config)
 
         # 1. Retrieve messages from database
         runs_result = await list_session_runs(
@@ -166,10 +175,16 @@ async def learn_plan(
                     )
                 )
             elif msg.config.get("type") == "MultiModalMessage":
+                # Images are saved as references to the blob store of the run
+                blob_store = ws_manager.get_blob_store(
+                    msg.user_id, msg.session_id, msg.run_id
+                )
                 messages_for_learning.append(
                     MultiModalMessage(
                         source=msg.config.get("source", ""),
-                        content=msg.config.get("content", []),
+                        content=blob_store.internalize_images(
+                            msg.config.get("content", [])
+                        ),
                     )
                 )
 
@@ -197,7 +212,7 @@ async def learn_plan(
         db_plan = Plan(
             task=plan.task, steps=steps_as_dicts, user_id=user_id, session_id=session_id
         )
-        response = db.upsert(db_plan)
+        response = await db.aupsert(db_plan)
 
         # Add the plan to memory
         try:
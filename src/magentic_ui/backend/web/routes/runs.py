@@ -2,10 +2,12 @@
 from typing import Dict
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
 from pydantic import BaseModel
 
 from ...datamodel import Message, Run, RunStatus, Session
-from ..deps import get_db
+from ..deps import get_db, get_websocket_manager
+from ..managers import WebSocketManager
 
 router = APIRouter()
 
@@ -19,50 +21,50 @@ class CreateRunRequest(BaseModel):
 async def create_run(
     request: CreateRunRequest,
     db=Depends(get_db),
+    ws_manager: WebSocketManager = Depends(get_websocket_manager),
 ) -> Dict:
     """Return the existing run for a session or create a new one"""
     # First check if session exists and belongs to user
-    session_response = db.get(
+    session_response = await db.aget(
         Session,
         filters={"id": request.session_id, "user_id": request.user_id},
-        return_json=False,
+        columns=["id"],
     )
     if not session_response.status or not session_response.data:
         raise HTTPException(status_code=404, detail="Session not found")
 
     # Get the latest run for this session
-    run_response = db.get(
+    run_response = await db.aget(
         Run,
         filters={"session_id": request.session_id},
-        return_json=False,
+        order="desc",
+        columns=["id"],
+        limit=1,
     )
-
-    if not run_response.status or not run_response.data:
-        # Create a new run if one doesn't exist
-        try:
-            run_response = db.upsert(
-                Run(
-                    session_id=request.session_id,
-                    status=RunStatus.CREATED,
-                    user_id=request.user_id,
-                    task=None,
-                    team_result=None,
-                ),
-                return_json=False,
-            )
-            if not run_response.status:
-                raise HTTPException(status_code=400, detail=run_response.message)
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e)) from e
-
-    # Return the run (either existing or newly created)
-    run = None
-    if isinstance(run_response.data, list):
-        # get the run with the latest created_at
-        run = max(run_response.data, key=lambda x: x.created_at)
-    else:
-        run = run_response.data
-    return {"status": run_response.status, "data": {"run_id": str(run.id)}}
+    if run_response.status and run_response.data:
+        return {"status": True, "data": {"run_id": str(run_response.data[0]["id"])}}
+
+    # Create a new run if one doesn't exist
+    try:
+        run_response = await db.aupsert(
+            Run(
+                session_id=request.session_id,
+                status=RunStatus.CREATED,
+                user_id=request.user_id,
+                task=None,
+                team_result=None,
+            ),
+            return_json=False,
+        )
+        if not run_response.status:
+            raise HTTPException(status_code=400, detail=run_response.message)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+    # Start creating the team now, so the run does not wait for it when it starts
+    await ws_manager.prewarm_team(run_response.data.id)
+    run_id = str(run_response.data.id)
+    return {"status": run_response.status, "data": {"run_id": run_id}}
 
 
 # We might want to add these endpoints:
@@ -71,7 +73,7 @@ async def create_run(
 @router.get("/{run_id}")
 async def get_run(run_id: int, db=Depends(get_db)) -> Dict:
     """Get run details including task and result"""
-    run = db.get(Run, filters={"id": run_id}, return_json=False)
+    run = await db.aget(Run, filters={"id": run_id}, return_json=False)
     if not run.status or not run.data:
         raise HTTPException(status_code=404, detail="Run not found")
 
@@ -81,8 +83,39 @@ async def get_run(run_id: int, db=Depends(get_db)) -> Dict:
 @router.get("/{run_id}/messages")
 async def get_run_messages(run_id: int, db=Depends(get_db)) -> Dict:
     """Get all messages for a run"""
-    messages = db.get(
+    messages = await db.aget(
         Message, filters={"run_id": run_id}, order="created_at asc", return_json=False
     )
 
     return {"status": True, "data": messages.data}
+
+
+@router.get("/{run_id}/blobs/{digest}")
+async def get_run_blob(
+    run_id: int,
+    digest: str,
+    db=Depends(get_db),
+    ws_manager: WebSocketManager = Depends(get_websocket_manager),
+) -> FileResponse:
+    """Get a blob, such as a screenshot, referenced by the messages of a run"""
+    run_response = await db.aget(
+        Run, filters={"id": run_id}, columns=["user_id", "session_id"]
+    )
+    if not run_response.status or not run_response.data:
+        raise HTTPException(status_code=404, detail="Run not found")
+
+    run = run_response.data[0]
+    blob_store = ws_manager.get_blob_store(run["user_id"], run["session_id"], run_id)
+    path = blob_store.path(digest)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Blob not found")
+
+    # Blobs are addressed by their content, so they can be cached forever
+    return FileResponse(
+        path,
+        media_type=blob_store.media_type(digest),
+        headers={
+            "Cache-Control": "public, max-age=31536000, immutable",
+            "ETag": f'"{digest}"',
+        },
+    )
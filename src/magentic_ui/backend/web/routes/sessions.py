@@ -1,42 +1,85 @@
 # api/routes/sessions.py
-from typing import Dict
+import json
+from collections import defaultdict
+from typing import AsyncGenerator, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from loguru import logger
 
 from ...datamodel import Message, Run, Session, RunStatus
-from ..deps import get_db
+from ..deps import get_db, get_websocket_manager
+from ..managers import WebSocketManager
 
 router = APIRouter()
 
+# Maximum number of messages read from the database at once
+MAX_PAGE_SIZE = 500
+
+# The run columns returned with the session history, leaving out the team state
+RUN_HISTORY_COLUMNS = [
+    "id",
+    "created_at",
+    "status",
+    "task",
+    "team_result",
+    "input_request",
+]
+
+
+async def _check_user_session(session_id: int, user_id: str, db) -> None:
+    """Raise a 404 if a session does not exist or belongs to another user"""
+    session = await db.aget(
+        Session, filters={"id": session_id, "user_id": user_id}, columns=["id"]
+    )
+    if not session.status:
+        raise HTTPException(
+            status_code=500, detail="Database error while fetching session"
+        )
+    if not session.data:
+        raise HTTPException(
+            status_code=404, detail="Session not found or access denied"
+        )
+
 
 @router.get("/")
-async def list_sessions(user_id: str, db=Depends(get_db)) -> Dict:
-    """List all sessions for a user"""
-    response = db.get(Session, filters={"user_id": user_id})
+async def list_sessions(
+    user_id: str,
+    limit: Optional[int] = Query(default=None, ge=1),
+    offset: Optional[int] = Query(default=None, ge=0),
+    db=Depends(get_db),
+) -> Dict:
+    """List the sessions of a user, newest first"""
+    response = await db.aget(
+        Session, filters={"user_id": user_id}, limit=limit, offset=offset
+    )
     return {"status": True, "data": response.data}
 
 
 @router.get("/{session_id}")
 async def get_session(session_id: int, user_id: str, db=Depends(get_db)) -> Dict:
     """Get a specific session"""
-    response = db.get(Session, filters={"id": session_id, "user_id": user_id})
+    response = await db.aget(Session, filters={"id": session_id, "user_id": user_id})
     if not response.status or not response.data:
         raise HTTPException(status_code=404, detail="Session not found")
     return {"status": True, "data": response.data[0]}
 
 
 @router.post("/")
-async def create_session(session: Session, db=Depends(get_db)) -> Dict:
+async def create_session(
+    session: Session,
+    db=Depends(get_db),
+    ws_manager: WebSocketManager = Depends(get_websocket_manager),
+) -> Dict:
     """Create a new session with an associated run"""
     # Create session
-    session_response = db.upsert(session)
+    session_response = await db.aupsert(session)
     if not session_response.status:
         raise HTTPException(status_code=400, detail=session_response.message)
 
     # Create associated run
     try:
-        run = db.upsert(
+        run = await db.aupsert(
             Run(
                 session_id=session.id,
                 status=RunStatus.CREATED,
@@ -49,6 +92,8 @@ async def create_session(session: Session, db=Depends(get_db)) -> Dict:
         if not run.status:
             # Clean up session if run creation failed
             raise HTTPException(status_code=400, detail=run.message)
+        # Start creating the team now, so the run does not wait for it when it starts
+        await ws_manager.prewarm_team(run.data.id)
         return {"status": True, "data": session_response.data}
     except Exception as e:
         # Clean up session if run creation failed
@@ -61,12 +106,14 @@ async def update_session(
 ) -> Dict:
     """Update an existing session"""
     # First verify the session belongs to user
-    existing = db.get(Session, filters={"id": session_id, "user_id": user_id})
+    existing = await db.aget(
+        Session, filters={"id": session_id, "user_id": user_id}, columns=["id"]
+    )
     if not existing.status or not existing.data:
         raise HTTPException(status_code=404, detail="Session not found")
 
     # Update the session
-    response = db.upsert(session)
+    response = await db.aupsert(session)
     if not response.status:
         raise HTTPException(status_code=400, detail=response.message)
 
@@ -81,7 +128,9 @@ async def update_session(
 async def delete_session(session_id: int, user_id: str, db=Depends(get_db)) -> Dict:
     """Delete a session and all its associated runs and messages"""
     # Delete the session
-    db.delete(filters={"id": session_id, "user_id": user_id}, model_class=Session)
+    await db.adelete(
+        filters={"id": session_id, "user_id": user_id}, model_class=Session
+    )
 
     return {"status": True, "message": "Session deleted successfully"}
 
@@ -92,70 +141,60 @@ async def list_session_runs(session_id: int, user_id: str, db=Depends(get_db)) -
 
     try:
         # 1. Verify session exists and belongs to user
-        session = db.get(
-            Session, filters={"id": session_id, "user_id": user_id}, return_json=False
-        )
-        if not session.status:
-            raise HTTPException(
-                status_code=500, detail="Database error while fetching session"
-            )
-        if not session.data:
-            raise HTTPException(
-                status_code=404, detail="Session not found or access denied"
-            )
+        await _check_user_session(session_id, user_id, db)
 
         # 2. Get ordered runs for session
-        runs = db.get(
-            Run, filters={"session_id": session_id}, order="asc", return_json=False
+        runs = await db.aget(
+            Run,
+            filters={"session_id": session_id},
+            order="asc",
+            columns=RUN_HISTORY_COLUMNS,
         )
         if not runs.status:
             raise HTTPException(
                 status_code=500, detail="Database error while fetching runs"
             )
 
-        # 3. Build response with messages per run
-        run_data = []
+        # 3. Get the messages of all runs in a single query and group them by run
+        messages_by_run: Dict[int, List[Message]] = defaultdict(list)
+        messages_error: Optional[str] = None
         if runs.data:  # It's ok to have no runs
-            for run in runs.data:
-                try:
-                    # Get messages for this specific run
-                    messages = db.get(
-                        Message,
-                        filters={"run_id": run.id},
-                        order="asc",
-                        return_json=False,
-                    )
-                    if not messages.status:
-                        logger.error(f"Failed to fetch messages for run {run.id}")
-                        # Continue processing other runs even if one fails
-                        messages.data = []
-
-                    run_data.append(
-                        {
-                            "id": str(run.id),
-                            "created_at": run.created_at,
-                            "status": run.status,
-                            "task": run.task,
-                            "team_result": run.team_result,
-                            "messages": messages.data or [],
-                            "input_request": getattr(run, "input_request", None),
-                        }
-                    )
-                except Exception as e:
-                    logger.error(f"Error processing run {run.id}: {str(e)}")
-                    # Include run with error state instead of failing entirely
-                    run_data.append(
-                        {
-                            "id": str(run.id),
-                            "created_at": run.created_at,
-                            "status": "ERROR",
-                            "task": run.task,
-                            "team_result": None,
-                            "messages": [],
-                            "error": f"Failed to process run: {str(e)}",
-                            "input_request": getattr(run, "input_request", None),
-                        }
-                    )
+            messages = await db.aget(
+                Message,
+                filters={"run_id": [run["id"] for run in runs.data]},
+                order="asc",
+                return_json=False,
+            )
+            if messages.status:
+                for message in messages.data:
+                    messages_by_run[message.run_id].append(message)
+            else:
+                logger.error(f"Failed to fetch messages for session {session_id}")
+                messages_error = messages.message
+
+        # 4. Build response with messages per run
+        run_data = []
+        for run in runs.data or []:
+            if messages_error is not None:
+                # Include runs with error state instead of failing entirely
+                run_data.append(
+                    {
+                        **run,
+                        "id": str(run["id"]),
+                        "status": "ERROR",
+                        "team_result": None,
+                        "messages": [],
+                        "error": f"Failed to process run: {messages_error}",
+                    }
+                )
+                continue
+            run_data.append(
+                {
+                    **run,
+                    "id": str(run["id"]),
+                    "messages": messages_by_run.get(run["id"], []),
+                }
+            )
 
         return {"status": True, "data": {"runs": run_data}}
 
@@ -166,3 +205,63 @@ async def list_session_runs(session_id: int, user_id: str, db=Depends(get_db)) -
         raise HTTPException(
             status_code=500, detail="Internal server error while fetching session data"
         ) from e
+
+
+@router.get("/{session_id}/messages")
+async def list_session_messages(
+    session_id: int,
+    user_id: str,
+    after: Optional[int] = None,
+    limit: int = Query(default=100, ge=1, le=MAX_PAGE_SIZE),
+    db=Depends(get_db),
+) -> Dict:
+    """Get a page of the messages of a session, oldest first.
+
+    Pass the returned `next_cursor` as `after` to get the next page. It is None on the
+    last page.
+    """
+    await _check_user_session(session_id, user_id, db)
+    messages = await db.aget_page(
+        Message, filters={"session_id": session_id}, after_id=after, limit=limit
+    )
+    if not messages.status:
+        raise HTTPException(
+            status_code=500, detail="Database error while fetching messages"
+        )
+    next_cursor = messages.data[-1].id if len(messages.data) == limit else None
+    return {"status": True, "data": messages.data, "next_cursor": next_cursor}
+
+
+@router.get("/{session_id}/messages/stream")
+async def stream_session_messages(
+    session_id: int,
+    user_id: str,
+    after: Optional[int] = None,
+    db=Depends(get_db),
+) -> StreamingResponse:
+    """Stream all messages of a session, oldest first, as newline delimited JSON.
+
+    Messages are read from the database one page at a time, so long histories can be
+    rendered as they arrive without holding them all in memory.
+    """
+    await _check_user_session(session_id, user_id, db)
+
+    async def message_lines() -> AsyncGenerator[str, None]:
+        cursor = after
+        while True:
+            messages = await db.aget_page(
+                Message,
+                filters={"session_id": session_id},
+                after_id=cursor,
+                limit=MAX_PAGE_SIZE,
+            )
+            if not messages.status:
+                logger.error(f"Failed to stream messages of session {session_id}")
+                return
+            for message in messages.data:
+                yield json.dumps(message.model_dump(mode="json")) + "\n"
+            if len(messages.data) < MAX_PAGE_SIZE:
+                return
+            cursor = messages.data[-1].id
+
+    return StreamingResponse(message_lines(), media_type="application/x-ndjson")
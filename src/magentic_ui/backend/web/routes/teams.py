@@ -12,14 +12,14 @@ router = APIRouter()
 @router.get("/")
 async def list_teams(user_id: str, db=Depends(get_db)) -> Dict:
     """List all teams for a user"""
-    response = db.get(Team, filters={"user_id": user_id})
+    response = await db.aget(Team, filters={"user_id": user_id})
     return {"status": True, "data": response.data}
 
 
 @router.get("/{team_id}")
 async def get_team(team_id: int, user_id: str, db=Depends(get_db)) -> Dict:
     """Get a specific team"""
-    response = db.get(Team, filters={"id": team_id, "user_id": user_id})
+    response = await db.aget(Team, filters={"id": team_id, "user_id": user_id})
     if not response.status or not response.data:
         raise HTTPException(status_code=404, detail="Team not found")
     return {"status": True, "data": response.data[0]}
@@ -28,7 +28,7 @@ async def get_team(team_id: int, user_id: str, db=Depends(get_db)) -> Dict:
 @router.post("/")
 async def create_team(team: Team, db=Depends(get_db)) -> Dict:
     """Create a new team"""
-    response = db.upsert(team)
+    response = await db.aupsert(team)
     if not response.status:
         raise HTTPException(status_code=400, detail=response.message)
     return {"status": True, "data": response.data}
@@ -37,5 +37,5 @@ async def create_team(team: Team, db=Depends(get_db)) -> Dict:
 @router.delete("/{team_id}")
 async def delete_team(team_id: int, user_id: str, db=Depends(get_db)) -> Dict:
     """Delete a team"""
-    db.delete(filters={"id": team_id, "user_id": user_id}, model_class=Team)
+    await db.adelete(filters={"id": team_id, "user_id": user_id}, model_class=Team)
     return {"status": True, "message": "Team deleted successfully"}
@@ -23,7 +23,7 @@ async def run_websocket(
 ):
     """WebSocket endpoint for run communication"""
     # Verify run exists and is in valid state
-    run_response = db.get(Run, filters={"id": run_id}, return_json=False)
+    run_response = await db.aget(Run, filters={"id": run_id}, columns=["id"])
     if not run_response.status or not run_response.data:
         logger.warning(f"Run not found: {run_id}")
         await websocket.close(code=4004, reason="Run not found")
@@ -65,12 +65,13 @@ async def run_websocket(
                         )
                     else:
                         logger.warning(f"Invalid start message format for run {run_id}")
-                        await websocket.send_json(
+                        await ws_manager.send_message(
+                            run_id,
                             {
                                 "type": "error",
                                 "error": "Invalid start message format",
                                 "timestamp": datetime.utcnow().isoformat(),
-                            }
+                            },
                         )
 
                 elif message.get("type") == "stop":
@@ -80,8 +81,9 @@ async def run_websocket(
                     break
 
                 elif message.get("type") == "ping":
-                    await websocket.send_json(
-                        {"type": "pong", "timestamp": datetime.utcnow().isoformat()}
+                    await ws_manager.send_message(
+                        run_id,
+                        {"type": "pong", "timestamp": datetime.utcnow().isoformat()},
                     )
 
                 elif message.get("type") == "input_response":
@@ -102,12 +104,13 @@ async def run_websocket(
                     await ws_manager.resume_run(run_id)
             except json.JSONDecodeError:
                 logger.warning(f"Invalid JSON received: {raw_message}")
-                await websocket.send_json(
+                await ws_manager.send_message(
+                    run_id,
                     {
                         "type": "error",
                         "error": "Invalid message format",
                         "timestamp": datetime.utcnow().isoformat(),
-                    }
+                    },
                 )
 
     except WebSocketDisconnect:
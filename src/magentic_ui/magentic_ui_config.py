@@ -80,6 +80,9 @@ class MagenticUIConfig(BaseModel):
         inside_docker (bool, optional): Whether to run inside a docker container. Default: True.
         browser_headless (bool, optional): Whether to run a headless browser or not. Default: False.
         browser_local (bool, optional): Whether to run a local browser (as opposed to dockerized browser). Default: False.
+        browser_settle_strategy (Literal["fixed", "adaptive"]): How the web surfer waits for the page after an action: a fixed sleep or until the network and DOM are idle. Default: "fixed".
+        browser_image_format (Literal["png", "jpeg", "webp"]): The encoding of the web surfer screenshots sent to models. The screenshots shown in the UI stay PNG. Default: "png".
+        browser_image_quality (int, optional): The quality from 1 to 100 of JPEG and WebP screenshots sent to models. Default: None, the default of Pillow.
     """
 
     model_client_configs: ModelClientConfigs = Field(default_factory=ModelClientConfigs)
@@ -111,3 +114,6 @@ class MagenticUIConfig(BaseModel):
     inside_docker: bool = True
     browser_headless: bool = False
     browser_local: bool = False
+    browser_settle_strategy: Literal["fixed", "adaptive"] = "fixed"
+    browser_image_format: Literal["png", "jpeg", "webp"] = "png"
+    browser_image_quality: Optional[int] = None
@@ -0,0 +1,262 @@
+import asyncio
+import json
+import weakref
+from contextlib import nullcontext
+from typing import (
+    Any,
+    AsyncContextManager,
+    AsyncGenerator,
+    Dict,
+    Mapping,
+    Optional,
+    Sequence,
+    Union,
+)
+
+from autogen_core import CancellationToken, ComponentModel
+from autogen_core.models import (
+    ChatCompletionClient,
+    CreateResult,
+    LLMMessage,
+    ModelCapabilities,  # type: ignore
+    ModelInfo,
+    RequestUsage,
+)
+from autogen_core.tools import Tool, ToolSchema
+from loguru import logger
+from pydantic import BaseModel
+
+
+class SharedChatCompletionClient(ChatCompletionClient):
+    """
+    A handle on a model client shared through a `ModelClientRegistry`.
+
+    Requests are forwarded to the shared client, so that its HTTP connections are
+    reused. Token usage is counted per handle, and closing a handle leaves the shared
+    client open, so agents can close their model client as usual.
+
+    Args:
+        client (ChatCompletionClient): The shared model client.
+        semaphore (asyncio.Semaphore, optional): Limits the concurrent requests of all handles. Default: None
+    """
+
+    def __init__(
+        self,
+        client: ChatCompletionClient,
+        semaphore: Optional[asyncio.Semaphore] = None,
+    ) -> None:
+        self._client = client
+        self._semaphore = semaphore
+        self._actual_usage = RequestUsage(prompt_tokens=0, completion_tokens=0)
+        self._total_usage = RequestUsage(prompt_tokens=0, completion_tokens=0)
+
+    def _request_slot(self) -> AsyncContextManager[Any]:
+        return self._semaphore if self._semaphore is not None else nullcontext()
+
+    def _add_usage(self, usage: RequestUsage) -> None:
+        self._actual_usage = RequestUsage(
+            prompt_tokens=self._actual_usage.prompt_tokens + usage.prompt_tokens,
+            completion_tokens=self._actual_usage.completion_tokens
+            + usage.completion_tokens,
+        )
+        self._total_usage = RequestUsage(
+            prompt_tokens=self._total_usage.prompt_tokens + usage.prompt_tokens,
+            completion_tokens=self._total_usage.completion_tokens
+            + usage.completion_tokens,
+        )
+
+    async def create(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        json_output: Optional[bool | type[BaseModel]] = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> CreateResult:
+        async with self._request_slot():
+            result = await self._client.create(
+                messages,
+                tools=tools,
+                json_output=json_output,
+                extra_create_args=extra_create_args,
+                cancellation_token=cancellation_token,
+            )
+        self._add_usage(result.usage)
+        return result
+
+    async def create_stream(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        json_output: Optional[bool | type[BaseModel]] = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> AsyncGenerator[Union[str, CreateResult], None]:
+        async with self._request_slot():
+            async for item in self._client.create_stream(
+                messages,
+                tools=tools,
+                json_output=json_output,
+                extra_create_args=extra_create_args,
+                cancellation_token=cancellation_token,
+            ):
+                if isinstance(item, CreateResult):
+                    self._add_usage(item.usage)
+                yield item
+
+    async def close(self) -> None:
+        # The shared client is closed by its registry
+        pass
+
+    def actual_usage(self) -> RequestUsage:
+        return self._actual_usage
+
+    def total_usage(self) -> RequestUsage:
+        return self._total_usage
+
+    def count_tokens(
+        self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []
+    ) -> int:
+        return self._client.count_tokens(messages, tools=tools)
+
+    def remaining_tokens(
+        self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []
+    ) -> int:
+        return self._client.remaining_tokens(messages, tools=tools)
+
+    @property
+    def capabilities(self) -> ModelCapabilities:  # type: ignore
+        return self._client.capabilities  # type: ignore
+
+    @property
+    def model_info(self) -> ModelInfo:
+        return self._client.model_info
+
+    def dump_component(self) -> ComponentModel:
+        return self._client.dump_component()
+
+
+class ModelClientRegistry:
+    """
+    Model clients shared by all the teams of the process.
+
+    Loading a model client creates a new HTTP client, so every team would otherwise
+    open its own connections and pay for new TLS handshakes. The registry loads one
+    client per distinct configuration and hands out `SharedChatCompletionClient`
+    handles on it, which can be closed independently.
+
+    Args:
+        max_concurrent_requests (int, optional): Maximum number of model requests in flight over all clients, unlimited if None. Default: None
+    """
+
+    def __init__(self, max_concurrent_requests: Optional[int] = None) -> None:
+        assert max_concurrent_requests is None or max_concurrent_requests > 0
+        self._clients: Dict[str, ChatCompletionClient] = {}
+        self._semaphore = (
+            asyncio.Semaphore(max_concurrent_requests)
+            if max_concurrent_requests is not None
+            else None
+        )
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    @staticmethod
+    def config_key(config: Union[ComponentModel, Dict[str, Any]]) -> str:
+        """
+        Normalize a model client configuration, so that equivalent configurations share
+        a client.
+
+        Args:
+            config (ComponentModel | Dict[str, Any]): The component configuration of the client.
+
+        Returns:
+            str: The normalized configuration.
+        """
+        model = (
+            config
+            if isinstance(config, ComponentModel)
+            else ComponentModel.model_validate(config)
+        )
+        # The description and label do not change the behavior of the client
+        dumped = model.model_dump(
+            mode="json", exclude_none=True, exclude={"description", "label"}
+        )
+        return json.dumps(dumped, sort_keys=True, default=str)
+
+    def get(
+        self, config: Union[ComponentModel, Dict[str, Any]]
+    ) -> ChatCompletionClient:
+        """
+        Get a handle on the client of a configuration, loading the client on first use.
+
+        Args:
+            config (ComponentModel | Dict[str, Any]): The component configuration of the client.
+
+        Returns:
+            ChatCompletionClient: A handle on the shared client.
+        """
+        key = self.config_key(config)
+        client = self._clients.get(key)
+        if client is None:
+            client = ChatCompletionClient.load_component(config)
+            self._clients[key] = client
+        return SharedChatCompletionClient(client, self._semaphore)
+
+    async def close(self) -> None:
+        """Close all the shared clients."""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            try:
+                await client.close()
+            except Exception as e:
+                logger.warning(f"Error closing model client: {e}")
+
+
+# HTTP clients are bound to the event loop that created them, so keep one registry per
+# loop
+_registries: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, ModelClientRegistry]" = weakref.WeakKeyDictionary()
+
+
+def get_model_client_registry() -> ModelClientRegistry:
+    """
+    Get the model client registry shared by all teams running on the current event loop.
+
+    Returns:
+        ModelClientRegistry: The shared registry.
+    """
+    loop = asyncio.get_running_loop()
+    registry = _registries.get(loop)
+    if registry is None:
+        registry = ModelClientRegistry()
+        _registries[loop] = registry
+    return registry
+
+
+def init_model_client_registry(
+    max_concurrent_requests: Optional[int] = None,
+) -> ModelClientRegistry:
+    """
+    Create the model client registry of the current event loop, e.g. when the app starts.
+
+    Args:
+        max_concurrent_requests (int, optional): Maximum number of model requests in flight over all teams, unlimited if None. Default: None
+
+    Returns:
+        ModelClientRegistry: The shared registry.
+    """
+    loop = asyncio.get_running_loop()
+    assert loop not in _registries, "The model client registry already exists"
+    registry = ModelClientRegistry(max_concurrent_requests)
+    _registries[loop] = registry
+    return registry
+
+
+async def close_model_client_registry() -> None:
+    """Close the model clients of the current event loop, if any were loaded."""
+    registry = _registries.pop(asyncio.get_running_loop(), None)
+    if registry is not None:
+        await registry.close()
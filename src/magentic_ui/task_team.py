@@ -18,9 +18,11 @@ from .approval_guard import (
 from .input_func import InputFuncType, make_agentchat_input_func
 from .learning.memory_provider import MemoryControllerProvider
 from .magentic_ui_config import MagenticUIConfig, ModelClientConfigs
+from .model_client_registry import ModelClientRegistry
 from .teams import GroupChat, RoundRobinGroupChat
 from .teams.orchestrator.orchestrator_config import OrchestratorConfig
 from .tools.playwright.browser import get_browser_resource_config
+from .tools.search_cache import SEARCH_CACHE_SUBDIR
 from .types import RunPaths
 from .utils import get_internal_urls
 
@@ -30,6 +32,7 @@ async def get_task_team(
     input_func: Optional[InputFuncType] = None,
     *,
     paths: RunPaths,
+    model_client_registry: Optional[ModelClientRegistry] = None,
 ) -> GroupChat | RoundRobinGroupChat:
     """
     Creates and returns a GroupChat team with specified configuration.
@@ -37,6 +40,7 @@ async def get_task_team(
     Args:
         magentic_ui_config (MagenticUIConfig, optional): Magentic UI configuration for team. Default: None.
         paths (RunPaths): Paths for internal and external run directories.
+        model_client_registry (ModelClientRegistry, optional): Registry to share the model clients through, each agent loads its own clients if None. Default: None.
 
     Returns:
         GroupChat | RoundRobinGroupChat: An instance of GroupChat or RoundRobinGroupChat with the specified agents and configuration.
@@ -49,11 +53,13 @@ async def get_task_team(
         is_action_guard: bool = False,
     ) -> ChatCompletionClient:
         if model_client_config is None:
-            return ChatCompletionClient.load_component(
+            model_client_config = (
                 ModelClientConfigs.get_default_client_config()
                 if not is_action_guard
                 else ModelClientConfigs.get_default_action_guard_config()
             )
+        if model_client_registry is not None:
+            return model_client_registry.get(model_client_config)
         return ChatCompletionClient.load_component(model_client_config)
 
     if not magentic_ui_config.inside_docker:
@@ -91,6 +97,12 @@ async def get_task_team(
         )
     )
 
+    # Search results are shared between sessions, so they are cached under the workspace root
+    workspace_root = (
+        paths.internal_root_dir
+        if magentic_ui_config.inside_docker
+        else paths.external_root_dir
+    )
     orchestrator_config = OrchestratorConfig(
         cooperative_planning=magentic_ui_config.cooperative_planning,
         autonomous_execution=magentic_ui_config.autonomous_execution,
@@ -98,6 +110,7 @@ async def get_task_team(
         plan=magentic_ui_config.plan,
         model_context_token_limit=magentic_ui_config.model_context_token_limit,
         do_bing_search=magentic_ui_config.do_bing_search,
+        search_cache_dir=str(workspace_root / SEARCH_CACHE_SUBDIR),
         retrieve_relevant_plans=magentic_ui_config.retrieve_relevant_plans,
         memory_controller_key=magentic_ui_config.memory_controller_key,
         allow_follow_up_input=magentic_ui_config.allow_follow_up_input,
@@ -123,6 +136,9 @@ async def get_task_team(
         start_page=None,
         use_action_guard=True,
         to_save_screenshots=False,
+        settle_strategy=magentic_ui_config.browser_settle_strategy,
+        model_image_format=magentic_ui_config.browser_image_format,
+        model_image_quality=magentic_ui_config.browser_image_quality,
     )
 
     user_proxy: DummyUserProxy | MetadataUserProxy | UserProxyAgent
@@ -186,7 +202,12 @@ async def get_task_team(
             ),
         )
     with ApprovalGuardContext.populate_context(approval_guard):
-        web_surfer = WebSurfer.from_config(websurfer_config)
+        web_surfer = WebSurfer.from_config(
+            websurfer_config,
+            model_client=get_model_client(websurfer_model_client)
+            if model_client_registry is not None
+            else None,
+        )
     if websurfer_loop_team:
         # simplified team of only the web surfer
         team = RoundRobinGroupChat(
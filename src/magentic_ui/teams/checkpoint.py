@@ -0,0 +1,78 @@
+from typing import Any, Dict, List, Optional, cast
+
+# A delta is a JSON-serializable dictionary with one of the following forms:
+#   {"$set": value}                               replaces the value
+#   {"$append": [items]}                          extends a list
+#   {"$dict": {key: delta}, "$del": [keys]}       updates and removes keys of a dictionary
+
+
+def compute_state_delta(old: Any, new: Any) -> Optional[Dict[str, Any]]:
+    """
+    Compute the changes needed to turn one team state into another.
+
+    Lists that only grew, like chat histories, are stored as the appended items, so the
+    size of the delta depends on what changed rather than on the size of the state.
+
+    Args:
+        old (Any): The previous state.
+        new (Any): The current state.
+
+    Returns:
+        Dict[str, Any] | None: The delta, or None if the states are equal.
+    """
+    if old is new:
+        return None
+    if isinstance(old, dict) and isinstance(new, dict):
+        old_dict = cast(Dict[str, Any], old)
+        new_dict = cast(Dict[str, Any], new)
+        changes: Dict[str, Any] = {}
+        for key, value in new_dict.items():
+            if key not in old_dict:
+                changes[key] = {"$set": value}
+                continue
+            delta = compute_state_delta(old_dict[key], value)
+            if delta is not None:
+                changes[key] = delta
+        removed = [key for key in old_dict if key not in new_dict]
+        if not changes and not removed:
+            return None
+        result: Dict[str, Any] = {"$dict": changes}
+        if removed:
+            result["$del"] = removed
+        return result
+    if isinstance(old, list) and isinstance(new, list):
+        old_list = cast(List[Any], old)
+        new_list = cast(List[Any], new)
+        if len(new_list) > len(old_list) and new_list[: len(old_list)] == old_list:
+            return {"$append": new_list[len(old_list) :]}
+        return None if old_list == new_list else {"$set": new_list}
+    if isinstance(old, (dict, list)):
+        # Replaced with a value of another type
+        return {"$set": new}
+    if type(old) is type(new) and old == new:
+        return None
+    return {"$set": new}
+
+
+def apply_state_delta(state: Any, delta: Dict[str, Any]) -> Any:
+    """
+    Apply a delta created by `compute_state_delta` to a state.
+    The given state is not modified.
+
+    Args:
+        state (Any): The state the delta was computed against.
+        delta (Dict[str, Any]): The delta to apply.
+
+    Returns:
+        Any: The updated state.
+    """
+    if "$set" in delta:
+        return delta["$set"]
+    if "$append" in delta:
+        return [*state, *delta["$append"]]
+    result = dict(state)
+    for key in delta.get("$del", []):
+        result.pop(key, None)
+    for key, value in delta.get("$dict", {}).items():
+        result[key] = apply_state_delta(result.get(key), value)
+    return result
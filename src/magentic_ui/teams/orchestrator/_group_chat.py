@@ -2,6 +2,7 @@ import logging
 from typing import Callable, List, Dict, Any, Mapping, AsyncGenerator, Sequence
 import json
 import asyncio
+import time
 from pydantic import BaseModel
 import inspect
 
@@ -22,6 +23,7 @@ from autogen_agentchat.teams._group_chat._events import GroupChatTermination
 from ._orchestrator import Orchestrator
 from ...teams.orchestrator.orchestrator_config import OrchestratorConfig
 from ...types import CheckpointEvent
+from ..checkpoint import compute_state_delta
 from ...learning.memory_provider import MemoryControllerProvider
 
 trace_logger = logging.getLogger(TRACE_LOGGER_NAME)
@@ -80,6 +82,7 @@ class GroupChat(BaseGroupChat, Component[GroupChatConfig]):
         self.is_paused = False
         self._message_factory = MessageFactory()
         self._memory_provider = memory_provider
+        self._full_checkpoint_requested = False
 
     def _create_group_chat_manager_factory(
         self,
@@ -118,14 +121,119 @@ class GroupChat(BaseGroupChat, Component[GroupChatConfig]):
         task: str | BaseChatMessage | Sequence[BaseChatMessage] | None = None,
         cancellation_token: CancellationToken | None = None,
     ) -> AsyncGenerator[BaseAgentEvent | BaseChatMessage | TaskResult, None]:
-        async for message in super().run_stream(
-            task=task, cancellation_token=cancellation_token
-        ):
-            yield message
+        """
+        Run the team and yield its messages, interleaved with `CheckpointEvent`s of the team state.
+
+        Checkpoints are throttled by `checkpoint_interval` and `checkpoint_max_messages` of the
+        orchestrator config, and always taken after the final `TaskResult` and when the stream
+        ends. Messages not checkpointed yet are also checkpointed once the team produced no
+        message for `checkpoint_interval`, e.g. while it waits for the user to approve a plan.
+        The first checkpoint of a run, and every `checkpoint_snapshot_every`-th after it, is a
+        full snapshot of the state. The others only contain the changes since the previous
+        checkpoint. Use `checkpoint` to save the state when stopping the stream early, and
+        `request_full_checkpoint` when a checkpoint could not be saved.
+        """
+        config = self._orchestrator_config
+        last_state: Mapping[str, Any] | None = None
+        last_checkpoint_time = time.monotonic()
+        messages_since_checkpoint = 0
+        deltas_since_snapshot = 0
+
+        async def take_checkpoint() -> CheckpointEvent | None:
+            nonlocal last_state, last_checkpoint_time, messages_since_checkpoint
+            nonlocal deltas_since_snapshot
             partial_state = await self._get_partial_state()
-            yield CheckpointEvent(
-                source="orchestrator", state=json.dumps(partial_state)
-            )  # type: ignore
+            messages_since_checkpoint = 0
+            last_checkpoint_time = time.monotonic()
+            snapshot_due = (
+                deltas_since_snapshot >= config.checkpoint_snapshot_every
+                or self._full_checkpoint_requested
+            )
+            checkpoint: CheckpointEvent | None = None
+            if last_state is None or snapshot_due:
+                self._full_checkpoint_requested = False
+                checkpoint = CheckpointEvent(
+                    source="orchestrator", state=json.dumps(partial_state)
+                )
+                deltas_since_snapshot = 0
+            else:
+                delta = compute_state_delta(last_state, partial_state)
+                if delta is not None:
+                    checkpoint = CheckpointEvent(
+                        source="orchestrator", state=json.dumps(delta), delta=True
+                    )
+                    deltas_since_snapshot += 1
+            last_state = partial_state
+            return checkpoint
+
+        stream = super().run_stream(task=task, cancellation_token=cancellation_token)
+        next_message: (
+            asyncio.Task[BaseAgentEvent | BaseChatMessage | TaskResult] | None
+        ) = None
+        try:
+            while True:
+                next_message = asyncio.ensure_future(anext(stream))
+                if messages_since_checkpoint > 0:
+                    wait_time = config.checkpoint_interval - (
+                        time.monotonic() - last_checkpoint_time
+                    )
+                    done, _ = await asyncio.wait(
+                        {next_message}, timeout=max(wait_time, 0)
+                    )
+                    if not done:
+                        # The team is waiting, e.g. for user input
+                        checkpoint = await take_checkpoint()
+                        if checkpoint is not None:
+                            yield checkpoint
+                try:
+                    message = await next_message
+                except StopAsyncIteration:
+                    break
+                yield message
+                messages_since_checkpoint += 1
+                if (
+                    isinstance(message, TaskResult)
+                    or messages_since_checkpoint >= config.checkpoint_max_messages
+                    or time.monotonic() - last_checkpoint_time
+                    >= config.checkpoint_interval
+                ):
+                    checkpoint = await take_checkpoint()
+                    if checkpoint is not None:
+                        yield checkpoint
+            if messages_since_checkpoint > 0:
+                checkpoint = await take_checkpoint()
+                if checkpoint is not None:
+                    yield checkpoint
+        finally:
+            if next_message is not None and not next_message.done():
+                next_message.cancel()
+                try:
+                    await next_message
+                except (asyncio.CancelledError, StopAsyncIteration):
+                    pass
+            await stream.aclose()
+
+    async def checkpoint(self) -> CheckpointEvent:
+        """
+        Take a full snapshot of the team state.
+
+        The checkpoints of `run_stream` are throttled, so the last one may not include the
+        latest messages when a run is stopped.
+
+        Returns:
+            CheckpointEvent: The checkpoint.
+        """
+        partial_state = await self._get_partial_state()
+        return CheckpointEvent(source="orchestrator", state=json.dumps(partial_state))
+
+    def request_full_checkpoint(self) -> None:
+        """
+        Make the next checkpoint of `run_stream` a full snapshot of the team state.
+
+        Deltas are computed against the previous checkpoint, so they cannot be replayed
+        once a checkpoint was lost.
+        """
+        self._full_checkpoint_requested = True
 
     async def pause(self) -> None:  # TODO: can this be implemented using events?
         orchestrator = await self._runtime.try_get_underlying_agent_instance(
@@ -45,6 +45,7 @@ from ...learning.memory_provider import MemoryControllerProvider
 from ...types import HumanInputFormat, Plan
 from ...utils import dict_to_str, thread_to_context
 from ...tools.bing_search import get_bing_search_results
+from ...tools.search_cache import get_search_cache
 from ...teams.orchestrator.orchestrator_config import OrchestratorConfig
 from ._prompts import (
     ORCHESTRATOR_SYSTEM_MESSAGE_PLANNING,
@@ -539,11 +540,22 @@ class Orchestrator(BaseGroupChatManager):
                 "Searching online for information...",
                 metadata={"internal": "no", "type": "progress_message"},
             )
+            # Opening the cache the first time indexes its directory
+            search_cache = (
+                await asyncio.to_thread(
+                    get_search_cache,
+                    self._config.search_cache_dir,
+                    ttl_seconds=self._config.search_cache_ttl,
+                )
+                if self._config.search_cache_dir
+                else None
+            )
             bing_search_results = await get_bing_search_results(
                 query,
                 max_pages=3,
                 max_tokens_per_page=5000,
                 timeout_seconds=35,
+                cache=search_cache,
             )
             if bing_search_results.combined_content != "":
                 bing_results_progress = f"Reading through {len(bing_search_results.page_contents)} web pages..."
@@ -557,6 +569,34 @@ class Orchestrator(BaseGroupChatManager):
             trace_logger.exception(f"Error in doing bing search: {e}")
             return None
 
+    async def _reset_websurfer_screenshot(self) -> None:
+        """Make the web surfer send its next screenshot, even if the screen has not changed.
+
+        The web surfer sends a note in place of screenshots of an unchanged screen, which
+        refers to its previous responses. Call this when they are dropped from the history.
+        """
+        if self._web_agent_topic not in self._participant_names:
+            return
+        try:
+            web_surfer_container = (
+                await self._runtime.try_get_underlying_agent_instance(
+                    AgentId(
+                        type=self._participant_name_to_topic_type[
+                            self._web_agent_topic
+                        ],
+                        key=self.id.key,
+                    )
+                )
+            )
+            web_surfer = getattr(web_surfer_container, "_agent", None)
+            forget_reported_screenshot = getattr(
+                web_surfer, "forget_reported_screenshot", None
+            )
+            if callable(forget_reported_screenshot):
+                forget_reported_screenshot()
+        except Exception as e:
+            trace_logger.exception(f"Error in resetting web surfer screenshot: {e}")
+
     async def _get_websurfer_page_info(self) -> None:
         """Get the page information from the web surfer agent."""
         try:
@@ -882,6 +922,7 @@ class Orchestrator(BaseGroupChatManager):
             for m in self._state.message_history
             if m.source not in ["user", self._user_agent_topic]
         ]
+        await self._reset_websurfer_screenshot()
 
         ledger_message = TextMessage(
             content=self._get_task_ledger_full_prompt(
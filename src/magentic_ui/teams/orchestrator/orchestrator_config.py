@@ -18,12 +18,17 @@ class OrchestratorConfig(BaseModel):
         saved_facts (str, optional): Previously persisted facts.
         allowed_websites (List[str], optional): List of websites that are permitted.
         do_bing_search (bool): Flag to determine if Bing search should be used to come up with information for the plan. Default: False.
+        search_cache_dir (str, optional): Directory to cache Bing search results and extracted pages in. No caching if None. Default: None.
+        search_cache_ttl (float): Time in seconds cached search results and pages stay valid. Default: 3600.
         final_answer_prompt (str, optional): Prompt for the final answer. Should be a string that can be formatted with the {task} variable.
         model_context_token_limit (int, optional): The maximum number of tokens that that can be sent to the model in a single request.
         retrieve_relevant_plans (Literal["never", "hint", "reuse"], optional): Determines if the orchestrator should retrieve relevant plans from memory. Default: `never`.
         memory_controller_key (str, optional): the key to retrieve the memory_controller for a particular user.
         max_replans (int, optional): Maximum number of replans allowed. Default: 3.
         no_overwrite_of_task (bool, optional): Whether to prevent the orchestrator from overwriting the task. Default: False.
+        checkpoint_interval (float, optional): Minimum time in seconds between two team state checkpoints, unless `checkpoint_max_messages` messages were produced in between. Messages not checkpointed yet are checkpointed after this time without new messages. Default: 2.
+        checkpoint_max_messages (int, optional): Maximum number of messages between two team state checkpoints. Default: 10.
+        checkpoint_snapshot_every (int, optional): Number of incremental checkpoints after which a full snapshot of the team state is checkpointed again. Default: 20.
     """
 
     cooperative_planning: bool = True
@@ -36,9 +41,14 @@ class OrchestratorConfig(BaseModel):
     saved_facts: Optional[str] = None
     allowed_websites: Optional[List[str]] = None
     do_bing_search: bool = False
+    search_cache_dir: Optional[str] = None
+    search_cache_ttl: float = 3600
     final_answer_prompt: Optional[str] = None
     model_context_token_limit: Optional[int] = None
     retrieve_relevant_plans: Literal["never", "hint", "reuse"] = "never"
     memory_controller_key: Optional[str] = None
     max_replans: Union[int, None] = 3
     no_overwrite_of_task: bool = False
+    checkpoint_interval: float = 2
+    checkpoint_max_messages: int = 10
+    checkpoint_snapshot_every: int = 20
@@ -2,6 +2,7 @@ from .playwright import (
     PlaywrightController,
     BrowserState,
     InteractiveRegion,
+    PageSnapshot,
     VisualViewport,
     domrectangle_from_dict,
 )
@@ -13,6 +14,7 @@ __all__ = [
     "PlaywrightController",
     "BrowserState",
     "InteractiveRegion",
+    "PageSnapshot",
     "VisualViewport",
     "domrectangle_from_dict",
     "get_bing_search_results",
@@ -1,11 +1,13 @@
 from urllib.parse import quote_plus
-from playwright.async_api import async_playwright
 from urllib.parse import urlparse
 import asyncio
-import tiktoken
 from dataclasses import dataclass
+from typing import Any
 from loguru import logger
 from ..tools import PlaywrightController
+from .search_browser_pool import SearchBrowserPool, get_search_browser_pool
+from .search_cache import SearchCache
+from .token_counter import truncate_to_tokens
 
 
 @dataclass
@@ -16,31 +18,25 @@ class BingSearchResults:
     combined_content: str
 
 
-async def extract_page_markdown(url: str) -> tuple[str, str]:
+async def extract_page_markdown(
+    url: str, browser_pool: SearchBrowserPool | None = None
+) -> tuple[str, str]:
     """Extract markdown content from a given URL.
 
     Args:
         url (str): The URL to extract content from
+        browser_pool (SearchBrowserPool, optional): The browser pool to open the page in. Default: the shared pool of the current event loop
 
     Returns:
         A tuple containing:
             - str: The URL
             - str: The markdown content extracted from the page
     """
+    if browser_pool is None:
+        browser_pool = get_search_browser_pool()
     try:
-        async with async_playwright() as p:
-            launch_args = ["--disable-extensions", "--disable-file-system"]
-            browser = await p.chromium.launch(
-                headless=True, env={}, args=launch_args, chromium_sandbox=True
-            )
-            context = await browser.new_context(
-                accept_downloads=False,  # Disable downloads
-                permissions=[],  # No additional permissions
-            )
-
+        async with browser_pool.page() as page:
             controller = PlaywrightController()
-
-            page = await context.new_page()
             try:
                 await page.goto(url)
                 await asyncio.sleep(1)
@@ -48,9 +44,6 @@ async def extract_page_markdown(url: str) -> tuple[str, str]:
             except Exception as e:
                 logger.error(f"Error extracting content: {e}")
                 markdown = "Error extracting content"
-
-            await context.close()
-            await browser.close()
             return url, markdown
     except Exception as e:
         logger.error(f"Error extracting content: {e}")
@@ -62,34 +55,64 @@ async def get_bing_search_results(
     max_pages: int = 3,
     timeout_seconds: int = 10,
     max_tokens_per_page: int = 10000,
+    browser_pool: SearchBrowserPool | None = None,
+    cache: SearchCache | None = None,
 ) -> BingSearchResults:
     """Get the Bing search results for a given query.
 
-    WARNING: This function spawns multiple browser local playwright instances which may consume a lot of resources and can cause risks.
+    WARNING: This function opens pages in a local headless playwright browser which may consume a lot of resources and can cause risks.
+    The browser is shared between searches through a `SearchBrowserPool`.
 
     Args:
         query (str): The search query to use
         max_pages (int, optional): Maximum number of pages to extract. Default: 3
         timeout_seconds (int, optional): Maximum time in seconds to wait for search results. Default: 10
         max_tokens_per_page (int, optional): Maximum number of tokens to extract from each page. Default: 10000
+        browser_pool (SearchBrowserPool, optional): The browser pool to open pages in. Default: the shared pool of the current event loop
+        cache (SearchCache, optional): Cache for the search results and the extracted pages. Pages found in the cache are not opened again. Default: None
 
     Returns:
         BingSearchResults: Contains search results markdown, links, and extracted content
     """
+    if browser_pool is None:
+        browser_pool = get_search_browser_pool()
     search_results: str = ""
     links: list[dict[str, str]] = []
     page_contents: dict[str, str] = {}
     combined_content: str = ""
 
-    try:
-        result = await asyncio.wait_for(
-            extract_page_markdown(
-                f"https://www.bing.com/search?q={quote_plus(query)}&FORM=QBLH"
-            ),
-            timeout=timeout_seconds,
-        )
-        _, search_results = result
+    # The cache entries of the extracted pages, to reuse their token limited snippets
+    cached_pages: dict[str, dict[str, Any]] = {}
+
+    # The cache reads and writes files, so it is used from a worker thread
+    async def extract_page(url: str) -> tuple[str, str]:
+        if cache is not None:
+            cached_page = await asyncio.to_thread(cache.get_page, url)
+            if cached_page is not None:
+                cached_pages[url] = cached_page
+                return url, cached_page["markdown"]
+        url, content = await extract_page_markdown(url, browser_pool)
+        if cache is not None and content != "Error extracting content":
+            await asyncio.to_thread(cache.set_page, url, content)
+            cached_pages[url] = {"markdown": content, "snippets": {}}
+        return url, content
+
+    async def limit_tokens(url: str, content: str) -> str:
+        if max_tokens_per_page == -1:
+            return content
+        cached_page = cached_pages.get(url)
+        if cached_page is not None:
+            snippet = cached_page["snippets"].get(str(max_tokens_per_page))
+            if snippet is not None:
+                return snippet
+        limited_content = truncate_to_tokens(content, max_tokens_per_page)
+        if cache is not None and cached_page is not None:
+            await asyncio.to_thread(
+                cache.set_page_snippet, url, max_tokens_per_page, limited_content
+            )
+        return limited_content
 
+    try:
         # Extract links from markdown
         def extract_links(markdown_text: str) -> list[dict[str, str]]:
             """Extract links from markdown text.
@@ -141,11 +164,32 @@ async def get_bing_search_results(
                             links.append({"display_text": display_text, "url": url})
             return links
 
-        links = extract_links(search_results)
+        cached_results = (
+            await asyncio.to_thread(cache.get_search_results, query)
+            if cache is not None
+            else None
+        )
+        if cached_results is not None:
+            search_results = cached_results["search_results"]
+            links = cached_results["links"]
+        else:
+            result = await asyncio.wait_for(
+                extract_page_markdown(
+                    f"https://www.bing.com/search?q={quote_plus(query)}&FORM=QBLH",
+                    browser_pool,
+                ),
+                timeout=timeout_seconds,
+            )
+            _, search_results = result
+            links = extract_links(search_results)
+            if cache is not None and links:
+                await asyncio.to_thread(
+                    cache.set_search_results, query, search_results, links
+                )
 
         # Extract content from first 5 links in parallel
         first_few_urls = [link["url"] for link in links[:max_pages]]
-        tasks = [extract_page_markdown(url) for url in first_few_urls]
+        tasks = [extract_page(url) for url in first_few_urls]
         extracted_contents = await asyncio.gather(*tasks, return_exceptions=True)
 
         # Create a dictionary mapping URLs to their content, handling any failed extractions
@@ -163,13 +207,7 @@ async def get_bing_search_results(
         if page_contents:
             combined_content = "Search Results for " + query + "\n\n"
             for url, content in page_contents.items():
-                if max_tokens_per_page == -1:
-                    token_limited_content = content
-                else:
-                    tokenizer = tiktoken.encoding_for_model("gpt-4o")
-                    tokens = tokenizer.encode(content)
-                    limited_content = tokenizer.decode(tokens[:max_tokens_per_page])
-                    token_limited_content = limited_content
+                token_limited_content = await limit_tokens(url, content)
                 combined_content += f"Page: {url}\n{token_limited_content}\n\n"
 
     except asyncio.TimeoutError as e:
@@ -181,13 +219,7 @@ async def get_bing_search_results(
                 "Search Results for " + query + " (Partial results due to timeout)\n\n"
             )
             for url, content in page_contents.items():
-                if max_tokens_per_page == -1:
-                    token_limited_content = content
-                else:
-                    tokenizer = tiktoken.encoding_for_model("gpt-4o")
-                    tokens = tokenizer.encode(content)
-                    limited_content = tokenizer.decode(tokens[:max_tokens_per_page])
-                    token_limited_content = limited_content
+                token_limited_content = await limit_tokens(url, content)
                 combined_content += f"Page: {url}\n{token_limited_content}\n\n"
         elif not search_results:
             # If we got absolutely nothing, return empty results
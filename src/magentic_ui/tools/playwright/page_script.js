@@ -1,4 +1,4 @@
-var WebSurfer = WebSurfer || (function () {
+var WebSurfer = (typeof WebSurfer !== "undefined" && WebSurfer.version === "__PAGE_SCRIPT_VERSION__") ? WebSurfer : (function () {
     /**
      * WebSurfer - A JavaScript module for analyzing web page content and interactive elements
      *
@@ -43,6 +43,222 @@ var WebSurfer = WebSurfer || (function () {
         return !!(element.offsetWidth || element.offsetHeight || element.getClientRects().length);
     };
 
+    let inertCursors = ["auto", "default", "none", "text", "vertical-text", "not-allowed", "no-drop"];
+
+    /**
+     * Incremental change tracking
+     *
+     * A MutationObserver and a few event listeners record what changed since the
+     * interactive rects were last computed:
+     * - rectsStale: anything changed, the cached rect map can not be reused
+     * - fullRescan: cursor-based candidates must be rediscovered for the whole document
+     * - dirtyRoots: subtrees whose cursor-based candidates must be rediscovered
+     * - changeVersion: incremented on every change, so callers can tell whether
+     *   the page may look different since they last looked at it
+     * Scrolling only invalidates geometry, so the candidates are kept.
+     */
+    const MAX_DIRTY_ROOTS = 50;
+    let changeTrackingInstalled = false;
+    let changeTrackingAvailable = false;
+    let rectsStale = true;
+    let fullRescan = true;
+    let dirtyRoots = new Set();
+    let lastMutationTime = (typeof performance !== "undefined") ? performance.now() : 0;
+    let changeVersion = 0;
+    let cachedRects = null;
+    let cursorCandidates = null;
+    let mutationObserver = null;
+    let observedShadowRoots = new WeakSet();
+    const observerOptions = { childList: true, subtree: true, attributes: true, characterData: true };
+
+    let markRectsStale = function () {
+        rectsStale = true;
+        changeVersion++;
+    };
+
+    let markFullRescan = function () {
+        rectsStale = true;
+        fullRescan = true;
+        changeVersion++;
+    };
+
+    let onMutations = function (mutations) {
+        for (const mutation of mutations) {
+            // Ignore the labels we assign ourselves
+            if (mutation.type === "attributes" && mutation.attributeName &&
+                mutation.attributeName.toLowerCase() === "__elementid") {
+                continue;
+            }
+            rectsStale = true;
+            lastMutationTime = performance.now();
+            changeVersion++;
+
+            let target = mutation.target;
+            if (target.nodeType !== Node.ELEMENT_NODE) {
+                target = target.parentElement;
+            }
+            if (!target) {
+                fullRescan = true;
+                continue;
+            }
+            // Shadow trees are always walked in full by gatherAllElements
+            if (target.getRootNode() !== document) {
+                continue;
+            }
+            // New or changed stylesheets can change the cursor of any element
+            if (target === document.documentElement || target === document.body ||
+                (document.head && document.head.contains(target))) {
+                fullRescan = true;
+                continue;
+            }
+            for (const node of mutation.addedNodes) {
+                if (node.nodeName === "STYLE" || node.nodeName === "LINK") {
+                    fullRescan = true;
+                }
+            }
+            dirtyRoots.add(target);
+        }
+        if (dirtyRoots.size > MAX_DIRTY_ROOTS) {
+            fullRescan = true;
+        }
+    };
+
+    let observeShadowRoot = function (shadowRoot) {
+        if (mutationObserver && !observedShadowRoots.has(shadowRoot)) {
+            observedShadowRoots.add(shadowRoot);
+            mutationObserver.observe(shadowRoot, observerOptions);
+        }
+    };
+
+    let installChangeTracking = function () {
+        if (changeTrackingInstalled) {
+            return;
+        }
+        changeTrackingInstalled = true;
+        if (typeof MutationObserver === "undefined" || typeof document === "undefined") {
+            return;
+        }
+        try {
+            mutationObserver = new MutationObserver(onMutations);
+            mutationObserver.observe(document, observerOptions);
+
+            // Geometry changes
+            window.addEventListener("scroll", markRectsStale, { capture: true, passive: true });
+            for (const type of ["focusin", "focusout", "input", "change", "load"]) {
+                document.addEventListener(type, markRectsStale, { capture: true, passive: true });
+            }
+            // Changes that can reveal or hide elements without touching the DOM (e.g. :hover menus, media queries)
+            window.addEventListener("resize", markFullRescan, { passive: true });
+            for (const type of ["mouseover", "mouseout", "transitionend", "animationend"]) {
+                document.addEventListener(type, markFullRescan, { capture: true, passive: true });
+            }
+            changeTrackingAvailable = true;
+        } catch (e) {
+            console.warn("Error installing change tracking:", e);
+        }
+    };
+
+    /**
+     * Milliseconds elapsed since the DOM was last mutated (ignoring our own labels)
+     * @returns {number} Time since the last mutation, or -1 if mutations are not tracked
+     */
+    let getMillisSinceLastMutation = function () {
+        if (!changeTrackingAvailable) {
+            return -1;
+        }
+        return performance.now() - lastMutationTime;
+    };
+
+    /**
+     * Counter of the changes to the DOM, scroll position, focus and size of the page (ignoring our own labels)
+     * @returns {number} A number that changes whenever the page may look different, or -1 if changes are not tracked
+     */
+    let getChangeVersion = function () {
+        if (!changeTrackingAvailable) {
+            return -1;
+        }
+        return changeVersion;
+    };
+
+    /**
+     * Returns the element that introduces a cursor suggesting interactivity for the given node
+     * @param {Element} node - Element to check
+     * @returns {Element|null} The outermost element with the same cursor, or null
+     */
+    let getCursorCandidate = function (node) {
+        if (node.disabled || !isVisible(node)) {
+            return null;
+        }
+
+        // Cursor is default, or does not suggest interactivity
+        let cursor = getCursor(node);
+        if (inertCursors.indexOf(cursor) >= 0) {
+            return null;
+        }
+
+        // Move up to the first instance of this cursor change
+        let parent = node.parentNode;
+        while (parent && getCursor(parent) == cursor) {
+            node = parent;
+            parent = node.parentNode;
+        }
+        return node;
+    };
+
+    let scanCursorCandidates = function (root, candidates) {
+        if (root.nodeType === Node.ELEMENT_NODE) {
+            let candidate = getCursorCandidate(root);
+            if (candidate) {
+                candidates.add(candidate);
+            }
+        }
+        let nodeList = root.querySelectorAll("*");
+        for (let i = 0; i < nodeList.length; i++) {
+            let candidate = getCursorCandidate(nodeList[i]);
+            if (candidate) {
+                candidates.add(candidate);
+            }
+        }
+    };
+
+    /**
+     * Gets the elements whose cursor implies interactivity, only rescanning the
+     * subtrees that changed since the previous call when possible
+     * @returns {Array} Candidate elements in document order
+     */
+    let getCursorCandidates = function () {
+        if (cursorCandidates === null || fullRescan || !changeTrackingAvailable) {
+            cursorCandidates = new Set();
+            scanCursorCandidates(document, cursorCandidates);
+        }
+        else if (dirtyRoots.size > 0) {
+            for (const candidate of Array.from(cursorCandidates)) {
+                if (!candidate.isConnected) {
+                    cursorCandidates.delete(candidate);
+                    continue;
+                }
+                for (const root of dirtyRoots) {
+                    if (root.contains(candidate)) {
+                        cursorCandidates.delete(candidate);
+                        break;
+                    }
+                }
+            }
+            for (const root of dirtyRoots) {
+                if (root.isConnected) {
+                    scanCursorCandidates(root, cursorCandidates);
+                }
+            }
+            // Keep document order so labels are assigned as in a full scan
+            cursorCandidates = new Set(Array.from(cursorCandidates).sort(function (a, b) {
+                return (a.compareDocumentPosition(b) & Node.DOCUMENT_POSITION_FOLLOWING) ? -1 : 1;
+            }));
+        }
+        fullRescan = false;
+        dirtyRoots.clear();
+        return Array.from(cursorCandidates);
+    };
+
     /**
      * Finds interactive elements in the regular DOM (excluding Shadow DOM)
      * Looks for elements that are:
@@ -54,8 +270,8 @@ var WebSurfer = WebSurfer || (function () {
      */
     let getInteractiveElementsNoShaddow = function () {
         let results = []
+        let seen = new Set();
         let roles = ["scrollbar", "searchbox", "slider", "spinbutton", "switch", "tab", "treeitem", "button", "checkbox", "gridcell", "link", "menuitem", "menuitemcheckbox", "menuitemradio", "option", "progressbar", "radio", "textbox", "combobox", "menu", "tree", "treegrid", "grid", "listbox", "radiogroup", "widget"];
-        let inertCursors = ["auto", "default", "none", "text", "vertical-text", "not-allowed", "no-drop"];
 
         // Get the main interactive elements
         let nodeList = document.querySelectorAll("input, select, textarea, button, [href], [onclick], [contenteditable], [tabindex]:not([tabindex='-1'])");
@@ -65,6 +281,7 @@ var WebSurfer = WebSurfer || (function () {
                 continue;
             }
             results.push(nodeList[i]);
+            seen.add(nodeList[i]);
         }
 
         // Anything not already included that has a suitable role
@@ -74,38 +291,28 @@ var WebSurfer = WebSurfer || (function () {
             if (nodeList[i].disabled || !isVisible(nodeList[i])) {
                 continue;
             }
-            if (results.indexOf(nodeList[i]) == -1) {
+            if (!seen.has(nodeList[i])) {
                 let role = nodeList[i].getAttribute("role");
                 if (roles.indexOf(role) > -1) {
                     results.push(nodeList[i]);
+                    seen.add(nodeList[i]);
                 }
             }
         }
 
         // Any element that changes the cursor to something implying interactivity
-        nodeList = document.querySelectorAll("*");
-        for (let i = 0; i < nodeList.length; i++) {
-            let node = nodeList[i];
+        let candidates = getCursorCandidates();
+        for (let i = 0; i < candidates.length; i++) {
+            let node = candidates[i];
+            // Cached candidates may have been disabled or hidden since they were found
             if (node.disabled || !isVisible(node)) {
                 continue;
             }
 
-            // Cursor is default, or does not suggest interactivity
-            let cursor = getCursor(node);
-            if (inertCursors.indexOf(cursor) >= 0) {
-                continue;
-            }
-
-            // Move up to the first instance of this cursor change
-            let parent = node.parentNode;
-            while (parent && getCursor(parent) == cursor) {
-                node = parent;
-                parent = node.parentNode;
-            }
-
             // Add the node if it is new
-            if (results.indexOf(node) == -1) {
+            if (!seen.has(node)) {
                 results.push(node);
+                seen.add(node);
             }
         }
 
@@ -132,6 +339,7 @@ var WebSurfer = WebSurfer || (function () {
             // Add shadow roots to stack
             currentRoot.querySelectorAll("*").forEach(el => {
                 if (el.shadowRoot && el.shadowRoot.mode === "open") {
+                    observeShadowRoot(el.shadowRoot);
                     stack.push(el.shadowRoot);
                 }
             });
@@ -197,7 +405,7 @@ var WebSurfer = WebSurfer || (function () {
     /**
      * Assigns unique identifiers to interactive elements
      * @param {Array} elements - Array of elements to label
-     * @returns {Array} Updated array of interactive elements
+     * @returns {Array} The labelled interactive elements
      */
     let labelElements = function (elements) {
         for (let i = 0; i < elements.length; i++) {
@@ -205,7 +413,8 @@ var WebSurfer = WebSurfer || (function () {
                 elements[i].setAttribute("__elementId", "" + (nextLabel++));
             }
         }
-        return getInteractiveElements();
+        // Labelling does not change which elements are interactive, so there is no need to search again
+        return elements;
     };
 
     /**
@@ -343,9 +552,17 @@ var WebSurfer = WebSurfer || (function () {
      * - Tag names
      * - Scrollability
      *
+     * The result is cached and returned as is while nothing on the page changed.
+     *
      * @returns {Object} Map of element IDs to their properties
      */
     let getInteractiveRects = function () {
+        installChangeTracking();
+        if (changeTrackingAvailable && !rectsStale && cachedRects !== null) {
+            return cachedRects;
+        }
+        rectsStale = false;
+
         let elements = labelElements(getInteractiveElements());
         let results = {};
         for (let i = 0; i < elements.length; i++) {
@@ -403,6 +620,7 @@ var WebSurfer = WebSurfer || (function () {
 
             results[key] = record;
         }
+        cachedRects = results;
         return results;
     };
 
@@ -612,12 +830,35 @@ var WebSurfer = WebSurfer || (function () {
         return textInView;
     };
 
+    /**
+     * Gathers everything the agent observes about the page in a single call
+     * so that callers need only one round trip per step
+     * @returns {Object} Interactive rects, viewport, focused element, visible text and metadata
+     */
+    let getPageSnapshot = function () {
+        return {
+            "title": document.title,
+            "interactive_rects": getInteractiveRects(),
+            "visual_viewport": getVisualViewport(),
+            "focused_rect_id": getFocusedElementId(),
+            "visible_text": getVisibleText(),
+            "page_metadata": getPageMetadata()
+        };
+    };
+
+    // Start recording changes as soon as the script is installed
+    installChangeTracking();
+
     // Public API
     return {
+        version: "__PAGE_SCRIPT_VERSION__",
         getInteractiveRects: getInteractiveRects,
         getVisualViewport: getVisualViewport,
         getFocusedElementId: getFocusedElementId,
         getPageMetadata: getPageMetadata,
         getVisibleText: getVisibleText,
+        getPageSnapshot: getPageSnapshot,
+        getMillisSinceLastMutation: getMillisSinceLastMutation,
+        getChangeVersion: getChangeVersion,
     };
 })();
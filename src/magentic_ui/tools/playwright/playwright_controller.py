@@ -5,6 +5,9 @@ import random
 import json
 import logging
 import hashlib
+import time
+import weakref
+from dataclasses import dataclass, field
 from typing import (
     Any,
     Awaitable,
@@ -21,15 +24,25 @@ import warnings
 from playwright.async_api import Locator
 from playwright.async_api import Error as PlaywrightError
 from playwright.async_api import TimeoutError as PlaywrightTimeoutError
-from playwright.async_api import Download, Page, BrowserContext
+from playwright.async_api import (
+    BrowserContext,
+    Download,
+    FloatRect,
+    Frame,
+    Page,
+    Request,
+)
 from .utils.animation_utils import AnimationUtilsPlaywright
+from .utils.page_script_utils import ensure_page_script, get_page_script
 from .utils.webpage_text_utils import WebpageTextUtilsPlaywright
 from ..url_status_manager import UrlStatusManager
 
 from .types import (
     InteractiveRegion,
+    PageSnapshot,
     VisualViewport,
     interactiveregion_from_dict,
+    pagesnapshot_from_dict,
     visualviewport_from_dict,
 )
 
@@ -69,6 +82,49 @@ CUA_KEY_TO_PLAYWRIGHT_KEY = {
 }
 
 
+# How to wait for the page after an action:
+#  - "fixed": sleep for `sleep_after_action` seconds
+#  - "adaptive": wait until there are no in-flight requests and no DOM mutations for `settle_idle_time` seconds
+SettleStrategy = Literal["fixed", "adaptive"]
+
+# Encodings Playwright can capture screenshots in
+ScreenshotFormat = Literal["png", "jpeg"]
+
+# Long-lived requests that never finish and should not count as network activity
+_SETTLE_IGNORED_RESOURCE_TYPES = {"eventsource", "websocket"}
+# Time (in secs) after which an in-flight request, like a long-poll or a stalled fetch,
+# no longer keeps the network from being idle
+_SETTLE_NETWORK_IDLE_WINDOW = 2
+
+
+@dataclass
+class _PageReadiness:
+    """
+    Per-page bookkeeping used to avoid re-running `on_new_page` for every controller call.
+
+    Attributes:
+        listeners_attached (bool): Whether the download/navigation listeners and the init script were registered on the page.
+        document_ready (bool): Whether the setup pass has run for the document currently loaded in the page.
+        inflight_requests (Dict[Request, float]): The `time.monotonic()` timestamps of when the network requests of the current document that have not finished yet started.
+        last_network_activity (float): The `time.monotonic()` timestamp of the last request start or end.
+        navigations (int): The number of times the main frame navigated since the listeners were attached.
+        screenshot (bytes, optional): The last screenshot of the page, reused while the page has not changed.
+        screenshot_key (Tuple[Any, ...], optional): The navigation count, URL and page script change version when `screenshot` was taken, followed by its capture options.
+        screenshot_time (float): The `time.monotonic()` timestamp of when `screenshot` was taken.
+    """
+
+    listeners_attached: bool = False
+    document_ready: bool = False
+    inflight_requests: Dict[Request, float] = field(
+        default_factory=dict[Request, float]
+    )
+    last_network_activity: float = 0.0
+    navigations: int = 0
+    screenshot: Optional[bytes] = None
+    screenshot_key: Optional[Tuple[Any, ...]] = None
+    screenshot_time: float = 0.0
+
+
 class PlaywrightController:
     """
     A helper class to allow Playwright to interact with web pages to perform actions such as clicking, filling, and scrolling.
@@ -85,6 +141,10 @@ class PlaywrightController:
         single_tab_mode (bool, optional): If True, forces navigation to happen in the same tab rather than opening new tabs/windows. Default: False
         url_status_manager (UrlStatusManager, optional): A list of websites to allow or deny. If None, all websites are allowed.
         url_validation_callback (callable, optional): A callback function to validate URLs. It should return a tuple of (str, bool) where the str is a failure string and bool indicates if the URL is allowed.
+        settle_strategy (Literal["fixed", "adaptive"], optional): How to wait for the page after an action. "fixed" sleeps for `sleep_after_action` seconds, "adaptive" waits for the network and the DOM to be idle. Default: "fixed"
+        settle_idle_time (int | float, optional): Amount of time (in secs) without requests or DOM mutations after which the page is considered settled in "adaptive" mode. Default: 0.5
+        settle_timeout (int | float, optional): Maximum amount of time (in secs) to wait for the page to settle in "adaptive" mode. Default: 5
+        screenshot_cache_ttl (int | float, optional): Amount of time (in secs) a screenshot is reused for while the page has not navigated, scrolled or changed its DOM. Changes that do not touch the DOM, like videos or canvases, are only picked up after this time. 0 disables the cache. Default: 2
     """
 
     def __init__(
@@ -102,6 +162,10 @@ class PlaywrightController:
         url_validation_callback: Optional[
             Callable[[str], Awaitable[Tuple[str, bool]]]
         ] = None,
+        settle_strategy: SettleStrategy = "fixed",
+        settle_idle_time: Union[int, float] = 0.5,
+        settle_timeout: Union[int, float] = 5,
+        screenshot_cache_ttl: Union[int, float] = 2,
     ) -> None:
         """
         Initialize the PlaywrightController.
@@ -112,6 +176,10 @@ class PlaywrightController:
         assert viewport_height > 0
         assert viewport_width > 0
         assert timeout_load > 0
+        assert settle_strategy in ("fixed", "adaptive")
+        assert settle_idle_time >= 0
+        assert settle_timeout > 0
+        assert screenshot_cache_ttl >= 0
 
         self.animate_actions = animate_actions
         self.downloads_folder = downloads_folder
@@ -124,7 +192,10 @@ class PlaywrightController:
         self.single_tab_mode = single_tab_mode
         self._url_status_manager = url_status_manager
         self._url_validation_callback = url_validation_callback
-        self._page_script: str = ""
+        self._settle_strategy: SettleStrategy = settle_strategy
+        self._settle_idle_time = settle_idle_time
+        self._settle_timeout = settle_timeout
+        self._screenshot_cache_ttl = screenshot_cache_ttl
         self._markdown_converter: Optional[Any] | None = None
 
         # Create animation utils instance
@@ -132,17 +203,108 @@ class PlaywrightController:
         # Use animation utils for cursor position tracking
         self.last_cursor_position = self._animation.last_cursor_position
 
-        # Read page_script
-        with open(
-            os.path.join(os.path.abspath(os.path.dirname(__file__)), "page_script.js"),
-            "rt",
-            encoding="utf-8",
-        ) as fh:
-            self._page_script = fh.read()
-
         # Initialize WebpageTextUtils
         self._text_utils = WebpageTextUtilsPlaywright()
 
+        # Pages that have already been set up, invalidated when the main frame navigates
+        self._page_readiness: "weakref.WeakKeyDictionary[Page, _PageReadiness]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._setup_passes = 0
+        self._skipped_setup_passes = 0
+        self._screenshots_taken = 0
+        self._screenshot_cache_hits = 0
+
+    @property
+    def page_readiness_stats(self) -> Dict[str, int]:
+        """
+        Counters describing how often the per-document page setup ran or was skipped.
+
+        Returns:
+            Dict[str, int]: A dictionary with the keys `setup_passes` and `skipped_setup_passes`.
+        """
+        return {
+            "setup_passes": self._setup_passes,
+            "skipped_setup_passes": self._skipped_setup_passes,
+        }
+
+    @property
+    def screenshot_stats(self) -> Dict[str, int]:
+        """
+        Counters describing how often a screenshot was captured or reused from the cache.
+
+        Returns:
+            Dict[str, int]: A dictionary with the keys `screenshots_taken` and `screenshot_cache_hits`.
+        """
+        return {
+            "screenshots_taken": self._screenshots_taken,
+            "screenshot_cache_hits": self._screenshot_cache_hits,
+        }
+
+    def _get_page_readiness(self, page: Page) -> _PageReadiness:
+        readiness = self._page_readiness.get(page)
+        if readiness is None:
+            readiness = _PageReadiness()
+            self._page_readiness[page] = readiness
+        return readiness
+
+    def invalidate_page(self, page: Page) -> None:
+        """
+        Mark the document loaded in the page as not set up, so the next controller call runs `on_new_page` again.
+        The cached screenshot of the page is dropped.
+
+        Args:
+            page (Page): The Playwright page object.
+        """
+        readiness = self._page_readiness.get(page)
+        if readiness is not None:
+            readiness.document_ready = False
+            readiness.navigations += 1
+            readiness.screenshot = None
+
+    async def _attach_page_listeners(self, page: Page) -> None:
+        """
+        Register the handlers and init script that persist for the lifetime of the page.
+        These survive navigations, so they are only added once per page.
+
+        Args:
+            page (Page): The Playwright page object.
+        """
+        readiness = self._get_page_readiness(page)
+        if readiness.listeners_attached:
+            return
+        readiness.listeners_attached = True
+
+        # Hold only a weak reference to the page in the handler to keep the registry weak-keyed
+        page_ref = weakref.ref(page)
+
+        def _on_frame_navigated(frame: Frame) -> None:
+            tracked_page = page_ref()
+            if tracked_page is not None and frame == tracked_page.main_frame:
+                self.invalidate_page(tracked_page)
+                # Requests of the previous document may never report finishing
+                readiness.inflight_requests.clear()
+
+        def _on_request_started(request: Request) -> None:
+            if request.resource_type in _SETTLE_IGNORED_RESOURCE_TYPES:
+                return
+            readiness.last_network_activity = time.monotonic()
+            readiness.inflight_requests[request] = readiness.last_network_activity
+
+        def _on_request_done(request: Request) -> None:
+            if request.resource_type in _SETTLE_IGNORED_RESOURCE_TYPES:
+                return
+            readiness.inflight_requests.pop(request, None)
+            readiness.last_network_activity = time.monotonic()
+
+        page.on("framenavigated", _on_frame_navigated)
+        page.on("request", _on_request_started)
+        page.on("requestfinished", _on_request_done)
+        page.on("requestfailed", _on_request_done)
+        if self._download_handler is not None:
+            page.on("download", self._download_handler)
+        await page.add_init_script(script=get_page_script())
+
     async def on_new_page(self, page: Page) -> None:
         """
         Handle actions to perform on a new page.
@@ -187,7 +349,7 @@ class PlaywrightController:
             # Visit the page if permission has been given
             await self.visit_page(page, tentative_url)
 
-        page.on("download", self._download_handler)  # type: ignore
+        await self._attach_page_listeners(page)
 
         # check if there is a need to resize the viewport
         page_viewport_size = page.viewport_size
@@ -200,22 +362,72 @@ class PlaywrightController:
                 await page.set_viewport_size(
                     {"width": self.viewport_width, "height": self.viewport_height}
                 )
-        await page.add_init_script(
-            path=os.path.join(
-                os.path.abspath(os.path.dirname(__file__)), "page_script.js"
-            )
-        )
+        self._setup_passes += 1
+        self._get_page_readiness(page).document_ready = True
 
     async def _ensure_page_ready(self, page: Page) -> None:
         """
         Ensure the page is properly configured before performing any action.
+        The setup in `on_new_page` only runs once per document; it is re-run after the main frame navigates.
 
         Args:
             page (Page): The Playwright page object.
         """
         assert page is not None
+        readiness = self._page_readiness.get(page)
+        if readiness is not None and readiness.document_ready:
+            self._skipped_setup_passes += 1
+            return
         await self.on_new_page(page)
 
+    async def _wait_for_page_to_settle(
+        self, page: Page, fixed_wait: Union[int, float]
+    ) -> None:
+        """
+        Wait for the page to settle after an action.
+
+        In "fixed" mode this sleeps for `fixed_wait` seconds. In "adaptive" mode it waits until
+        there have been no in-flight requests and no DOM mutations for `settle_idle_time` seconds,
+        giving up after `settle_timeout` seconds. Requests in flight for longer than the
+        network idle window, like long-polls, are not waited for.
+
+        Args:
+            page (Page): The Playwright page object.
+            fixed_wait (int | float): The amount of time (in secs) to sleep in "fixed" mode.
+        """
+        if self._settle_strategy == "fixed":
+            if fixed_wait > 0:
+                await page.wait_for_timeout(fixed_wait * 1000)
+            return
+
+        idle_ms = self._settle_idle_time * 1000
+        deadline = time.monotonic() + self._settle_timeout
+        poll_interval = min(0.1, max(self._settle_idle_time / 2, 0.01))
+        while time.monotonic() < deadline:
+            readiness = self._page_readiness.get(page)
+            now = time.monotonic()
+            network_idle = readiness is None or (
+                (now - readiness.last_network_activity) * 1000 >= idle_ms
+                and all(
+                    now - started >= _SETTLE_NETWORK_IDLE_WINDOW
+                    for started in readiness.inflight_requests.values()
+                )
+            )
+            if network_idle:
+                try:
+                    dom_idle_ms = await page.evaluate(
+                        "typeof WebSurfer !== 'undefined' && WebSurfer.getMillisSinceLastMutation ? "
+                        "WebSurfer.getMillisSinceLastMutation() : -1"
+                    )
+                except Exception:
+                    # The page is navigating, the execution context was replaced
+                    dom_idle_ms = 0
+                # -1 means DOM mutations are not tracked in this document
+                if dom_idle_ms < 0 or dom_idle_ms >= idle_ms:
+                    return
+            await asyncio.sleep(poll_interval)
+        logger.debug("Page did not settle within the settle timeout, continuing")
+
     async def get_current_url_title(self, page: Page) -> Tuple[str, str]:
         """
         Get the current URL and title of the page.
@@ -236,18 +448,103 @@ class PlaywrightController:
             logger.warning("Error getting current URL and title, returning unknown")
             return "Unknown", "Unknown"
 
-    async def get_screenshot(self, page: Page, path: str | None = None) -> bytes:
+    async def get_page_state(self, page: Page) -> Optional[Tuple[int, str, int]]:
+        """
+        Get a key of the current state of the page, which changes when the main frame
+        navigates, or the page script records a change to the DOM, the scroll position, the
+        focus, the form inputs or the size of the page.
+
+        Args:
+            page (Page): The Playwright page object.
+
+        Returns:
+            Tuple[int, str, int] | None: The navigation count, URL and change version of the page, or None if changes to the page cannot be tracked.
+        """
+        readiness = self._get_page_readiness(page)
+        navigations = readiness.navigations
+        try:
+            if await ensure_page_script(page):
+                # A new script counts the changes from zero again
+                readiness.screenshot = None
+            version = await page.evaluate("WebSurfer.getChangeVersion();")
+        except Exception:
+            return None
+        if not isinstance(version, (int, float)) or version < 0:
+            return None
+        if readiness.navigations != navigations:
+            return None
+        return (navigations, page.url, int(version))
+
+    async def _get_screenshot_cache_key(
+        self, page: Page, options: Tuple[Any, ...]
+    ) -> Optional[Tuple[Any, ...]]:
+        """
+        Get the key under which a screenshot of the page in its current state is cached.
+
+        Args:
+            page (Page): The Playwright page object.
+            options (Tuple[Any, ...]): The capture options of the screenshot.
+
+        Returns:
+            Tuple[Any, ...] | None: The state of the page, see `get_page_state`, followed by `options`, or None if changes to the page cannot be tracked.
+        """
+        if self._screenshot_cache_ttl <= 0:
+            return None
+        page_state = await self.get_page_state(page)
+        if page_state is None:
+            return None
+        return (*page_state, *options)
+
+    async def get_screenshot(
+        self,
+        page: Page,
+        path: str | None = None,
+        format: ScreenshotFormat = "png",
+        quality: Optional[int] = None,
+        clip: Optional[FloatRect] = None,
+    ) -> bytes:
         """
         Capture a screenshot of the current page.
 
+        The screenshot is reused for `screenshot_cache_ttl` seconds as long as the page has not
+        navigated, scrolled or changed its DOM.
+
         Args:
             page (Page): The Playwright page object.
             path (str, optional): The file path to save the screenshot. If None, the screenshot will be returned as bytes. Default: None
+            format (Literal["png", "jpeg"], optional): The encoding of the screenshot. JPEG is much smaller and faster to encode for large viewports. Default: "png"
+            quality (int, optional): The quality from 0 to 100 of a JPEG screenshot, ignored for PNG. Default: None, the default of the browser
+            clip (FloatRect, optional): The area of the viewport to capture, with the keys `x`, `y`, `width` and `height`. Default: None, the whole viewport
         """
         await self._ensure_page_ready(page)
+        readiness = self._get_page_readiness(page)
+        if format != "jpeg":
+            quality = None
+        options = (
+            format,
+            quality,
+            None if clip is None else tuple(sorted(clip.items())),
+        )
+        # Read the key before capturing, a change during the capture then invalidates it
+        cache_key = await self._get_screenshot_cache_key(page, options)
+        if (
+            cache_key is not None
+            and readiness.screenshot is not None
+            and readiness.screenshot_key == cache_key
+            and time.monotonic() - readiness.screenshot_time
+            < self._screenshot_cache_ttl
+        ):
+            self._screenshot_cache_hits += 1
+            if path is not None:
+                with open(path, "wb") as fh:
+                    fh.write(readiness.screenshot)
+            return readiness.screenshot
+
+        captured_at = time.monotonic()
         try:
-            screenshot = await page.screenshot(path=path, timeout=15000)
-            return screenshot
+            screenshot = await page.screenshot(
+                path=path, type=format, quality=quality, clip=clip, timeout=15000
+            )
         except Exception:
             logger.warning(
                 "Screenshot failed, page might not be loaded, stopping page and taking screenshot again"
@@ -255,8 +552,15 @@ class PlaywrightController:
             # stop the page
             await page.evaluate("window.stop()")
             # try again
-            screenshot = await page.screenshot(path=path, timeout=15000)
-            return screenshot
+            screenshot = await page.screenshot(
+                path=path, type=format, quality=quality, clip=clip, timeout=15000
+            )
+        self._screenshots_taken += 1
+        if cache_key is not None:
+            readiness.screenshot = screenshot
+            readiness.screenshot_key = cache_key
+            readiness.screenshot_time = captured_at
+        return screenshot
 
     async def sleep(self, page: Page, duration: Union[int, float]) -> None:
         """
@@ -281,10 +585,7 @@ class PlaywrightController:
         """
         await self._ensure_page_ready(page)
         # Read the regions from the DOM
-        try:
-            await page.evaluate(self._page_script)
-        except Exception:
-            pass
+        await ensure_page_script(page)
         result = cast(
             Dict[str, Dict[str, Any]],
             await page.evaluate("WebSurfer.getInteractiveRects();"),
@@ -310,10 +611,7 @@ class PlaywrightController:
             VisualViewport: The visual viewport of the page.
         """
         await self._ensure_page_ready(page)
-        try:
-            await page.evaluate(self._page_script)
-        except Exception:
-            pass
+        await ensure_page_script(page)
         return visualviewport_from_dict(
             await page.evaluate("WebSurfer.getVisualViewport();")
         )
@@ -329,10 +627,7 @@ class PlaywrightController:
             str: The ID of the focused element.
         """
         await self._ensure_page_ready(page)
-        try:
-            await page.evaluate(self._page_script)
-        except Exception:
-            pass
+        await ensure_page_script(page)
         result = await page.evaluate("WebSurfer.getFocusedElementId();")
         return str(result)
 
@@ -347,14 +642,43 @@ class PlaywrightController:
             Dict[str, Any]: A dictionary of page metadata.
         """
         await self._ensure_page_ready(page)
-        try:
-            await page.evaluate(self._page_script)
-        except Exception:
-            pass
+        await ensure_page_script(page)
         result = await page.evaluate("WebSurfer.getPageMetadata();")
         assert isinstance(result, dict)
         return cast(Dict[str, Any], result)
 
+    async def snapshot_page(
+        self, page: Page, get_screenshot: bool = True
+    ) -> PageSnapshot:
+        """
+        Retrieve the interactive regions, visual viewport, focused element, visible text and metadata
+        of the web page in a single evaluation, taking the screenshot concurrently.
+
+        Args:
+            page (Page): The Playwright page object.
+            get_screenshot (bool, optional): Whether to include a screenshot in the snapshot. Default: True
+
+        Returns:
+            PageSnapshot: The observed state of the page.
+        """
+        await self._ensure_page_ready(page)
+        await ensure_page_script(page)
+
+        async def _evaluate_snapshot() -> Dict[str, Any]:
+            result = await page.evaluate("WebSurfer.getPageSnapshot();")
+            assert isinstance(result, dict)
+            return cast(Dict[str, Any], result)
+
+        screenshot: Optional[bytes] = None
+        if get_screenshot:
+            result, screenshot = await asyncio.gather(
+                _evaluate_snapshot(), self.get_screenshot(page)
+            )
+        else:
+            result = await _evaluate_snapshot()
+
+        return pagesnapshot_from_dict(result, url=page.url, screenshot=screenshot)
+
     async def go_back(self, page: Page) -> bool:
         """
         Navigate back to the previous page.
@@ -430,7 +754,8 @@ class PlaywrightController:
             # Attempt normal navigation.
             await page.goto(url)
             await page.wait_for_load_state("load", timeout=self._timeout_load * 1000)
-            await asyncio.sleep(1)
+            if self._settle_strategy == "fixed":
+                await asyncio.sleep(1)
             reset_prior_metadata_hash = True
 
         except Exception as e:
@@ -472,8 +797,7 @@ class PlaywrightController:
             await page.goto(data_uri)
             reset_last_download = True
 
-        if self._sleep_after_action > 0:
-            await page.wait_for_timeout(self._sleep_after_action * 1000)
+        await self._wait_for_page_to_settle(page, self._sleep_after_action)
 
         return reset_prior_metadata_hash, reset_last_download
 
@@ -487,6 +811,7 @@ class PlaywrightController:
         await self._ensure_page_ready(page)
         await page.reload()
         await page.wait_for_load_state("load", timeout=self._timeout_load * 1000)
+        await self._wait_for_page_to_settle(page, 0)
 
     async def page_down(self, page: Page) -> None:
         """
@@ -515,6 +840,8 @@ class PlaywrightController:
         else:
             # Regular instant scroll
             await page.evaluate(f"window.scrollBy(0, {scroll_amount});")
+        # Give lazily loaded content a chance to appear
+        await self._wait_for_page_to_settle(page, 0)
 
     async def page_up(self, page: Page) -> None:
         """
@@ -543,6 +870,7 @@ class PlaywrightController:
         else:
             # Regular instant scroll
             await page.evaluate(f"window.scrollBy(0, -{scroll_amount});")
+        await self._wait_for_page_to_settle(page, 0)
 
     async def click_id(
         self,
@@ -704,8 +1032,7 @@ class PlaywrightController:
         if self.animate_actions:
             await self.remove_cursor_box(page, identifier)
 
-        if self._sleep_after_action > 0:
-            await page.wait_for_timeout(self._sleep_after_action * 1000)
+        await self._wait_for_page_to_settle(page, self._sleep_after_action)
 
         return new_page
 
@@ -837,6 +1164,7 @@ class PlaywrightController:
             if press_enter:
                 # if it's a combobox, wait a bit before pressing enter to allow suggestions to appear
                 await target.press("Enter")
+                await self._wait_for_page_to_settle(page, 0)
 
         finally:
             if self.animate_actions:
@@ -982,8 +1310,7 @@ class PlaywrightController:
                 )
 
             # Optional sleep/pause after the action
-            if self._sleep_after_action > 0:
-                await page.wait_for_timeout(self._sleep_after_action * 1000)
+            await self._wait_for_page_to_settle(page, self._sleep_after_action)
 
         except PlaywrightTimeoutError:
             raise ValueError(
@@ -1,4 +1,4 @@
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Optional, Union, cast
 from typing_extensions import TypedDict
 
 from autogen_core import FunctionCall, Image
@@ -43,6 +43,17 @@ class InteractiveRegion(TypedDict):
     rects: List[DOMRectangle]
 
 
+class PageSnapshot(TypedDict):
+    url: str
+    title: str
+    interactive_rects: Dict[str, InteractiveRegion]
+    visual_viewport: VisualViewport
+    focused_rect_id: str
+    visible_text: str
+    page_metadata: Dict[str, Any]
+    screenshot: Optional[bytes]
+
+
 # Helper functions for dealing with JSON. Not sure there's a better way?
 
 
@@ -105,3 +116,30 @@ def visualviewport_from_dict(viewport: Dict[str, Any]) -> VisualViewport:
         scrollWidth=_get_number(viewport, "scrollWidth"),
         scrollHeight=_get_number(viewport, "scrollHeight"),
     )
+
+
+def pagesnapshot_from_dict(
+    snapshot: Dict[str, Any], url: str, screenshot: Optional[bytes] = None
+) -> PageSnapshot:
+    rects = cast(Dict[str, Dict[str, Any]], snapshot["interactive_rects"])
+    assert isinstance(rects, dict)
+    typed_rects: Dict[str, InteractiveRegion] = {}
+    for k, rect in rects.items():
+        assert isinstance(k, str)
+        typed_rects[k] = interactiveregion_from_dict(rect)
+
+    page_metadata = cast(Dict[str, Any], snapshot["page_metadata"])
+    assert isinstance(page_metadata, dict)
+
+    return PageSnapshot(
+        url=url,
+        title=_get_str(snapshot, "title"),
+        interactive_rects=typed_rects,
+        visual_viewport=visualviewport_from_dict(
+            cast(Dict[str, Any], snapshot["visual_viewport"])
+        ),
+        focused_rect_id=str(snapshot["focused_rect_id"]),
+        visible_text=_get_str(snapshot, "visible_text"),
+        page_metadata=page_metadata,
+        screenshot=screenshot,
+    )
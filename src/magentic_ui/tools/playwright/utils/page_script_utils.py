@@ -0,0 +1,68 @@
+import functools
+import hashlib
+import os
+
+from playwright.async_api import Page
+
+PAGE_SCRIPT_PATH = os.path.join(
+    os.path.abspath(os.path.dirname(__file__)), "..", "page_script.js"
+)
+
+# Placeholder in page_script.js that is replaced with the hash of the script contents
+_VERSION_PLACEHOLDER = "__PAGE_SCRIPT_VERSION__"
+
+
+@functools.lru_cache(maxsize=None)
+def _load_page_script() -> tuple[str, str]:
+    with open(PAGE_SCRIPT_PATH, "rt", encoding="utf-8") as fh:
+        source = fh.read()
+    version = hashlib.sha256(source.encode("utf-8")).hexdigest()[:16]
+    return source.replace(_VERSION_PLACEHOLDER, version), version
+
+
+def get_page_script() -> str:
+    """
+    Get the contents of page_script.js with its version stamped in.
+    The file is read once per process and shared by every controller.
+
+    Returns:
+        str: The page script source.
+    """
+    return _load_page_script()[0]
+
+
+def get_page_script_version() -> str:
+    """
+    Get the version of page_script.js, derived from a hash of its contents.
+
+    Returns:
+        str: The page script version.
+    """
+    return _load_page_script()[1]
+
+
+async def ensure_page_script(page: Page) -> bool:
+    """
+    Make sure the current version of page_script.js is installed in the page.
+    The page is probed first and the script is only shipped when it is missing or outdated.
+
+    Args:
+        page (Page): The Playwright page object.
+
+    Returns:
+        bool: True if the script had to be (re)installed, False if it was already present.
+    """
+    probe = (
+        f"typeof WebSurfer !== 'undefined' && "
+        f"WebSurfer.version === '{get_page_script_version()}'"
+    )
+    try:
+        if await page.evaluate(probe):
+            return False
+    except Exception:
+        pass
+    try:
+        await page.evaluate(get_page_script())
+    except Exception:
+        pass
+    return True
@@ -4,27 +4,18 @@ import logging
 import os
 import tempfile
 
-import tiktoken
 from markitdown import MarkItDown  # type: ignore
 from playwright.async_api import Page
 
+from ...token_counter import truncate_to_tokens
+from .page_script_utils import ensure_page_script
+
 logger = logging.getLogger(__name__)
 
 
 class WebpageTextUtilsPlaywright:
     def __init__(self):
         self._markdown_converter: Optional[Any] | None = None
-        self._page_script: str = ""
-
-        # Read page_script
-        with open(
-            os.path.join(
-                os.path.abspath(os.path.dirname(__file__)), "..", "page_script.js"
-            ),
-            "rt",
-            encoding="utf-8",
-        ) as fh:
-            self._page_script = fh.read()
 
     async def get_all_webpage_text(self, page: Page, n_lines: int = 50) -> str:
         """
@@ -59,10 +50,7 @@ class WebpageTextUtilsPlaywright:
         Returns:
             str: The text content of the page.
         """
-        try:
-            await page.evaluate(self._page_script)
-        except Exception:
-            pass
+        await ensure_page_script(page)
         result = await page.evaluate("WebSurfer.getVisibleText();")
         assert isinstance(result, str)
         return result
@@ -87,15 +75,8 @@ class WebpageTextUtilsPlaywright:
             # Extract PDF content
             pdf_content = await self._extract_pdf_content(page)
 
-            # Tokenize the PDF content and limit to max_tokens if needed
-            if max_tokens == -1:
-                return pdf_content
-
-            tokenizer = tiktoken.encoding_for_model("gpt-4o")
-            tokens = tokenizer.encode(pdf_content)
-            limited_content = tokenizer.decode(tokens[:max_tokens])
-
-            return limited_content
+            # Limit the PDF content to max_tokens if needed
+            return truncate_to_tokens(pdf_content, max_tokens)
 
         # Regular webpage processing
         if self._markdown_converter is None:
@@ -106,14 +87,8 @@ class WebpageTextUtilsPlaywright:
         )  # type: ignore
         text_content = res.text_content  # type: ignore
 
-        # Tokenize the text content and limit to max_tokens
-        if max_tokens == -1:
-            return text_content
-        tokenizer = tiktoken.encoding_for_model("gpt-4o")
-        tokens = tokenizer.encode(text_content)
-        limited_text_content = tokenizer.decode(tokens[:max_tokens])
-
-        return limited_text_content
+        # Limit the text content to max_tokens
+        return truncate_to_tokens(text_content, max_tokens)
 
     async def _is_pdf_page(self, page: Page) -> bool:
         """Check if the current page is a PDF document.
@@ -0,0 +1,160 @@
+import asyncio
+import time
+import weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from loguru import logger
+from playwright.async_api import Browser, Page, Playwright, async_playwright
+
+
+class SearchBrowserPool:
+    """
+    A headless Chromium shared by the page extractions of the search tools.
+
+    The browser is launched lazily on first use and closed again once it has been idle
+    for `idle_timeout` seconds. Each extraction gets its own short-lived browser context,
+    so cookies and storage are not shared between pages, while the expensive browser
+    launch is paid once for many searches.
+
+    Args:
+        max_concurrency (int, optional): Maximum number of pages open at the same time. Default: 4
+        idle_timeout (float, optional): Seconds without any open page after which the browser is closed. Default: 120
+    """
+
+    def __init__(self, max_concurrency: int = 4, idle_timeout: float = 120) -> None:
+        assert max_concurrency > 0
+        assert idle_timeout > 0
+        self._max_concurrency = max_concurrency
+        self._idle_timeout = idle_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._lock = asyncio.Lock()
+        self._playwright: Optional[Playwright] = None
+        self._browser: Optional[Browser] = None
+        self._active_pages = 0
+        self._last_used = time.monotonic()
+        self._idle_task: Optional[asyncio.Task[None]] = None
+        self._launches = 0
+
+    @property
+    def launches(self) -> int:
+        """The number of times the browser was launched by this pool."""
+        return self._launches
+
+    @property
+    def active_pages(self) -> int:
+        """The number of pages currently handed out by this pool."""
+        return self._active_pages
+
+    async def _get_browser(self) -> Browser:
+        async with self._lock:
+            if self._browser is not None and self._browser.is_connected():
+                return self._browser
+            # The browser crashed or was never started
+            await self._close_browser()
+            self._playwright = await async_playwright().start()
+            launch_args = ["--disable-extensions", "--disable-file-system"]
+            self._browser = await self._playwright.chromium.launch(
+                headless=True, env={}, args=launch_args, chromium_sandbox=True
+            )
+            self._launches += 1
+            return self._browser
+
+    async def _close_browser(self) -> None:
+        browser, self._browser = self._browser, None
+        playwright, self._playwright = self._playwright, None
+        if browser is not None:
+            try:
+                await browser.close()
+            except Exception as e:
+                logger.debug(f"Error closing search browser: {e}")
+        if playwright is not None:
+            try:
+                await playwright.stop()
+            except Exception as e:
+                logger.debug(f"Error stopping playwright: {e}")
+
+    async def _evict_when_idle(self) -> None:
+        while self._active_pages == 0:
+            remaining = self._idle_timeout - (time.monotonic() - self._last_used)
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+                continue
+            async with self._lock:
+                if (
+                    self._active_pages == 0
+                    and time.monotonic() - self._last_used >= self._idle_timeout
+                ):
+                    await self._close_browser()
+                    return
+        # A page was opened in the meantime, its release schedules a new eviction
+
+    def _schedule_idle_eviction(self) -> None:
+        if self._idle_task is None or self._idle_task.done():
+            self._idle_task = asyncio.create_task(self._evict_when_idle())
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Page]:
+        """
+        Open a page in a fresh browser context of the shared browser.
+        Waits while `max_concurrency` pages are already open.
+
+        Yields:
+            Page: The Playwright page object. Its context is closed on exit.
+        """
+        async with self._semaphore:
+            self._active_pages += 1
+            try:
+                browser = await self._get_browser()
+                context = await browser.new_context(
+                    accept_downloads=False,  # Disable downloads
+                    permissions=[],  # No additional permissions
+                )
+                try:
+                    yield await context.new_page()
+                finally:
+                    try:
+                        await context.close()
+                    except Exception as e:
+                        logger.debug(f"Error closing search browser context: {e}")
+            finally:
+                self._active_pages -= 1
+                self._last_used = time.monotonic()
+                if self._active_pages == 0:
+                    self._schedule_idle_eviction()
+
+    async def close(self) -> None:
+        """Close the browser and stop the idle eviction."""
+        if self._idle_task is not None and not self._idle_task.done():
+            self._idle_task.cancel()
+        self._idle_task = None
+        async with self._lock:
+            await self._close_browser()
+
+
+# Playwright objects are bound to the event loop that created them, so keep one pool per loop
+_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, SearchBrowserPool]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_search_browser_pool() -> SearchBrowserPool:
+    """
+    Get the search browser pool shared by all searches running on the current event loop.
+
+    Returns:
+        SearchBrowserPool: The shared pool.
+    """
+    loop = asyncio.get_running_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = SearchBrowserPool()
+        _pools[loop] = pool
+    return pool
+
+
+async def close_search_browser_pool() -> None:
+    """Close the search browser pool of the current event loop, if one was started."""
+    pool = _pools.pop(asyncio.get_running_loop(), None)
+    if pool is not None:
+        await pool.close()
@@ -0,0 +1,246 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from loguru import logger
+
+SEARCH_CACHE_SUBDIR = "search_cache"
+
+
+class SearchCache:
+    """
+    A persistent cache for search results and extracted page markdown.
+
+    Entries are stored as JSON files named after the hash of their key, so identical
+    queries and URLs map to the same file across sessions and processes. Entries expire
+    after `ttl_seconds`, and the least recently used entries are evicted once the cache
+    holds more than `max_entries` entries or `max_size_bytes` bytes.
+
+    Args:
+        cache_dir (str | Path): The directory to store the entries in. Created if it does not exist.
+        ttl_seconds (float, optional): Time to live of an entry in seconds. Default: 3600
+        max_entries (int, optional): Maximum number of entries to keep. Default: 2000
+        max_size_bytes (int, optional): Maximum total size of the entries in bytes. Default: 256 MB
+    """
+
+    def __init__(
+        self,
+        cache_dir: str | Path,
+        ttl_seconds: float = 3600,
+        max_entries: int = 2000,
+        max_size_bytes: int = 256 * 1024 * 1024,
+    ) -> None:
+        assert ttl_seconds > 0
+        assert max_entries > 0
+        assert max_size_bytes > 0
+        self._cache_dir = Path(cache_dir)
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._max_size_bytes = max_size_bytes
+        self._lock = threading.Lock()
+        # Maps entry file names to their size, least recently used first
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._total_size = 0
+        self.hits = 0
+        self.misses = 0
+
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def _entry_name(kind: str, key: str) -> str:
+        digest = hashlib.sha256(f"{kind}\0{key}".encode("utf-8")).hexdigest()
+        return f"{kind}-{digest}.json"
+
+    def _load_index(self) -> None:
+        # The modification time of an entry file records its last access
+        entries: list[Tuple[float, str, int]] = []
+        for entry in os.scandir(self._cache_dir):
+            if entry.is_file() and entry.name.endswith(".json"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self._index[name] = size
+            self._total_size += size
+        self._evict()
+
+    def _remove(self, name: str) -> None:
+        size = self._index.pop(name, 0)
+        self._total_size -= size
+        try:
+            os.remove(self._cache_dir / name)
+        except FileNotFoundError:
+            pass
+
+    def _evict(self) -> None:
+        while self._index and (
+            len(self._index) > self._max_entries
+            or self._total_size > self._max_size_bytes
+        ):
+            oldest = next(iter(self._index))
+            self._remove(oldest)
+
+    def _read(self, name: str) -> Optional[Dict[str, Any]]:
+        # Must be called with the lock held. Returns the raw entry or None if missing or expired.
+        if name not in self._index:
+            return None
+        path = self._cache_dir / name
+        try:
+            with open(path, "rt", encoding="utf-8") as fh:
+                entry = json.load(fh)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Dropping unreadable search cache entry {name}: {e}")
+            self._remove(name)
+            return None
+        if time.time() - entry.get("created_at", 0) > self._ttl_seconds:
+            self._remove(name)
+            return None
+        return entry
+
+    def _write(self, name: str, entry: Dict[str, Any]) -> None:
+        # Must be called with the lock held
+        data = json.dumps(entry)
+        # Write to a temporary file first so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self._cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wt", encoding="utf-8") as fh:
+                fh.write(data)
+            os.replace(tmp_path, self._cache_dir / name)
+        except OSError as e:
+            logger.warning(f"Failed to write search cache entry {name}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        self._total_size -= self._index.pop(name, 0)
+        size = len(data.encode("utf-8"))
+        self._index[name] = size
+        self._total_size += size
+        self._evict()
+
+    def _get(self, kind: str, key: str) -> Optional[Dict[str, Any]]:
+        name = self._entry_name(kind, key)
+        with self._lock:
+            entry = self._read(name)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._index.move_to_end(name)
+            try:
+                os.utime(self._cache_dir / name)
+            except OSError:
+                pass
+            self.hits += 1
+            return entry["value"]
+
+    def _set(self, kind: str, key: str, value: Dict[str, Any]) -> None:
+        name = self._entry_name(kind, key)
+        with self._lock:
+            self._write(name, {"key": key, "created_at": time.time(), "value": value})
+
+    def get_search_results(self, query: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the cached search results page for a query.
+
+        Args:
+            query (str): The search query.
+
+        Returns:
+            Dict[str, Any] | None: A dictionary with the `search_results` markdown and the extracted `links`, or None if not cached.
+        """
+        return self._get("query", query.strip())
+
+    def set_search_results(
+        self, query: str, search_results: str, links: list[dict[str, str]]
+    ) -> None:
+        """
+        Cache the search results page for a query.
+
+        Args:
+            query (str): The search query.
+            search_results (str): The markdown of the search results page.
+            links (list[dict[str, str]]): The links extracted from the search results.
+        """
+        self._set(
+            "query", query.strip(), {"search_results": search_results, "links": links}
+        )
+
+    def get_page(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the cached content of a page.
+
+        Args:
+            url (str): The URL of the page.
+
+        Returns:
+            Dict[str, Any] | None: A dictionary with the page `markdown` and its token limited `snippets` keyed by token limit, or None if not cached.
+        """
+        return self._get("url", url)
+
+    def set_page(
+        self, url: str, markdown: str, snippets: Optional[Dict[str, str]] = None
+    ) -> None:
+        """
+        Cache the content of a page.
+
+        Args:
+            url (str): The URL of the page.
+            markdown (str): The markdown extracted from the page.
+            snippets (Dict[str, str], optional): Token limited versions of the markdown keyed by token limit. Default: None
+        """
+        self._set("url", url, {"markdown": markdown, "snippets": snippets or {}})
+
+    def set_page_snippet(self, url: str, max_tokens: int, snippet: str) -> None:
+        """
+        Add a token limited version of a cached page. Does nothing if the page is not cached.
+        The page keeps its original expiry time.
+
+        Args:
+            url (str): The URL of the page.
+            max_tokens (int): The token limit the snippet was created with.
+            snippet (str): The token limited markdown.
+        """
+        name = self._entry_name("url", url)
+        with self._lock:
+            entry = self._read(name)
+            if entry is None:
+                return
+            entry["value"].setdefault("snippets", {})[str(max_tokens)] = snippet
+            self._write(name, entry)
+
+    def clear(self) -> None:
+        """Remove all entries from the cache."""
+        with self._lock:
+            for name in list(self._index):
+                self._remove(name)
+
+
+_caches: Dict[Path, SearchCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_search_cache(cache_dir: str | Path, ttl_seconds: float = 3600) -> SearchCache:
+    """
+    Get the search cache for a directory, shared by everything in the process using that directory.
+
+    Args:
+        cache_dir (str | Path): The directory of the cache.
+        ttl_seconds (float, optional): Time to live of an entry in seconds, used when the cache is first opened. Default: 3600
+
+    Returns:
+        SearchCache: The shared cache.
+    """
+    path = Path(cache_dir).resolve()
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = SearchCache(path, ttl_seconds=ttl_seconds)
+            _caches[path] = cache
+        return cache
@@ -0,0 +1,226 @@
+import functools
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Tuple
+
+import tiktoken
+
+DEFAULT_TOKENIZER_MODEL = "gpt-4o"
+
+# A UTF-8 character is at most 4 bytes and a token is at least 1 byte
+_MAX_BYTES_PER_CHAR = 4
+# Characters per token assumed when only a prefix of a long text is encoded to truncate it.
+# Generous for English and markup, the prefix is grown if it turns out to be too short.
+_PREFIX_CHARS_PER_TOKEN = 6
+# Tokens past the limit that the encoded prefix must contain, so that the tokens up to the
+# limit are not affected by where the prefix was cut
+_PREFIX_MARGIN_TOKENS = 16
+
+
+@functools.lru_cache(maxsize=None)
+def get_tokenizer(model: str = DEFAULT_TOKENIZER_MODEL) -> tiktoken.Encoding:
+    """
+    Get the tiktoken encoding of a model, loaded once per process.
+
+    Args:
+        model (str, optional): The name of the model. Default: "gpt-4o"
+
+    Returns:
+        tiktoken.Encoding: The encoding.
+    """
+    return tiktoken.encoding_for_model(model)
+
+
+class TokenCounter:
+    """
+    Counts and truncates texts in tokens, remembering the results for recently seen texts.
+
+    Results are keyed by a hash of the text, so the texts themselves are not kept alive.
+    Texts whose UTF-8 length is within a limit are known to fit without being encoded, and
+    only a prefix of texts far over a limit is encoded to truncate them.
+
+    Args:
+        model (str, optional): The name of the model whose tokenizer is used. Default: "gpt-4o"
+        max_entries (int, optional): Maximum number of results to remember. Default: 256
+        max_cached_chars (int, optional): Maximum total length of the truncated texts to remember. Default: 16M
+    """
+
+    def __init__(
+        self,
+        model: str = DEFAULT_TOKENIZER_MODEL,
+        max_entries: int = 256,
+        max_cached_chars: int = 16 * 1024 * 1024,
+    ) -> None:
+        assert max_entries > 0
+        assert max_cached_chars >= 0
+        self.model = model
+        self._max_entries = max_entries
+        self._max_cached_chars = max_cached_chars
+        self._lock = threading.Lock()
+        # Maps (text hash, max tokens) to a token count (max tokens -1) or a truncated
+        # text, None if the text fits. Least recently used first.
+        self._cache: "OrderedDict[Tuple[bytes, int], int | str | None]" = OrderedDict()
+        self._cached_chars = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def tokenizer(self) -> tiktoken.Encoding:
+        """The tiktoken encoding of the model."""
+        return get_tokenizer(self.model)
+
+    @staticmethod
+    def _digest(data: bytes) -> bytes:
+        return hashlib.blake2b(data, digest_size=16).digest()
+
+    def _get(self, key: Tuple[bytes, int]) -> Tuple[bool, int | str | None]:
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return True, self._cache[key]
+            self.misses += 1
+            return False, None
+
+    def _set(self, key: Tuple[bytes, int], value: int | str | None) -> None:
+        size = len(value) if isinstance(value, str) else 0
+        if size > self._max_cached_chars:
+            return
+        with self._lock:
+            previous = self._cache.pop(key, None)
+            if isinstance(previous, str):
+                self._cached_chars -= len(previous)
+            self._cache[key] = value
+            self._cached_chars += size
+            while (
+                len(self._cache) > self._max_entries
+                or self._cached_chars > self._max_cached_chars
+            ):
+                _, evicted = self._cache.popitem(last=False)
+                if isinstance(evicted, str):
+                    self._cached_chars -= len(evicted)
+
+    def count(self, text: str) -> int:
+        """
+        Count the tokens of a text.
+
+        Args:
+            text (str): The text.
+
+        Returns:
+            int: The number of tokens.
+        """
+        if not text:
+            return 0
+        key = (self._digest(text.encode("utf-8", "surrogatepass")), -1)
+        found, count = self._get(key)
+        if found:
+            assert isinstance(count, int)
+            return count
+        count = len(self.tokenizer.encode(text, disallowed_special=()))
+        self._set(key, count)
+        return count
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """
+        Truncate a text to its first `max_tokens` tokens.
+
+        Args:
+            text (str): The text.
+            max_tokens (int): The maximum number of tokens to keep, -1 for no limit.
+
+        Returns:
+            str: The text itself if it fits, otherwise the decoded first `max_tokens` tokens.
+        """
+        if max_tokens < 0 or len(text) * _MAX_BYTES_PER_CHAR <= max_tokens:
+            return text
+        data = text.encode("utf-8", "surrogatepass")
+        if len(data) <= max_tokens:
+            return text
+
+        key = (self._digest(data), max_tokens)
+        found, truncated = self._get(key)
+        if found:
+            return text if truncated is None else str(truncated)
+
+        tokens = self._encode_prefix(text, max_tokens)
+        if len(tokens) <= max_tokens:
+            self._set(key, None)
+            return text
+        truncated = self.tokenizer.decode(tokens[:max_tokens])
+        self._set(key, truncated)
+        return truncated
+
+    def _encode_prefix(self, text: str, max_tokens: int) -> list[int]:
+        """
+        Encode enough of the start of a text to get its first `max_tokens` tokens.
+
+        The prefix is cut on whitespace, where the tokenizer splits words anyway, and must
+        encode to more than `max_tokens` tokens by a margin, otherwise it is doubled. The
+        whole text is encoded when it is not much longer than the prefix.
+
+        Args:
+            text (str): The text.
+            max_tokens (int): The number of tokens needed.
+
+        Returns:
+            list[int]: The tokens of the prefix, all the tokens of the text if it was encoded in full.
+        """
+        tokenizer = self.tokenizer
+        prefix_chars = (max_tokens + _PREFIX_MARGIN_TOKENS) * _PREFIX_CHARS_PER_TOKEN
+        while 2 * prefix_chars < len(text):
+            cut = max(
+                text.rfind(" ", 0, prefix_chars), text.rfind("\n", 0, prefix_chars)
+            )
+            if cut > 0:
+                tokens = tokenizer.encode(text[:cut], disallowed_special=())
+                if len(tokens) > max_tokens + _PREFIX_MARGIN_TOKENS:
+                    return tokens
+            prefix_chars *= 2
+        return tokenizer.encode(text, disallowed_special=())
+
+
+@functools.lru_cache(maxsize=None)
+def get_token_counter(model: str = DEFAULT_TOKENIZER_MODEL) -> TokenCounter:
+    """
+    Get the token counter of a model shared by the whole process.
+
+    Args:
+        model (str, optional): The name of the model. Default: "gpt-4o"
+
+    Returns:
+        TokenCounter: The token counter.
+    """
+    return TokenCounter(model)
+
+
+def count_tokens(text: str, model: str = DEFAULT_TOKENIZER_MODEL) -> int:
+    """
+    Count the tokens of a text with the shared token counter.
+
+    Args:
+        text (str): The text.
+        model (str, optional): The name of the model whose tokenizer is used. Default: "gpt-4o"
+
+    Returns:
+        int: The number of tokens.
+    """
+    return get_token_counter(model).count(text)
+
+
+def truncate_to_tokens(
+    text: str, max_tokens: int, model: str = DEFAULT_TOKENIZER_MODEL
+) -> str:
+    """
+    Truncate a text to its first `max_tokens` tokens with the shared token counter.
+
+    Args:
+        text (str): The text.
+        max_tokens (int): The maximum number of tokens to keep, -1 for no limit.
+        model (str, optional): The name of the model whose tokenizer is used. Default: "gpt-4o"
+
+    Returns:
+        str: The text itself if it fits, otherwise the decoded first `max_tokens` tokens.
+    """
+    return get_token_counter(model).truncate(text, max_tokens)
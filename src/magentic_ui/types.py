@@ -154,7 +154,9 @@ class HumanInputFormat(BaseModel):
 
 
 class CheckpointEvent(BaseAgentEvent):
+    # JSON of the full team state, or of the changes since the previous checkpoint if `delta` is set
     state: str
+    delta: bool = False
     content: str = "Checkpoint"
     metadata: Dict[str, str] = {"internal": "yes"}
 
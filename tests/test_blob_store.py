@@ -0,0 +1,51 @@
+import base64
+import os
+
+from magentic_ui.backend.utils.blob_store import BlobStore
+
+PNG = b"\x89PNG\r\n\x1a\n" + os.urandom(4096)
+
+
+def test_put_deduplicates(tmp_path):
+    store = BlobStore(tmp_path)
+    digest = store.put(PNG)
+    assert store.put(PNG) == digest
+    assert store.get(digest) == PNG
+    assert store.media_type(digest) == "image/png"
+    assert sum(len(files) for _, _, files in os.walk(tmp_path)) == 1
+
+
+def test_invalid_digests_are_rejected(tmp_path):
+    store = BlobStore(tmp_path)
+    assert store.path("../../etc/passwd") is None
+    assert store.path("0" * 64) is None
+
+
+def test_images_round_trip(tmp_path):
+    store = BlobStore(tmp_path)
+    image = {"data": base64.b64encode(PNG).decode("utf-8")}
+    message = {
+        "type": "MultiModalMessage",
+        "content": ["A screenshot", image, image],
+        "metadata": {"data": "short"},
+    }
+
+    externalized = store.externalize_images(message, url_prefix="/api/runs/1/blobs")
+    digest = store.put(PNG)
+    assert externalized["content"][1] == {
+        "$blob": digest,
+        "url": f"/api/runs/1/blobs/{digest}",
+    }
+    assert externalized["metadata"] == {"data": "short"}
+    assert store.internalize_images(externalized) == message
+
+
+def test_non_image_data_stays_inline(tmp_path):
+    store = BlobStore(tmp_path)
+    state = {
+        "file": {"data": base64.b64encode(b"%PDF-1.7\n" + bytes(4096)).decode("utf-8")},
+        "note": {"$blob": "not a reference", "author": "agent"},
+    }
+    assert store.externalize_images(state) == state
+    assert store.internalize_images(state) == state
+    assert not os.listdir(tmp_path)
@@ -0,0 +1,250 @@
+import asyncio
+import json
+
+import pytest
+import pytest_asyncio
+from autogen_agentchat.agents import AssistantAgent
+from autogen_agentchat.messages import TextMessage
+from autogen_agentchat.teams import BaseGroupChat
+from autogen_ext.models.replay import ReplayChatCompletionClient
+from sqlmodel import SQLModel
+
+from magentic_ui.backend.database import DatabaseManager
+from magentic_ui.backend.datamodel import Response, Run, RunStateDelta, Session
+from magentic_ui.backend.utils.utils import decompress_state
+from magentic_ui.backend.web.managers.connection import WebSocketManager
+
+from magentic_ui.teams import GroupChat
+from magentic_ui.teams.checkpoint import apply_state_delta, compute_state_delta
+from magentic_ui.teams.orchestrator.orchestrator_config import OrchestratorConfig
+from magentic_ui.types import CheckpointEvent
+
+
+def test_unchanged_state_has_no_delta():
+    state = {"agent_states": {"web_surfer": {"chat_history": [{"content": "hi"}]}}}
+    assert compute_state_delta(state, json.loads(json.dumps(state))) is None
+
+
+def test_appended_history_is_stored_as_append():
+    old = {
+        "agent_states": {
+            "web_surfer": {"chat_history": [{"content": "a" * 1000}]},
+            "Orchestrator": {"n_rounds": 1, "plan": None},
+        }
+    }
+    new = {
+        "agent_states": {
+            "web_surfer": {"chat_history": [{"content": "a" * 1000}, {"content": "b"}]},
+            "Orchestrator": {"n_rounds": 2, "task": "search"},
+        }
+    }
+    delta = compute_state_delta(old, new)
+    assert delta is not None
+    # The unchanged history entry is not part of the delta
+    assert "a" * 1000 not in json.dumps(delta)
+    assert apply_state_delta(old, json.loads(json.dumps(delta))) == new
+    # The original state is not modified
+    assert len(old["agent_states"]["web_surfer"]["chat_history"]) == 1
+
+
+def test_replaying_a_sequence_of_deltas():
+    states = [{"history": list(range(i)), "step": i % 3} for i in range(1, 6)]
+    states.append({"history": [9], "step": "done"})
+    replayed = states[0]
+    for previous, current in zip(states, states[1:]):
+        delta = compute_state_delta(previous, current)
+        assert delta is not None
+        replayed = apply_state_delta(replayed, json.loads(json.dumps(delta)))
+    assert replayed == states[-1]
+
+
+def make_team(monkeypatch, n_messages, wait_event=None, **config):
+    """A team whose stream yields `n_messages` messages, waiting for `wait_event` after the first"""
+    client = ReplayChatCompletionClient([])
+    team = GroupChat(
+        [AssistantAgent("agent", model_client=client)],
+        client,
+        OrchestratorConfig(**config),
+    )
+    history = []
+
+    async def run_stream(self, *, task=None, cancellation_token=None):
+        for i in range(n_messages):
+            if i == 1 and wait_event is not None:
+                await wait_event.wait()
+            message = TextMessage(source="agent", content=f"message {i}")
+            history.append(message.content)
+            yield message
+
+    async def get_partial_state():
+        return {"history": list(history)}
+
+    monkeypatch.setattr(BaseGroupChat, "run_stream", run_stream)
+    monkeypatch.setattr(team, "_get_partial_state", get_partial_state)
+    return team
+
+
+def replay(checkpoints):
+    state = None
+    for checkpoint in checkpoints:
+        delta = json.loads(checkpoint.state)
+        state = apply_state_delta(state, delta) if checkpoint.delta else delta
+    return state
+
+
+@pytest.mark.asyncio
+async def test_stopping_between_throttled_checkpoints_saves_the_latest_state(
+    monkeypatch,
+):
+    team = make_team(monkeypatch, 5, checkpoint_interval=60, checkpoint_max_messages=2)
+    stream = team.run_stream(task="task")
+    checkpoints = []
+    messages = 0
+    async for message in stream:
+        if isinstance(message, CheckpointEvent):
+            checkpoints.append(message)
+            continue
+        messages += 1
+        if messages == 3:
+            break
+    await stream.aclose()
+
+    assert replay(checkpoints) == {"history": ["message 0", "message 1"]}
+    checkpoints.append(await team.checkpoint())
+    assert replay(checkpoints) == {"history": ["message 0", "message 1", "message 2"]}
+
+
+@pytest.mark.asyncio
+async def test_checkpoint_while_the_team_waits_and_at_the_end(monkeypatch):
+    wait_event = asyncio.Event()
+    team = make_team(
+        monkeypatch,
+        3,
+        wait_event,
+        checkpoint_interval=0.05,
+        checkpoint_max_messages=10,
+    )
+    stream = team.run_stream(task="task")
+    assert isinstance(await anext(stream), TextMessage)
+    # The team waits, e.g. for the user to approve the plan
+    checkpoint = await asyncio.wait_for(anext(stream), timeout=5)
+    assert isinstance(checkpoint, CheckpointEvent)
+    assert replay([checkpoint]) == {"history": ["message 0"]}
+
+    wait_event.set()
+    checkpoints = [checkpoint]
+    async for message in stream:
+        if isinstance(message, CheckpointEvent):
+            checkpoints.append(message)
+    assert replay(checkpoints) == {"history": ["message 0", "message 1", "message 2"]}
+
+
+@pytest.mark.asyncio
+async def test_requested_full_checkpoint_resets_the_delta_baseline(monkeypatch):
+    team = make_team(monkeypatch, 3, checkpoint_interval=60, checkpoint_max_messages=1)
+    checkpoints = []
+    async for message in team.run_stream(task="task"):
+        if isinstance(message, CheckpointEvent):
+            checkpoints.append(message)
+            if len(checkpoints) == 2:
+                # The second checkpoint could not be saved
+                team.request_full_checkpoint()
+    assert [checkpoint.delta for checkpoint in checkpoints] == [False, True, False]
+    assert replay([checkpoints[0], checkpoints[2]]) == {
+        "history": ["message 0", "message 1", "message 2"]
+    }
+
+
+class FakeTeamManager:
+    def __init__(self) -> None:
+        self.full_checkpoint_requests = 0
+
+    def request_full_checkpoint(self) -> None:
+        self.full_checkpoint_requests += 1
+
+
+@pytest_asyncio.fixture
+async def manager(tmp_path):
+    db_manager = DatabaseManager(engine_uri=f"sqlite:///{tmp_path / 'test.db'}")
+    SQLModel.metadata.create_all(db_manager.engine)
+    yield WebSocketManager(db_manager, tmp_path, tmp_path, False, {})
+    await db_manager.close()
+
+
+async def add_run(manager):
+    session = (await manager.db_manager.aupsert(Session(user_id="user"))).data
+    run = Run(session_id=session["id"], user_id="user", task=None)
+    run_id = (await manager.db_manager.aupsert(run)).data["id"]
+    team_manager = FakeTeamManager()
+    manager._team_managers[run_id] = team_manager
+    return run_id, team_manager
+
+
+def full(state):
+    return CheckpointEvent(source="orchestrator", state=json.dumps(state))
+
+
+def delta(old, new):
+    return CheckpointEvent(
+        source="orchestrator",
+        state=json.dumps(compute_state_delta(old, new)),
+        delta=True,
+    )
+
+
+async def saved_state(manager, run_id):
+    run = (await manager.db_manager.aget(Run, filters={"id": run_id})).data[0]
+    state = decompress_state(run.state)
+    for row in await manager._get_state_deltas(run_id):
+        state = apply_state_delta(state, json.loads(row))
+    return state
+
+
+@pytest.mark.asyncio
+async def test_lost_delta_waits_for_a_full_checkpoint(manager, monkeypatch):
+    run_id, team_manager = await add_run(manager)
+    states = [{"history": list(range(i))} for i in range(5)]
+    await manager._save_checkpoint(run_id, full(states[0]))
+    await manager._save_checkpoint(run_id, delta(states[0], states[1]))
+
+    insert_many = manager.db_manager.insert_many
+    monkeypatch.setattr(
+        manager.db_manager,
+        "insert_many",
+        lambda models: Response(message="disk full", status=False),
+    )
+    await manager._save_checkpoint(run_id, delta(states[1], states[2]))
+    assert team_manager.full_checkpoint_requests == 1
+    monkeypatch.setattr(manager.db_manager, "insert_many", insert_many)
+
+    # Replayed after the lost delta, this one would restore a corrupted state
+    await manager._save_checkpoint(run_id, delta(states[2], states[3]))
+    assert await saved_state(manager, run_id) == states[1]
+
+    await manager._save_checkpoint(run_id, full(states[3]))
+    await manager._save_checkpoint(run_id, delta(states[3], states[4]))
+    assert await saved_state(manager, run_id) == states[4]
+    assert len(await manager._get_state_deltas(run_id)) == 1
+
+
+@pytest.mark.asyncio
+async def test_deltas_are_kept_when_the_full_checkpoint_is_not_saved(
+    manager, monkeypatch
+):
+    run_id, team_manager = await add_run(manager)
+    states = [{"history": list(range(i))} for i in range(3)]
+    await manager._save_checkpoint(run_id, full(states[0]))
+    await manager._save_checkpoint(run_id, delta(states[0], states[1]))
+
+    upsert = manager.db_manager.upsert
+
+    def failing_upsert(model, **kwargs):
+        # Violates the NOT NULL constraint of the session of the run
+        model.session_id = None
+        return upsert(model, **kwargs)
+
+    monkeypatch.setattr(manager.db_manager, "upsert", failing_upsert)
+    await manager._save_checkpoint(run_id, full(states[2]))
+    assert team_manager.full_checkpoint_requests == 1
+    monkeypatch.setattr(manager.db_manager, "upsert", upsert)
+    assert await saved_state(manager, run_id) == states[1]
@@ -0,0 +1,128 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import text
+from sqlmodel import SQLModel
+
+from magentic_ui.backend.database import DatabaseManager
+from magentic_ui.backend.datamodel import Team
+
+
+@pytest_asyncio.fixture
+async def db_manager(tmp_path):
+    manager = DatabaseManager(
+        engine_uri=f"sqlite:///{tmp_path / 'test.db'}", max_workers=4
+    )
+    SQLModel.metadata.create_all(manager.engine)
+    yield manager
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_uses_wal(db_manager):
+    with db_manager.engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_async_operations(db_manager):
+    responses = await asyncio.gather(
+        *[
+            db_manager.aupsert(Team(user_id="user", component={"index": i}))
+            for i in range(20)
+        ]
+    )
+    assert all(response.status for response in responses)
+
+    response = await db_manager.aget(Team, filters={"user_id": "user"})
+    assert response.status
+    assert sorted(team.component["index"] for team in response.data) == list(range(20))
+
+    response = await db_manager.adelete(Team, filters={"user_id": "user"})
+    assert response.status
+    assert (await db_manager.aget(Team, filters={"user_id": "user"})).data == []
+
+
+@pytest.mark.asyncio
+async def test_in_memory_database_is_shared_by_async_operations():
+    manager = DatabaseManager(engine_uri="sqlite:///:memory:", max_workers=4)
+    SQLModel.metadata.create_all(manager.engine)
+    try:
+        await asyncio.gather(
+            *[
+                manager.aupsert(Team(user_id="memory", component={"index": i}))
+                for i in range(50)
+            ],
+            *[manager.aget(Team, filters={"user_id": "memory"}) for _ in range(50)],
+        )
+        response = await manager.aget(Team, filters={"user_id": "memory"})
+        assert response.status
+        assert len(response.data) == 50
+    finally:
+        await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_insert_many(db_manager):
+    teams = [Team(user_id="bulk", component={"index": i}) for i in range(5)]
+    response = await db_manager.ainsert_many(teams)
+    assert response.status
+
+    response = await db_manager.aget(Team, filters={"user_id": "bulk"})
+    assert sorted(team.component["index"] for team in response.data) == list(range(5))
+
+
+@pytest.mark.asyncio
+async def test_get_page_and_in_filters(db_manager):
+    await db_manager.ainsert_many(
+        [Team(user_id=f"user-{i % 3}", component={"index": i}) for i in range(10)]
+    )
+
+    response = await db_manager.aget(Team, filters={"user_id": ["user-0", "user-1"]})
+    assert len(response.data) == 7
+
+    pages = []
+    cursor = None
+    while True:
+        response = await db_manager.aget_page(Team, after_id=cursor, limit=4)
+        assert response.status
+        pages.append([team.component["index"] for team in response.data])
+        if len(response.data) < 4:
+            break
+        cursor = response.data[-1].id
+    assert pages == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+
+
+@pytest.mark.asyncio
+async def test_message_queries_use_indexes(db_manager):
+    with db_manager.engine.connect() as conn:
+        plan = conn.execute(
+            text(
+                "EXPLAIN QUERY PLAN SELECT * FROM message "
+                "WHERE run_id = 1 ORDER BY created_at"
+            )
+        ).fetchall()
+    details = " ".join(str(row[-1]) for row in plan)
+    assert "ix_message_run_id_created_at" in details
+    assert "TEMP B-TREE" not in details
+
+
+@pytest.mark.asyncio
+async def test_get_columns_and_limit(db_manager):
+    await db_manager.ainsert_many(
+        [Team(user_id="projected", component={"index": i}) for i in range(5)]
+    )
+
+    response = await db_manager.aget(
+        Team, filters={"user_id": "projected"}, columns=["id", "user_id"]
+    )
+    assert response.status
+    assert all(set(row) == {"id", "user_id"} for row in response.data)
+
+    response = await db_manager.aget(
+        Team, filters={"user_id": "projected"}, columns=["id"], limit=2, offset=1
+    )
+    assert response.status
+    assert len(response.data) == 2
+    assert all(set(row) == {"id"} for row in response.data)
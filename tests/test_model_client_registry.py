@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+from autogen_core.models import UserMessage
+from autogen_ext.models.replay import ReplayChatCompletionClient
+
+from magentic_ui.model_client_registry import (
+    ModelClientRegistry,
+    close_model_client_registry,
+    get_model_client_registry,
+    init_model_client_registry,
+)
+
+REPLAY_CLIENT_CONFIG = {
+    "provider": "autogen_ext.models.replay.ReplayChatCompletionClient",
+    "config": {"chat_completions": ["first", "second"]},
+}
+
+
+@pytest.mark.asyncio
+async def test_equivalent_configs_share_a_client():
+    registry = ModelClientRegistry()
+    first = registry.get(REPLAY_CLIENT_CONFIG)
+    second = registry.get({**REPLAY_CLIENT_CONFIG, "description": "Another label"})
+    assert len(registry) == 1
+
+    messages = [UserMessage(content="Hello", source="user")]
+    result = await first.create(messages)
+    assert result.content == "first"
+    assert first.total_usage() == result.usage
+
+    # Closing a handle leaves the shared client open
+    await first.close()
+    result = await second.create(messages)
+    assert result.content == "second"
+
+    registry.get({**REPLAY_CLIENT_CONFIG, "config": {"chat_completions": ["other"]}})
+    assert len(registry) == 2
+    await registry.close()
+    assert len(registry) == 0
+
+
+@pytest.mark.asyncio
+async def test_configured_registry_limits_concurrent_requests(monkeypatch):
+    in_flight = []
+    max_in_flight = 0
+    create = ReplayChatCompletionClient.create
+
+    async def slow_create(self, *args, **kwargs):
+        nonlocal max_in_flight
+        in_flight.append(None)
+        max_in_flight = max(max_in_flight, len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.pop()
+        return await create(self, *args, **kwargs)
+
+    monkeypatch.setattr(ReplayChatCompletionClient, "create", slow_create)
+    registry = init_model_client_registry(max_concurrent_requests=1)
+    try:
+        assert get_model_client_registry() is registry
+        handles = [registry.get(REPLAY_CLIENT_CONFIG) for _ in range(2)]
+        messages = [UserMessage(content="Hello", source="user")]
+        await asyncio.gather(*[handle.create(messages) for handle in handles])
+        assert max_in_flight == 1
+    finally:
+        await close_model_client_registry()
@@ -1,6 +1,7 @@
 import pytest
 import base64
 import os
+import time
 import pytest_asyncio
 
 from playwright.async_api import (
@@ -10,6 +11,10 @@ from playwright.async_api import (
 )
 
 from magentic_ui.tools import PlaywrightController
+from magentic_ui.tools.playwright.utils.page_script_utils import (
+    ensure_page_script,
+    get_page_script_version,
+)
 
 FAKE_HTML = """
 <!DOCTYPE html>
@@ -158,6 +163,26 @@ class TestPlaywrightController:
             # This depends on your page_script logic. Adjust as needed.
             pass
 
+    async def test_get_interactive_rects_tracks_dom_changes(self, page):
+        page_obj, pc = page
+        rects = await pc.get_interactive_rects(page_obj)
+        # Nothing changed, so the cached regions are returned
+        assert await pc.get_interactive_rects(page_obj) == rects
+
+        # Adding an element only rescans the changed subtree, but it must be picked up
+        await page_obj.evaluate("""() => {
+            const div = document.createElement('div');
+            div.id = 'late-div';
+            div.style.cursor = 'pointer';
+            div.textContent = 'Late clickable';
+            document.getElementById('header').appendChild(div);
+        }""")
+        new_rects = await pc.get_interactive_rects(page_obj)
+        late_id = await page_obj.get_attribute("#late-div", "__elementId")
+        assert late_id is not None
+        assert late_id in new_rects
+        assert "10" in new_rects
+
     async def test_get_focused_rect_id(self, page):
         page_obj, pc = page
         # Focus the input box (elementId="13")
@@ -208,6 +233,29 @@ class TestPlaywrightController:
         # If no download is triggered, reset_last should be False
         assert reset_last is False
 
+    async def test_page_setup_runs_once_per_document(self, page):
+        page_obj, pc = page
+        await pc.get_interactive_rects(page_obj)
+        await pc.get_visual_viewport(page_obj)
+        stats = pc.page_readiness_stats
+        assert stats["setup_passes"] == 1
+        assert stats["skipped_setup_passes"] >= 1
+
+        # Navigating the main frame invalidates the setup for the new document
+        await page_obj.goto(
+            "data:text/html;base64," + base64.b64encode(FAKE_HTML.encode()).decode()
+        )
+        await pc.get_focused_rect_id(page_obj)
+        assert pc.page_readiness_stats["setup_passes"] == 2
+
+    async def test_page_script_installed_once(self, page):
+        page_obj, _ = page
+        # The fixture page was populated with set_content, so the script is missing
+        assert await ensure_page_script(page_obj) is True
+        assert await ensure_page_script(page_obj) is False
+        version = await page_obj.evaluate("WebSurfer.version")
+        assert version == get_page_script_version()
+
     async def test_refresh_page(self, page):
         page_obj, pc = page
         # Refresh
@@ -268,6 +316,53 @@ class TestPlaywrightController:
             # It's okay if it fails because it's disabled
             pass
 
+    async def test_click_id_adaptive_settle(self, context, page):
+        page_obj, _ = page
+        pc = PlaywrightController(
+            viewport_width=800,
+            viewport_height=600,
+            timeout_load=2,
+            single_tab_mode=True,
+            settle_strategy="adaptive",
+            settle_idle_time=0.2,
+            settle_timeout=3,
+        )
+        start = time.monotonic()
+        await pc.click_id(context, page_obj, "10")
+        # A static page settles well before the cap
+        assert time.monotonic() - start < 3
+        assert await page_obj.evaluate("() => window.clickCount") == 1
+
+    async def test_adaptive_settle_ignores_stalled_requests(self, context, page):
+        page_obj, _ = page
+        pc = PlaywrightController(
+            viewport_width=800,
+            viewport_height=600,
+            timeout_load=2,
+            single_tab_mode=True,
+            settle_strategy="adaptive",
+            settle_idle_time=0.2,
+            settle_timeout=8,
+        )
+        stalled = []
+        # Never answered, like a long-poll
+        await page_obj.route("**/poll", lambda route: stalled.append(route))
+        await pc.click_id(context, page_obj, "10")
+        await page_obj.evaluate("() => { fetch('http://localhost/poll'); }")
+        start = time.monotonic()
+        await pc.click_id(context, page_obj, "10")
+        assert time.monotonic() - start < 6
+        assert stalled
+
+        # A navigation forgets the requests of the previous document
+        await page_obj.evaluate("() => { fetch('http://localhost/poll'); }")
+        await page_obj.goto(
+            "data:text/html;base64," + base64.b64encode(FAKE_HTML.encode()).decode()
+        )
+        start = time.monotonic()
+        await pc.click_id(context, page_obj, "10")
+        assert time.monotonic() - start < 1.5
+
     async def test_hover_id(self, page):
         page_obj, pc = page
         # Hover over "click-me" button
@@ -367,6 +462,57 @@ class TestPlaywrightController:
         assert screenshot_bytes is not None
         assert len(screenshot_bytes) > 0
 
+    async def test_screenshot_reused_until_page_changes(self, page):
+        page_obj, pc = page
+        first = await pc.get_screenshot(page_obj)
+        # Nothing changed, so the screenshot is not captured again
+        assert await pc.get_screenshot(page_obj) is first
+        assert pc.screenshot_stats == {
+            "screenshots_taken": 1,
+            "screenshot_cache_hits": 1,
+        }
+
+        await page_obj.evaluate(
+            "document.getElementById('header').textContent = 'Changed header'"
+        )
+        changed = await pc.get_screenshot(page_obj)
+        assert changed is not first
+        assert pc.screenshot_stats["screenshots_taken"] == 2
+
+        # A navigation drops the cached screenshot
+        await page_obj.goto(
+            "data:text/html;base64," + base64.b64encode(FAKE_HTML.encode()).decode()
+        )
+        await pc.get_screenshot(page_obj)
+        assert pc.screenshot_stats["screenshots_taken"] == 3
+
+    async def test_page_state_changes_with_page(self, page):
+        page_obj, pc = page
+        state = await pc.get_page_state(page_obj)
+        assert state is not None
+        assert await pc.get_page_state(page_obj) == state
+
+        await page_obj.fill("#input-box", "typed text")
+        typed = await pc.get_page_state(page_obj)
+        assert typed is not None and typed != state
+        assert typed[1] == page_obj.url
+
+    async def test_snapshot_page(self, page):
+        page_obj, pc = page
+        await page_obj.click("#input-box")
+        snapshot = await pc.snapshot_page(page_obj)
+        assert snapshot["title"] == "Fake Page"
+        assert "10" in snapshot["interactive_rects"]
+        assert snapshot["focused_rect_id"] == "13"
+        assert "Welcome to the Fake Page" in snapshot["visible_text"]
+        assert snapshot["visual_viewport"]["width"] > 0
+        assert isinstance(snapshot["page_metadata"], dict)
+        assert snapshot["screenshot"] is not None
+        assert len(snapshot["screenshot"]) > 0
+
+        snapshot = await pc.snapshot_page(page_obj, get_screenshot=False)
+        assert snapshot["screenshot"] is None
+
     async def test_select_multiple_options(self, context, page):
         page_obj, pc = page
         # Select multiple options in the multi-select dropdown
@@ -0,0 +1,137 @@
+import base64
+import io
+
+import PIL.Image
+import PIL.ImageDraw
+import pytest
+from autogen_agentchat.agents import UserProxyAgent
+from autogen_core import AgentId
+from autogen_ext.models.replay import ReplayChatCompletionClient
+
+from magentic_ui.agents import WebSurfer
+from magentic_ui.agents.web_surfer._screenshot import Screenshot, hash_distance
+from magentic_ui.teams import GroupChat
+from magentic_ui.teams.orchestrator._orchestrator import Orchestrator
+from magentic_ui.teams.orchestrator.orchestrator_config import OrchestratorConfig
+from magentic_ui.tools.playwright.browser import LocalPlaywrightBrowser
+
+
+def make_png(size=(200, 100), draw=None, format="PNG"):
+    image = PIL.Image.new("RGB", size, (10, 20, 30))
+    if draw is not None:
+        draw(PIL.ImageDraw.Draw(image))
+    buffer = io.BytesIO()
+    image.save(buffer, format=format)
+    return buffer.getvalue()
+
+
+def test_screenshot_is_decoded_and_encoded_once():
+    data = make_png()
+    screenshot = Screenshot(data)
+    assert screenshot.image is screenshot.image
+    assert screenshot.size == (200, 100)
+
+    ag_image = screenshot.to_ag_image()
+    assert screenshot.to_ag_image() is ag_image
+    # The original PNG bytes are sent as they are
+    assert ag_image.to_base64() == base64.b64encode(data).decode("utf-8")
+
+    scaled = screenshot.to_scaled_ag_image((100, 50))
+    assert screenshot.to_scaled_ag_image((100, 50)) is scaled
+    assert scaled.image.size == (100, 50)
+    assert scaled.to_base64() is scaled.to_base64()
+
+    screenshot.close()
+    # Images handed out for messages stay usable
+    assert ag_image.image.size == (200, 100)
+    assert scaled.to_base64()
+
+
+def test_perceptual_hash_ignores_encoding_but_not_content():
+    def banner(draw):
+        draw.rectangle((20, 20, 120, 60), fill=(250, 250, 250))
+
+    png = Screenshot(make_png(draw=banner))
+    # Same screen, different bytes
+    jpeg = Screenshot(make_png(draw=banner, format="JPEG"))
+    assert png.data != jpeg.data
+    assert hash_distance(png.perceptual_hash, jpeg.perceptual_hash) == 0
+
+    def moved_banner(draw):
+        draw.rectangle((60, 40, 180, 90), fill=(250, 250, 250))
+
+    moved = Screenshot(make_png(draw=moved_banner))
+    assert hash_distance(png.perceptual_hash, moved.perceptual_hash) > 0
+
+
+def test_model_images_can_be_compressed():
+    data = make_png(size=(400, 300))
+    screenshot = Screenshot(data)
+    assert screenshot.format == "png"
+
+    jpeg = screenshot.to_ag_image("jpeg", quality=70)
+    assert screenshot.to_ag_image("jpeg", quality=70) is jpeg
+    assert base64.b64decode(jpeg.to_base64()).startswith(b"\xff\xd8")
+    # The PNG is still the original bytes
+    assert screenshot.to_ag_image().to_base64() == base64.b64encode(data).decode()
+
+    webp = screenshot.to_scaled_ag_image((200, 150), "webp")
+    assert base64.b64decode(webp.to_base64())[8:12] == b"WEBP"
+    assert webp.image.size == (200, 150)
+
+    # A JPEG capture is sent as it is
+    jpeg_capture = make_png(format="JPEG")
+    captured = Screenshot(jpeg_capture)
+    assert captured.format == "jpeg"
+    assert captured.to_ag_image("jpeg").to_base64() == (
+        base64.b64encode(jpeg_capture).decode()
+    )
+
+
+def make_web_surfer():
+    client = ReplayChatCompletionClient([])
+    return WebSurfer("web_surfer", client, LocalPlaywrightBrowser(headless=True))
+
+
+def test_unchanged_screen_is_not_sent_again():
+    web_surfer = make_web_surfer()
+    screenshot = Screenshot(make_png())
+    page_state = (0, "https://example.com", 1)
+    assert not web_surfer._is_screenshot_unchanged(screenshot, page_state)
+    assert web_surfer._is_screenshot_unchanged(screenshot, page_state)
+
+    # Typed text changes the page state before it shows in the perceptual hash
+    typed_state = (0, "https://example.com", 2)
+    assert not web_surfer._is_screenshot_unchanged(screenshot, typed_state)
+    changed = Screenshot(
+        make_png(draw=lambda d: d.rectangle((20, 20, 120, 60), fill=(250, 250, 250)))
+    )
+    assert not web_surfer._is_screenshot_unchanged(changed, typed_state)
+    # Without a page state the screen is never assumed unchanged
+    assert not web_surfer._is_screenshot_unchanged(changed, None)
+    assert not web_surfer._is_screenshot_unchanged(changed, typed_state)
+
+    web_surfer.skip_unchanged_screenshots = False
+    assert not web_surfer._is_screenshot_unchanged(changed, typed_state)
+
+
+@pytest.mark.asyncio
+async def test_trimmed_orchestrator_history_resends_the_screenshot():
+    web_surfer = make_web_surfer()
+    client = ReplayChatCompletionClient([])
+    team = GroupChat(
+        [UserProxyAgent("user_proxy"), web_surfer], client, OrchestratorConfig()
+    )
+    await team._init(team._runtime)
+    orchestrator = await team._runtime.try_get_underlying_agent_instance(
+        AgentId(type=team._group_chat_manager_topic_type, key=team._team_id),
+        type=Orchestrator,
+    )
+    screenshot = Screenshot(make_png())
+    page_state = (0, "https://example.com", 1)
+    web_surfer._is_screenshot_unchanged(screenshot, page_state)
+
+    # The orchestrator dropped the previous responses of the web surfer
+    await orchestrator._reset_websurfer_screenshot()
+    assert not web_surfer._is_screenshot_unchanged(screenshot, page_state)
+    assert web_surfer._is_screenshot_unchanged(screenshot, page_state)
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from magentic_ui.tools.search_browser_pool import SearchBrowserPool
+
+
+@pytest.mark.asyncio
+async def test_pages_share_one_browser():
+    pool = SearchBrowserPool(max_concurrency=2, idle_timeout=60)
+    try:
+        async with pool.page() as page:
+            await page.set_content("<p>first</p>")
+        async with pool.page() as page:
+            await page.set_content("<p>second</p>")
+            assert pool.active_pages == 1
+        assert pool.launches == 1
+        assert pool.active_pages == 0
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded():
+    pool = SearchBrowserPool(max_concurrency=2, idle_timeout=60)
+    max_seen = 0
+
+    async def open_page() -> None:
+        nonlocal max_seen
+        async with pool.page():
+            max_seen = max(max_seen, pool.active_pages)
+            await asyncio.sleep(0.2)
+
+    try:
+        await asyncio.gather(*[open_page() for _ in range(5)])
+        assert max_seen <= 2
+        assert pool.launches == 1
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_idle_browser_is_evicted():
+    pool = SearchBrowserPool(max_concurrency=1, idle_timeout=0.2)
+    try:
+        async with pool.page():
+            pass
+        await asyncio.sleep(0.5)
+        # The browser was closed while idle, so the next page launches a new one
+        async with pool.page():
+            pass
+        assert pool.launches == 2
+    finally:
+        await pool.close()
@@ -0,0 +1,81 @@
+import os
+import threading
+import time
+
+import pytest
+
+from magentic_ui.tools import bing_search
+from magentic_ui.tools.search_cache import SearchCache
+
+
+def test_entries_persist_across_instances(tmp_path):
+    cache = SearchCache(tmp_path)
+    links = [{"display_text": "Example", "url": "https://example.com"}]
+    cache.set_search_results("magentic ui", "# Results", links)
+    cache.set_page("https://example.com", "# Example")
+    cache.set_page_snippet("https://example.com", 10, "# Ex")
+
+    reopened = SearchCache(tmp_path)
+    assert reopened.get_search_results(" magentic ui ") == {
+        "search_results": "# Results",
+        "links": links,
+    }
+    assert reopened.get_page("https://example.com") == {
+        "markdown": "# Example",
+        "snippets": {"10": "# Ex"},
+    }
+    assert reopened.get_page("https://example.org") is None
+    assert reopened.hits == 2
+    assert reopened.misses == 1
+
+
+def test_entries_expire(tmp_path):
+    cache = SearchCache(tmp_path, ttl_seconds=0.1)
+    cache.set_page("https://example.com", "# Example")
+    assert cache.get_page("https://example.com") is not None
+    time.sleep(0.2)
+    assert cache.get_page("https://example.com") is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = SearchCache(tmp_path, max_entries=2)
+    cache.set_page("https://a.com", "a")
+    cache.set_page("https://b.com", "b")
+    # Touch a so that b becomes the least recently used entry
+    assert cache.get_page("https://a.com") is not None
+    cache.set_page("https://c.com", "c")
+
+    assert cache.get_page("https://b.com") is None
+    assert cache.get_page("https://a.com") is not None
+    assert cache.get_page("https://c.com") is not None
+    assert len(os.listdir(tmp_path)) == 2
+
+
+@pytest.mark.asyncio
+async def test_bing_search_reads_the_cache_once_off_the_event_loop(
+    tmp_path, monkeypatch
+):
+    cache = SearchCache(tmp_path)
+    links = [{"display_text": "Example", "url": "https://example.com"}]
+    cache.set_search_results("magentic ui", "[Example](https://example.com)", links)
+    cache.set_page("https://example.com", "# Example page", {"100": "# Example"})
+
+    page_reads = []
+    get_page = cache.get_page
+
+    def tracked_get_page(url):
+        page_reads.append(threading.current_thread() is threading.main_thread())
+        return get_page(url)
+
+    async def extract_page_markdown(url, browser_pool=None):
+        raise AssertionError("Cached pages are not opened again")
+
+    monkeypatch.setattr(cache, "get_page", tracked_get_page)
+    monkeypatch.setattr(bing_search, "extract_page_markdown", extract_page_markdown)
+    results = await bing_search.get_bing_search_results(
+        "magentic ui", max_tokens_per_page=100, browser_pool=object(), cache=cache
+    )
+    assert results.page_contents == {"https://example.com": "# Example page"}
+    assert "# Example\n" in results.combined_content
+    assert page_reads == [False]
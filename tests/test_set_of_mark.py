@@ -0,0 +1,56 @@
+from PIL import Image
+
+from magentic_ui.agents.web_surfer._set_of_mark import add_set_of_mark
+
+
+def region(tag_name, left, top, width=100, height=30):
+    rect = {
+        "x": left,
+        "y": top,
+        "left": left,
+        "top": top,
+        "width": width,
+        "height": height,
+        "right": left + width,
+        "bottom": top + height,
+    }
+    return {
+        "tag_name": tag_name,
+        "role": "link",
+        "aria_name": "",
+        "v_scrollable": False,
+        "rects": [rect],
+    }
+
+
+ROIS = {
+    "40": region("a", 100, 1200),  # below
+    "41": region("a", 100, 100),  # visible
+    "42": region("option", 100, -500),  # options are always visible
+    "43": region("a", 100, -300),  # above
+    "44": region("a", 100, 400, width=0),  # empty
+    "45": region("a", 2000, 400),  # outside horizontally
+}
+
+
+def test_classifies_regions_in_order():
+    screenshot = Image.new("RGB", (1440, 900), "white")
+    image, visible, above, below, id_mapping = add_set_of_mark(
+        screenshot, ROIS, use_sequential_ids=True, output_size=(720, 450)
+    )
+    assert image is not None and image.size == (720, 450)
+    assert (visible, above, below) == (["1", "2"], ["3"], ["4"])
+    assert id_mapping == {"1": "41", "2": "42", "3": "43", "4": "40"}
+    # The marks are drawn on the scaled image, the screenshot is left untouched
+    assert image.getpixel((100, 50)) == (255, 0, 0)
+    assert screenshot.getpixel((200, 100)) == (255, 255, 255)
+
+
+def test_classifies_without_rendering():
+    screenshot = Image.new("RGB", (1440, 900), "white")
+    image, visible, above, below, id_mapping = add_set_of_mark(
+        screenshot, ROIS, render=False
+    )
+    assert image is None
+    assert (visible, above, below) == (["41", "42"], ["43"], ["40"])
+    assert id_mapping["41"] == "41"
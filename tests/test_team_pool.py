@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from magentic_ui.backend.teammanager import TeamManager, TeamPool
+
+
+class FakeTeamManager:
+    def __init__(self) -> None:
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+def factory_for(created):
+    async def factory():
+        await asyncio.sleep(0.01)
+        team_manager = FakeTeamManager()
+        created.append(team_manager)
+        return team_manager
+
+    return factory
+
+
+@pytest.mark.asyncio
+async def test_acquire_matching_team_and_close_mismatched():
+    pool = TeamPool(max_size=2)
+    created = []
+    assert pool.prewarm(1, "a", factory_for(created))
+    assert not pool.prewarm(1, "a", factory_for(created))
+    assert pool.prewarm(2, "a", factory_for(created))
+
+    team_manager = await pool.acquire(1, "a")
+    assert team_manager is created[0] and not team_manager.closed
+    assert await pool.acquire(1, "a") is None
+
+    # Settings changed since the team was prepared
+    assert await pool.acquire(2, "b") is None
+    await pool.close()
+    assert created[1].closed
+    assert len(pool) == 0
+
+
+@pytest.mark.asyncio
+async def test_evicts_oldest_and_idle_teams():
+    pool = TeamPool(max_size=1, idle_timeout=0.05)
+    created = []
+    pool.prewarm(1, "a", factory_for(created))
+    pool.prewarm(2, "a", factory_for(created))
+    assert 1 not in pool and 2 in pool
+
+    await asyncio.sleep(0.1)
+    await pool.close()
+    assert len(pool) == 0
+    assert [team_manager.closed for team_manager in created] == [True, True]
+
+
+@pytest.mark.asyncio
+async def test_failed_creation_is_not_handed_out():
+    pool = TeamPool()
+
+    async def failing_factory():
+        raise RuntimeError("Docker is not running")
+
+    pool.prewarm(1, "a", failing_factory)
+    assert await pool.acquire(1, "a") is None
+
+
+def test_team_settings_ignore_other_settings():
+    settings = {"cooperative_planning": True, "model_configs": "{}"}
+    ui_settings = {"ui": {"show_llm_call_events": True}, "environment": []}
+    assert TeamManager.get_team_settings({**settings, **ui_settings}) == settings
@@ -0,0 +1,47 @@
+from magentic_ui.tools.token_counter import TokenCounter, get_tokenizer
+
+TEXT = "\n".join(
+    f"## Section {i}\n\nSome [link text](https://example.com/page/{i}) and a few "
+    "words about the web surfer, with <|endoftext|> in the page."
+    for i in range(2000)
+)
+
+
+def truncate_in_full(text, max_tokens):
+    tokenizer = get_tokenizer()
+    tokens = tokenizer.encode(text, disallowed_special=())
+    return tokenizer.decode(tokens[:max_tokens])
+
+
+def test_truncate_matches_encoding_the_whole_text():
+    counter = TokenCounter()
+    for max_tokens in [1, 17, 500, 5000, 30000]:
+        assert counter.truncate(TEXT, max_tokens) == truncate_in_full(TEXT, max_tokens)
+
+
+def test_short_texts_are_not_encoded():
+    counter = TokenCounter()
+    assert counter.truncate("short", 100) == "short"
+    assert counter.truncate(TEXT, -1) is TEXT
+    assert counter.misses == 0
+
+
+def test_results_are_remembered():
+    counter = TokenCounter()
+    count = counter.count(TEXT)
+    assert count == len(get_tokenizer().encode(TEXT, disallowed_special=()))
+    assert counter.count(TEXT) == count
+    assert counter.truncate(TEXT, count) is TEXT
+    truncated = counter.truncate(TEXT, 1000)
+    assert counter.truncate(TEXT, 1000) == truncated
+    assert counter.hits == 2
+
+
+def test_cache_is_bounded():
+    counter = TokenCounter(max_entries=2)
+    for i in range(5):
+        counter.count(f"text {i}")
+    counter.count("text 0")
+    assert counter.hits == 0
+    counter.count("text 0")
+    assert counter.hits == 1
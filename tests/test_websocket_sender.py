@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from magentic_ui.backend.web.managers.sender import SCREENSHOT_OMITTED, WebSocketSender
+
+
+class SlowWebSocket:
+    """Records the sent messages, only sending once released"""
+
+    def __init__(self) -> None:
+        self.sent = []
+        self.released = asyncio.Event()
+
+    async def send_json(self, message):
+        await self.released.wait()
+        self.sent.append(message)
+
+
+def chunk(content):
+    return {"type": "message_chunk", "data": {"source": "coder", "content": content}}
+
+
+@pytest.mark.asyncio
+async def test_send_does_not_wait_and_coalesces():
+    websocket = SlowWebSocket()
+    sender = WebSocketSender(websocket, run_id=1)
+    # Blocks the writer on the first message
+    sender.send({"type": "system", "status": "connected"})
+    await asyncio.sleep(0)
+
+    sender.send(chunk("Hel"))
+    sender.send(chunk("lo"))
+    sender.send({"type": "system", "status": "active"})
+    sender.send({"type": "system", "status": "awaiting_input"})
+    assert sender.depth == 2
+
+    websocket.released.set()
+    assert await sender.drain(timeout=1)
+    assert websocket.sent == [
+        {"type": "system", "status": "connected"},
+        chunk("Hello"),
+        {"type": "system", "status": "awaiting_input"},
+    ]
+    await sender.close()
+
+
+@pytest.mark.asyncio
+async def test_lagging_client_skips_screenshots_and_chunks():
+    websocket = SlowWebSocket()
+    sender = WebSocketSender(websocket, run_id=1, max_size=4, lag_threshold=2)
+    sender.send({"type": "message", "data": {"content": "first"}})
+    await asyncio.sleep(0)
+
+    sender.send(chunk("a"))
+    sender.send({"type": "message", "data": {"content": "second"}})
+    screenshot = {"url": "data:image/png;base64,AAAA"}
+    sender.send({"type": "message", "data": {"content": ["page", screenshot]}})
+    sender.send({"type": "message", "data": {"content": "third"}})
+    sender.send({"type": "message", "data": {"content": "fourth"}})
+
+    websocket.released.set()
+    assert await sender.drain(timeout=1)
+    assert [message["data"]["content"] for message in websocket.sent] == [
+        "first",
+        "second",
+        ["page", SCREENSHOT_OMITTED],
+        "third",
+        "fourth",
+    ]
+    assert sender.stats["dropped"] == 1
+    assert sender.stats["screenshots_omitted"] == 1
+    await sender.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_send_reports_error():
+    class BrokenWebSocket:
+        async def send_json(self, message):
+            raise RuntimeError("connection reset")
+
+    errors = []
+
+    async def on_error(error):
+        errors.append(error)
+
+    sender = WebSocketSender(BrokenWebSocket(), run_id=1, on_error=on_error)
+    sender.send({"type": "system", "status": "connected"})
+    assert not await sender.drain(timeout=1)
+    assert sender.closed
+    assert [str(error) for error in errors] == ["connection reset"]
+    await sender.close()
@@ -0,0 +1,98 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+from magentic_ui.backend.utils.workspace_watcher import WorkspaceWatcher
+
+
+@pytest.mark.asyncio
+async def test_reports_created_files_once(tmp_path):
+    (tmp_path / "existing.txt").write_text("existing")
+    watcher = WorkspaceWatcher(tmp_path, since=time.time(), use_notifications=False)
+    await watcher.start()
+    try:
+        assert await watcher.poll() == []
+
+        (tmp_path / "data" / "nested").mkdir(parents=True)
+        (tmp_path / "data" / "nested" / "result.csv").write_text("a,b")
+        (tmp_path / "data" / "module.pyc").write_bytes(b"")
+        (tmp_path / "__pycache__").mkdir()
+        (tmp_path / "__pycache__" / "module.py").write_text("")
+
+        new_files = await watcher.poll()
+        assert [file["name"] for file in new_files] == ["result.csv"]
+        assert await watcher.poll() == []
+
+        (tmp_path / "data" / "nested" / "report.md").write_text("# Report")
+        assert [file["name"] for file in await watcher.poll()] == ["report.md"]
+        assert [file["name"] for file in watcher.files] == ["result.csv", "report.md"]
+    finally:
+        await watcher.close()
+
+
+@pytest.mark.asyncio
+async def test_forgets_removed_directories(tmp_path):
+    watcher = WorkspaceWatcher(tmp_path, since=time.time(), use_notifications=False)
+    await watcher.start()
+    try:
+        (tmp_path / "out").mkdir()
+        (tmp_path / "out" / "plot.png").write_bytes(b"")
+        assert [file["name"] for file in await watcher.poll()] == ["plot.png"]
+
+        (tmp_path / "out" / "plot.png").unlink()
+        (tmp_path / "out").rmdir()
+        assert await watcher.poll() == []
+        assert watcher.files == []
+    finally:
+        await watcher.close()
+
+
+@pytest.mark.asyncio
+async def test_reports_modified_existing_files_at_the_end(tmp_path):
+    (tmp_path / "notes.md").write_text("old")
+    (tmp_path / "unchanged.md").write_text("old")
+    start_time = time.time()
+    os.utime(tmp_path / "notes.md", (start_time - 10, start_time - 10))
+    os.utime(tmp_path / "unchanged.md", (start_time - 10, start_time - 10))
+    watcher = WorkspaceWatcher(tmp_path, since=start_time, use_notifications=False)
+    await watcher.start()
+    try:
+        (tmp_path / "notes.md").write_text("new")
+        # Only created files are reported while the team runs
+        assert await watcher.poll() == []
+        assert [file["name"] for file in await watcher.get_files()] == ["notes.md"]
+    finally:
+        await watcher.close()
+
+
+@pytest.mark.asyncio
+async def test_file_notifications(tmp_path):
+    (tmp_path / "notes.md").write_text("old")
+    start_time = time.time()
+    os.utime(tmp_path / "notes.md", (start_time - 10, start_time - 10))
+    watcher = WorkspaceWatcher(tmp_path, since=start_time)
+    await watcher.start()
+    try:
+        # Let the watcher pick up the changes made before it started watching
+        await asyncio.sleep(0.5)
+        assert await watcher.poll() == []
+
+        (tmp_path / "out").mkdir()
+        (tmp_path / "out" / "plot.png").write_bytes(b"")
+        (tmp_path / "notes.md").write_text("new")
+        new_files = []
+        for _ in range(50):
+            await asyncio.sleep(0.1)
+            new_files.extend(await watcher.poll())
+            if new_files and len(watcher.files) == 2:
+                break
+        assert [file["name"] for file in new_files] == ["plot.png"]
+        # The write to the existing file was seen through its notification
+        assert sorted(file["name"] for file in watcher.files) == [
+            "notes.md",
+            "plot.png",
+        ]
+    finally:
+        await watcher.close()